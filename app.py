@@ -1,14 +1,42 @@
 from flask import Flask, render_template, request, jsonify, send_from_directory, redirect
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+from concurrent.futures import ThreadPoolExecutor
+import click
+import hmac
+import sys
+import threading
 import json
+import mimetypes
 import os
 import requests
+from http.cookiejar import DefaultCookiePolicy
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from django_admin.kambel_admin import fastjson, shared_secrets
+from django_admin.kambel_admin.sqlite_cache import SharedCache
+from proxy_cache import ProxyCache, WarmUp
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify() and friends encoded with the same fast encoder as the Django API"""
+
+    def dumps(self, obj, **kwargs):
+        return fastjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return fastjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(fastjson.dumps(obj), mimetype=self.mimetype)
+
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)
 
 # Configuration
@@ -19,16 +47,71 @@ app.config['MAIL_USE_TLS'] = True
 app.config['MAIL_USERNAME'] = 'your-email@gmail.com'
 app.config['MAIL_PASSWORD'] = 'your-app-password'
 
+# Django API response cache: seconds entries live for, and seconds between
+# content version checks
+app.config['API_CACHE_TTL'] = 300
+app.config['API_CACHE_CHECK_INTERVAL'] = 30
+# SQLite file the cache is kept in, shared by every worker process on this
+# machine; None keeps it in this process
+app.config['API_CACHE_PATH'] = os.path.join(app.root_path, 'cache', 'api.sqlite3')
+# Token Django's invalidation events must carry. Unless it is set here, it is
+# read from CACHE_INVALIDATION_TOKEN_FILE, which Django reads too; whichever
+# side needs it first generates it
+app.config['CACHE_INVALIDATION_TOKEN'] = ''
+app.config['CACHE_INVALIDATION_TOKEN_FILE'] = os.path.join(app.root_path, 'cache', 'invalidation.token')
+
+# Cache warm-up (flask --app app warm-cache): whether run.py warms the cache
+# when it starts (and /api/ready answers 503 until done), and how many
+# requests it makes at once
+app.config['WARM_UP_ON_BOOT'] = False
+app.config['WARM_UP_WORKERS'] = 8
+
+# Connections to Django kept open per process: enough for every request a
+# production worker serves at once (see gunicorn.conf.py)
+app.config['UPSTREAM_POOL_SIZE'] = 100
+
 # Django Admin API Configuration
 DJANGO_API_BASE = 'http://localhost:8000/api'
 
+# Keep-alive connections to Django shared by every request in this process,
+# so each call doesn't pay for a new TCP connection; cookies Django sets are
+# not kept, as they'd be sent on behalf of every visitor
+django_api = requests.Session()
+django_api.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+django_api.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=app.config['UPSTREAM_POOL_SIZE']))
+
+api_cache = ProxyCache(
+    ttl=app.config['API_CACHE_TTL'], check_interval=app.config['API_CACHE_CHECK_INTERVAL'],
+    store=SharedCache(app.config['API_CACHE_PATH']) if app.config['API_CACHE_PATH'] else None
+)
+rewarm_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='api-cache-rewarm')
+warm_up = WarmUp(ready=not app.config['WARM_UP_ON_BOOT'])
+
+# API routes that answer per-request queries or report state, so there's nothing to warm
+WARM_UP_SKIPPED = {'/api/search', '/api/suggest', '/api/version', '/api/changes', '/api/ready'}
+
+def check_content_version():
+    """Drop cached responses that invalidation events we missed have made stale"""
+    try:
+        response = django_api.get(f"{DJANGO_API_BASE}/version/", timeout=2)
+        api_cache.check_version(fastjson.loads(response.content)['version'])
+    except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+        print(f"Failed to check the content version: {e}")
+
 # Helper function to fetch data from Django Admin API
-def fetch_from_django_api(endpoint):
-    """Fetch data from Django Admin API with fallback to empty list"""
+def fetch_from_django_api(endpoint, refresh=False):
+    """Fetch data from Django Admin API with fallback to empty list; responses are cached in api_cache"""
+    if api_cache.needs_check():
+        check_content_version()
+    cached = None if refresh else api_cache.get(endpoint)
+    if cached is not None:
+        return cached
     try:
-        response = requests.get(f"{DJANGO_API_BASE}/{endpoint}", timeout=5)
+        response = django_api.get(f"{DJANGO_API_BASE}/{endpoint}", timeout=5)
         if response.status_code == 200:
-            return response.json()
+            data = fastjson.loads(response.content)
+            api_cache.set(endpoint, data, int(response.headers.get('X-Content-Version', 0)))
+            return data
         else:
             print(f"Django API error for {endpoint}: {response.status_code}")
             return None
@@ -36,9 +119,25 @@ def fetch_from_django_api(endpoint):
         print(f"Failed to connect to Django API for {endpoint}: {e}")
         return None
 
+def relay_stream(response, chunk_size=64 * 1024):
+    """Pass a streamed Django API response through as it arrives, without decoding it"""
+    def generate():
+        try:
+            yield from response.iter_content(chunk_size)
+        finally:
+            response.close()
+    relayed = app.response_class(generate(), status=response.status_code, mimetype='application/json')
+    if 'X-Content-Version' in response.headers:
+        relayed.headers['X-Content-Version'] = response.headers['X-Content-Version']
+    return relayed
+
+# Response shapes: each get_*() fetches from Django and hands the data to a
+# shape_*() function, shared with the asyncio proxy (async_app.py)
 def get_blog_posts():
     """Get blog posts from Django Admin API"""
-    posts = fetch_from_django_api('blog/')
+    return shape_blog_posts(fetch_from_django_api('blog/'))
+
+def shape_blog_posts(posts):
     # Transform Django data to match frontend expectations
     return [
         {
@@ -53,12 +152,14 @@ def get_blog_posts():
             "cover_image_url": post.get('cover_image_url'),
             "tags": [post.get('category', '').lower()]
         }
-        for post in posts
+        for post in posts or []
     ]
 
 def get_publications():
     """Get publications from Django Admin API"""
-    books = fetch_from_django_api('publications/')
+    return shape_publications(fetch_from_django_api('publications/'))
+
+def shape_publications(books):
     # Group books by category
     publications = {
         "course_books": [],
@@ -67,7 +168,7 @@ def get_publications():
         "literature": []
     }
     
-    for book in books:
+    for book in books or []:
         book_data = {
             "id": book.get('id', 0),
             "title": book.get('title', ''),
@@ -96,7 +197,9 @@ def get_publications():
 
 def get_masterclasses():
     """Get masterclasses from Django Admin API"""
-    data = fetch_from_django_api('masterclasses/')
+    return shape_masterclasses(fetch_from_django_api('masterclasses/'))
+
+def shape_masterclasses(data):
     if not data:
         return {"upcoming": [], "previous": []}
     
@@ -127,7 +230,9 @@ def get_masterclasses():
 
 def get_site_config():
     """Get site configuration from Django Admin API"""
-    config = fetch_from_django_api('site/config/')
+    return shape_site_config(fetch_from_django_api('site/config/'))
+
+def shape_site_config(config):
     if not config:
         # Return default configuration
         return {
@@ -151,7 +256,9 @@ def get_site_config():
 
 def get_kict_courses():
     """Get KICT courses from Django Admin API"""
-    courses = fetch_from_django_api('kict/courses/')
+    return shape_kict_courses(fetch_from_django_api('kict/courses/'))
+
+def shape_kict_courses(courses):
     return [
         {
             "id": course.get('id', 0),
@@ -162,12 +269,14 @@ def get_kict_courses():
             "instructor": course.get('instructor', ''),
             "start_date": course.get('start_date', '')
         }
-        for course in courses
+        for course in courses or []
     ]
 
 def get_contact_info():
     """Get contact information from Django Admin API"""
-    contact_data = fetch_from_django_api('site/contact-info/')
+    return shape_contact_info(fetch_from_django_api('site/contact-info/'))
+
+def shape_contact_info(contact_data):
     if contact_data:
         return contact_data
     # Fallback to default values
@@ -183,7 +292,9 @@ def get_contact_info():
 
 def get_social_media_links():
     """Get social media links from Django Admin API"""
-    links = fetch_from_django_api('site/social-media/')
+    return shape_social_media_links(fetch_from_django_api('site/social-media/'))
+
+def shape_social_media_links(links):
     return [
         {
             "platform": link.get('platform', ''),
@@ -191,12 +302,14 @@ def get_social_media_links():
             "icon_class": link.get('icon_class', ''),
             "order": link.get('order', 0)
         }
-        for link in links
+        for link in links or []
     ]
 
 def get_seo_content(page):
     """Get SEO content for a specific page from Django Admin API"""
-    seo_data = fetch_from_django_api(f'site/seo/{page}/')
+    return shape_seo_content(page, fetch_from_django_api(f'site/seo/{page}/'))
+
+def shape_seo_content(page, seo_data):
     if seo_data:
         return seo_data
     # Fallback to default values
@@ -210,19 +323,49 @@ def get_seo_content(page):
         "og_image_url": None
     }
 
+# Pages pointing at the fingerprinted assets, written by `manage.py build_static_assets`
+BUILT_PAGES_DIR = os.path.join('build', 'pages')
+# Pages with critical CSS inlined, written by `manage.py extract_critical_css`
+CRITICAL_PAGES_DIR = os.path.join('build', 'critical')
+# The stylesheet the inlined rules are taken from
+CRITICAL_SOURCE_STYLESHEET = os.path.join('static', 'css', 'style.css')
+
+def is_newer(path, *sources):
+    """Whether path exists and is at least as new as every one of sources"""
+    try:
+        return os.path.getmtime(path) >= max(os.path.getmtime(source) for source in sources)
+    except OSError:
+        return False
+
+def page_directory(filename):
+    """Directory to send a root HTML page from: its critical-CSS build while that is
+    newer than the page it was made from and the stylesheet, else its asset build
+    while that is newer than the page, else the page itself"""
+    root = app.root_path
+    built = os.path.join(root, BUILT_PAGES_DIR, filename)
+    source_dir = BUILT_PAGES_DIR if is_newer(built, os.path.join(root, filename)) else '.'
+    critical = os.path.join(root, CRITICAL_PAGES_DIR, filename)
+    if is_newer(critical, os.path.join(root, source_dir, filename), os.path.join(root, CRITICAL_SOURCE_STYLESHEET)):
+        return CRITICAL_PAGES_DIR
+    return source_dir
+
+def send_page(filename):
+    """Send a root HTML page"""
+    return send_from_directory(page_directory(filename), filename)
+
 # Routes
 @app.route('/')
 def index():
-    return send_from_directory('.', 'index.html')
+    return send_page('index.html')
 
 # Support direct navigation to index.html
 @app.route('/index.html')
 def index_html():
-    return send_from_directory('.', 'index.html')
+    return send_page('index.html')
 
 @app.route('/publications.html')
 def publications():
-    return send_from_directory('.', 'publications.html')
+    return send_page('publications.html')
 
 
 # Redirect old publication pages to new unified page
@@ -246,7 +389,7 @@ def literature():
 
 @app.route('/consultancy-unified.html')
 def consultancy_unified():
-    return send_from_directory('.', 'consultancy-unified.html')
+    return send_page('consultancy-unified.html')
 
 # Redirect old consultancy.html to unified page
 @app.route('/consultancy.html')
@@ -273,27 +416,55 @@ def business():
 # About page
 @app.route('/about.html')
 def about():
-    return send_from_directory('.', 'about.html')
+    return send_page('about.html')
 
 # Gallery page
 @app.route('/gallery.html')
 def gallery():
-    return send_from_directory('.', 'gallery.html')
+    return send_page('gallery.html')
 
 
 # Masterclass page
 @app.route('/masterclass.html')
 def masterclass():
-    return send_from_directory('.', 'masterclass.html')
+    return send_page('masterclass.html')
 
 # Legal pages
 @app.route('/privacy-policy.html')
 def privacy_policy():
-    return send_from_directory('.', 'privacy-policy.html')
+    return send_page('privacy-policy.html')
 
 @app.route('/terms-conditions.html')
 def terms_conditions():
-    return send_from_directory('.', 'terms-conditions.html')
+    return send_page('terms-conditions.html')
+
+# Fingerprinted assets written by `manage.py build_static_assets`; their names
+# change whenever their content does, so they can be cached forever
+PRECOMPRESSED_ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+def built_asset_encoding(dist_dir, filename, accept_encoding):
+    """Content encoding of the precompressed copy of a built asset to send, or None for the original"""
+    accepted = {part.split(';')[0].strip().lower() for part in accept_encoding.split(',')}
+    return next(
+        (name for name, suffix in PRECOMPRESSED_ENCODINGS
+         if name in accepted and os.path.isfile(os.path.join(dist_dir, filename + suffix))),
+        None
+    )
+
+@app.route('/static/dist/<path:filename>')
+def built_asset(filename):
+    """Serve a built asset, using its precompressed copy when the client accepts it"""
+    if filename.endswith(('.br', '.gz')):
+        return not_found(None)
+    dist_dir = os.path.join(app.static_folder, 'dist')
+    encoding = built_asset_encoding(dist_dir, filename, request.headers.get('Accept-Encoding', ''))
+    suffix = dict(PRECOMPRESSED_ENCODINGS).get(encoding, '')
+    response = send_from_directory(dist_dir, filename + suffix, mimetype=mimetypes.guess_type(filename)[0])
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
 
 @app.route('/api/blog')
 def api_get_blog_posts():
@@ -346,7 +517,7 @@ def api_get_masterclasses():
 def get_masterclass(masterclass_id):
     """Get a specific masterclass"""
     masterclasses = get_masterclasses()
-    masterclass = next((m for m in masterclasses if m['id'] == masterclass_id), None)
+    masterclass = next((m for m in masterclasses['upcoming'] + masterclasses['previous'] if m['id'] == masterclass_id), None)
     if masterclass:
         return jsonify(masterclass)
     return jsonify({'error': 'Masterclass not found'}), 404
@@ -374,95 +545,264 @@ def api_get_site_config():
     config = get_site_config()
     return jsonify(config)
 
+# Answers used when Django has none to give
+HERO_DEFAULTS = {
+    'hero_title': 'Welcome to Kambel Consult',
+    'hero_subtitle': 'Your trusted partner in career development and business excellence',
+    'profile_name': 'Moses Agbesi Katamani',
+    'profile_title': 'Chief Executive Officer',
+    'profile_picture_url': None,
+    'years_experience': '15+',
+    'years_label': 'Years Experience',
+    'years_description': 'Professional Development',
+    'clients_count': '5000+',
+    'clients_label': 'Clients',
+    'clients_description': 'Successfully Helped',
+    'publications_count': '50+',
+    'publications_label': 'Publications',
+    'publications_description': 'Authored Works'
+}
+PRIVACY_POLICY_DEFAULTS = {
+    'title': 'Privacy Policy',
+    'subtitle': 'Your privacy is important to us. This policy explains how we collect, use, and protect your information.',
+    'content': '<p>Privacy policy content will be available soon.</p>',
+    'last_updated': None
+}
+TERMS_CONDITIONS_DEFAULTS = {
+    'title': 'Terms & Conditions',
+    'subtitle': 'Please read these terms and conditions carefully before using our services.',
+    'content': '<p>Terms and conditions content will be available soon.</p>',
+    'last_updated': None
+}
+
 @app.route('/api/site/hero')
 def api_get_hero_config():
     """Get hero configuration from Django API"""
     hero_config = fetch_from_django_api('site/hero/')
     if not hero_config:
         # Return default values
-        return jsonify({
-            'hero_title': 'Welcome to Kambel Consult',
-            'hero_subtitle': 'Your trusted partner in career development and business excellence',
-            'profile_name': 'Moses Agbesi Katamani',
-            'profile_title': 'Chief Executive Officer',
-            'profile_picture_url': None,
-            'years_experience': '15+',
-            'years_label': 'Years Experience',
-            'years_description': 'Professional Development',
-            'clients_count': '5000+',
-            'clients_label': 'Clients',
-            'clients_description': 'Successfully Helped',
-            'publications_count': '50+',
-            'publications_label': 'Publications',
-            'publications_description': 'Authored Works'
-        })
+        return jsonify(HERO_DEFAULTS)
     return jsonify(hero_config)
 
 @app.route('/api/site/privacy-policy')
 def api_get_privacy_policy():
     """Get privacy policy from Django API"""
     try:
-        response = requests.get(f"{DJANGO_API_BASE}/site/privacy-policy/", timeout=5)
+        response = django_api.get(f"{DJANGO_API_BASE}/site/privacy-policy/", timeout=5)
         if response.status_code == 200:
             return jsonify(response.json())
         # Return default values if not found
-        return jsonify({
-            'title': 'Privacy Policy',
-            'subtitle': 'Your privacy is important to us. This policy explains how we collect, use, and protect your information.',
-            'content': '<p>Privacy policy content will be available soon.</p>',
-            'last_updated': None
-        })
+        return jsonify(PRIVACY_POLICY_DEFAULTS)
     except requests.exceptions.RequestException as e:
         print(f"Failed to fetch privacy policy: {e}")
-        return jsonify({
-            'title': 'Privacy Policy',
-            'subtitle': 'Your privacy is important to us. This policy explains how we collect, use, and protect your information.',
-            'content': '<p>Privacy policy content will be available soon.</p>',
-            'last_updated': None
-        })
+        return jsonify(PRIVACY_POLICY_DEFAULTS)
 
 @app.route('/api/site/terms-conditions')
 def api_get_terms_conditions():
     """Get terms & conditions from Django API"""
     try:
-        response = requests.get(f"{DJANGO_API_BASE}/site/terms-conditions/", timeout=5)
+        response = django_api.get(f"{DJANGO_API_BASE}/site/terms-conditions/", timeout=5)
         if response.status_code == 200:
             return jsonify(response.json())
         # Return default values if not found
-        return jsonify({
-            'title': 'Terms & Conditions',
-            'subtitle': 'Please read these terms and conditions carefully before using our services.',
-            'content': '<p>Terms and conditions content will be available soon.</p>',
-            'last_updated': None
-        })
+        return jsonify(TERMS_CONDITIONS_DEFAULTS)
     except requests.exceptions.RequestException as e:
         print(f"Failed to fetch terms & conditions: {e}")
-        return jsonify({
-            'title': 'Terms & Conditions',
-            'subtitle': 'Please read these terms and conditions carefully before using our services.',
-            'content': '<p>Terms and conditions content will be available soon.</p>',
-            'last_updated': None
-        })
+        return jsonify(TERMS_CONDITIONS_DEFAULTS)
+
+def wants_stream(args):
+    """Whether a client asked for a list to be streamed (?stream=1), which bypasses the caches"""
+    return args.get('stream', '').lower() in ('1', 'true')
+
+def gallery_params(args):
+    """Query parameters of the Django gallery API for a request, normalized so they make few cache keys"""
+    return {'featured': 'true' if args.get('featured', '').lower() == 'true' else 'false'}
 
 @app.route('/api/gallery')
 def api_get_gallery():
-    """Get gallery items from Django API"""
+    """Get gallery items from Django API; ?stream=1 relays Django's streamed list instead of the cached one"""
+    params = gallery_params(request.args)
+    if not wants_stream(request.args):
+        gallery = fetch_from_django_api(f"gallery/?featured={params['featured']}")
+        return jsonify(gallery if gallery is not None else [])
     try:
-        featured = request.args.get('featured', 'false')
-        response = requests.get(f"{DJANGO_API_BASE}/gallery/?featured={featured}", timeout=5)
+        response = django_api.get(f"{DJANGO_API_BASE}/gallery/", params={**params, 'stream': 1}, timeout=5, stream=True)
         if response.status_code == 200:
-            return jsonify(response.json())
+            return relay_stream(response)
+        response.close()
         return jsonify([])
     except requests.exceptions.RequestException as e:
         print(f"Failed to fetch gallery: {e}")
         return jsonify([])
 
+@app.route('/api/version')
+def api_content_version():
+    """Content version from Django API, bumped by every content change"""
+    try:
+        return relay_stream(django_api.get(f"{DJANGO_API_BASE}/version/", timeout=5, stream=True))
+    except requests.exceptions.RequestException as e:
+        print(f"Failed to fetch content version: {e}")
+        return jsonify({'error': 'Content version is not available'}), 503
+
+@app.route('/api/changes')
+def api_content_changes():
+    """Objects changed since a content version, from Django API"""
+    try:
+        return relay_stream(django_api.get(f"{DJANGO_API_BASE}/changes/", params=request.args, timeout=5, stream=True))
+    except requests.exceptions.RequestException as e:
+        print(f"Failed to fetch content changes: {e}")
+        return jsonify({'error': 'Content changes are not available'}), 503
+
+def invalidation_token():
+    return app.config['CACHE_INVALIDATION_TOKEN'] or shared_secrets.load_or_create(app.config['CACHE_INVALIDATION_TOKEN_FILE'])
+
+def is_valid_invalidation_token(sent):
+    """Whether an invalidation event carries the token; events are never accepted without one"""
+    token = invalidation_token()
+    return bool(token) and hmac.compare_digest(sent.encode(), token.encode())
+
+@app.route('/internal/cache/invalidate', methods=['POST'])
+def invalidate_api_cache():
+    """Invalidation event from Django: drop the named endpoints and fetch them again"""
+    if not is_valid_invalidation_token(request.headers.get('X-Invalidation-Token', '')):
+        return jsonify({'error': 'Invalid token'}), 403
+    event = request.get_json(silent=True) or {}
+    endpoints = event.get('endpoints')
+    if not isinstance(endpoints, list) or not isinstance(event.get('version'), int):
+        return jsonify({'error': 'Expected {"version": <int>, "endpoints": [...]}'}), 400
+    evicted = api_cache.invalidate(endpoints, event['version'])
+    for endpoint in evicted:
+        rewarm_executor.submit(fetch_from_django_api, endpoint, refresh=True)
+    return jsonify({'evicted': evicted})
+
+@app.route('/api/ready')
+def api_ready():
+    """Readiness check for load balancers: 503 until the boot-time cache warm-up is done"""
+    status = warm_up.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+def warm_up_paths():
+    """Every parameterless GET API of this app, plus the SEO content of every page"""
+    paths = sorted(
+        rule.rule for rule in app.url_map.iter_rules()
+        if rule.rule.startswith('/api/') and 'GET' in rule.methods and not rule.arguments
+        and rule.rule not in WARM_UP_SKIPPED
+    )
+    pages = sorted(name[:-len('.html')] for name in os.listdir(app.root_path) if name.endswith('.html'))
+    return paths + [f'/api/site/seo/{page}' for page in pages]
+
+def warm_cache(base_url=None, workers=None):
+    """Request every warm-up path, filling this process's cache and Django's behind it,
+    or those of the instance at base_url; returns {path: status code or exception}"""
+    def fetch(path):
+        if base_url:
+            return requests.get(f"{base_url.rstrip('/')}{path}", timeout=30).status_code
+        with app.test_client() as client:
+            return client.get(path).status_code
+    return warm_up.run(fetch, warm_up_paths(), workers or app.config['WARM_UP_WORKERS'])
+
+def start_warm_up():
+    """Warm the cache in the background; /api/ready reports not ready until it's done"""
+    threading.Thread(target=warm_cache, name='warm-up', daemon=True).start()
+
+@app.cli.command('warm-cache')
+@click.option('--url', help='Warm the instance running at this URL instead of this process')
+@click.option('--workers', type=int, help='Concurrent requests')
+def warm_cache_command(url, workers):
+    """Fill the proxy cache (and Django's) before visitors arrive."""
+    results = warm_cache(url, workers)
+    failed = {path: result for path, result in results.items() if result != 200}
+    for path, result in failed.items():
+        click.echo(f'  {path}: {result}')
+    status = warm_up.status()
+    click.echo(f"Warmed {len(results) - len(failed)} of {len(results)} URLs in {status['seconds']:.2f}s")
+
+# Server modes compared by bench-server: the development server as run.py
+# starts it (minus the reloader), gunicorn with gunicorn.conf.py, and the
+# asyncio proxy (async_app.py)
+BENCH_SERVERS = {
+    'dev': lambda port: [
+        sys.executable, '-c', f"from app import app; app.run(port={port}, debug=True, threaded=True, use_reloader=False)"
+    ],
+    'production': lambda port: [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}', 'app:app'],
+    'async': lambda port: [sys.executable, 'async_app.py', '--host', '127.0.0.1', '--port', str(port)],
+}
+# Modules each mode needs beyond Flask
+BENCH_REQUIRES = {'production': 'gunicorn', 'async': 'aiohttp'}
+BENCH_PATHS = ['/api/publications', '/api/gallery', '/api/search?q=business', '/api/site/seo/index', '/']
+
+@app.cli.command('bench-server')
+@click.option('--mode', 'modes', multiple=True, type=click.Choice(list(BENCH_SERVERS)), help='Server modes to compare (default all)')
+@click.option('--clients', type=int, default=500, help='Concurrent keep-alive clients')
+@click.option('--seconds', type=float, default=15, help='Duration of each run')
+@click.option('--path', 'paths', multiple=True, help='Path to request (repeatable)')
+@click.option('--url', help='Load-test the instance running at this URL instead')
+def bench_server_command(modes, clients, seconds, paths, url):
+    """Compare p50/p99 latency of the proxy's server modes; Django must be running on port 8000."""
+    # Only this command needs them, so serving the proxy doesn't import them
+    import importlib.util
+    import signal
+    import subprocess
+    import loadtest
+
+    paths = list(paths) or BENCH_PATHS
+
+    def report(label, result):
+        click.echo(
+            f"  {label:<12} {result['rps']:>6} req/s  p50={result['p50']}ms  p99={result['p99']}ms  "
+            f"max={result['max']}ms  errors={result['errors']}  ({clients} clients)"
+        )
+
+    if url:
+        report(url, loadtest.run(url, paths, clients, seconds))
+        return
+    for mode in modes or BENCH_SERVERS:
+        required = BENCH_REQUIRES.get(mode)
+        if required and importlib.util.find_spec(required) is None:
+            click.echo(f'  {mode}: {required} is not installed, skipped')
+            continue
+        port = loadtest.free_port()
+        # app.run() does nothing when it thinks the flask command started it
+        env = {key: value for key, value in os.environ.items() if key != 'FLASK_RUN_FROM_CLI'}
+        process = subprocess.Popen(
+            BENCH_SERVERS[mode](port), cwd=app.root_path, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+        try:
+            loadtest.wait_until_up(f'http://127.0.0.1:{port}/api/ready', process=process)
+            report(mode, loadtest.run(f'http://127.0.0.1:{port}', paths, clients, seconds))
+        finally:
+            if process.poll() is None:
+                # The whole group, gunicorn's workers included
+                os.killpg(process.pid, signal.SIGTERM)
+                process.wait(30)
+
+@app.route('/api/search')
+def api_search():
+    """Full-text search via Django API"""
+    try:
+        response = django_api.get(f"{DJANGO_API_BASE}/search/", params=request.args, timeout=5)
+        return jsonify(response.json()), response.status_code
+    except requests.exceptions.RequestException as e:
+        print(f"Failed to fetch search results: {e}")
+        return jsonify({'query': request.args.get('q', ''), 'count': 0, 'results': []})
+
+@app.route('/api/suggest')
+def api_suggest():
+    """Typeahead title suggestions via Django API"""
+    try:
+        response = django_api.get(f"{DJANGO_API_BASE}/suggest/", params=request.args, timeout=2)
+        return jsonify(response.json()), response.status_code
+    except requests.exceptions.RequestException as e:
+        print(f"Failed to fetch suggestions: {e}")
+        return jsonify({'query': request.args.get('q', ''), 'suggestions': []})
+
 @app.route('/api/masterclass/register', methods=['POST'])
 def api_register_masterclass():
     """Register for masterclass via Django API"""
     try:
         data = request.get_json()
-        response = requests.post(f"{DJANGO_API_BASE}/masterclass/register/", json=data, timeout=5)
+        response = django_api.post(f"{DJANGO_API_BASE}/masterclass/register/", json=data, timeout=5)
         if response.status_code == 200:
             return jsonify(response.json())
         return jsonify({'success': False, 'message': 'Registration failed. Please try again.'}), response.status_code
@@ -470,11 +810,30 @@ def api_register_masterclass():
         print(f"Failed to register masterclass: {e}")
         return jsonify({'success': False, 'message': 'Unable to submit registration. Please try again later.'}), 500
 
+ABOUT_DEFAULTS = {
+    'hero_years': '15+',
+    'hero_clients': '500+',
+    'hero_publications': '50+',
+    'hero_speaking': '100+',
+    'profile_name': 'Moses Agbesi Katamani',
+    'profile_title': 'Founder & CEO, Kambel Consult',
+    'profile_picture_url': None,
+    'bio_summary': 'A visionary leader and expert consultant with over 15 years of experience in education, career development, and business advisory services.',
+    'tags': ['Education Expert', 'Career Coach', 'Business Advisor', 'Author', 'Speaker'],
+    'philosophy_quote': 'Education is the foundation of all progress. Through knowledge, guidance, and strategic thinking, we can unlock the potential within every individual and organization.',
+    'cta_title': 'Ready to Work Together?',
+    'cta_description': "Let's discuss how I can help you achieve your goals and unlock your potential.",
+    'journey': [],
+    'education': [],
+    'achievements': [],
+    'speaking': []
+}
+
 @app.route('/api/site/about')
 def api_get_about_config():
     """Get about page configuration from Django API"""
     try:
-        response = requests.get(f"{DJANGO_API_BASE}/site/about/", timeout=5)
+        response = django_api.get(f"{DJANGO_API_BASE}/site/about/", timeout=5)
         if response.status_code == 200:
             about_config = response.json()
             return jsonify(about_config)
@@ -484,30 +843,13 @@ def api_get_about_config():
         print(f"Failed to connect to Django API for about: {e}")
     
     # Return default values if API fails
-    return jsonify({
-        'hero_years': '15+',
-        'hero_clients': '500+',
-        'hero_publications': '50+',
-        'hero_speaking': '100+',
-        'profile_name': 'Moses Agbesi Katamani',
-        'profile_title': 'Founder & CEO, Kambel Consult',
-        'profile_picture_url': None,
-        'bio_summary': 'A visionary leader and expert consultant with over 15 years of experience in education, career development, and business advisory services.',
-        'tags': ['Education Expert', 'Career Coach', 'Business Advisor', 'Author', 'Speaker'],
-        'philosophy_quote': 'Education is the foundation of all progress. Through knowledge, guidance, and strategic thinking, we can unlock the potential within every individual and organization.',
-        'cta_title': 'Ready to Work Together?',
-        'cta_description': "Let's discuss how I can help you achieve your goals and unlock your potential.",
-        'journey': [],
-        'education': [],
-        'achievements': [],
-        'speaking': []
-    })
+    return jsonify(ABOUT_DEFAULTS)
 
 @app.route('/api/site/page/<slug>')
 def api_get_page_content(slug):
     """Get page content from Django API"""
     try:
-        response = requests.get(f"{DJANGO_API_BASE}/site/page/{slug}/", timeout=5)
+        response = django_api.get(f"{DJANGO_API_BASE}/site/page/{slug}/", timeout=5)
         if response.status_code == 200:
             return jsonify(response.json())
         else:
@@ -529,7 +871,7 @@ def contact():
                 return jsonify({'error': f'{field} is required'}), 400
         
         # Forward to Django admin API
-        response = requests.post('http://localhost:8000/api/contact/', json=data, timeout=5)
+        response = django_api.post('http://localhost:8000/api/contact/', json=data, timeout=5)
         if response.status_code == 200:
             return jsonify(response.json())
         else:
@@ -549,7 +891,7 @@ def newsletter():
             return jsonify({'error': 'Email is required'}), 400
         
         # Forward to Django admin API
-        response = requests.post('http://localhost:8000/api/newsletter/', json=data, timeout=5)
+        response = django_api.post('http://localhost:8000/api/newsletter/', json=data, timeout=5)
         if response.status_code == 200:
             return jsonify(response.json())
         else:
@@ -615,7 +957,7 @@ def save_contact_message(data):
             'message': data['message']
         }
         
-        response = requests.post(
+        response = django_api.post(
             f"{DJANGO_API_BASE}/site/contact/",
             json=contact_data,
             timeout=5
@@ -657,7 +999,7 @@ def save_newsletter_subscription(email):
             'email': email
         }
         
-        response = requests.post(
+        response = django_api.post(
             f"{DJANGO_API_BASE}/site/newsletter/",
             json=subscription_data,
             timeout=5
@@ -0,0 +1,574 @@
+"""
+Kambel Consult proxy on asyncio
+
+The routes and responses of app.py, served by aiohttp, so it can replace the
+Flask proxy behind the same HTML:
+
+    python3 async_app.py --port 5001    # or: python3 run.py --async
+
+Every call to Django goes through one aiohttp client session with a pool of
+keep-alive connections and its own timeout, and none blocks the event loop,
+so one process serves thousands of requests that are waiting on Django.
+Pages that need several endpoints fetch them concurrently with
+asyncio.gather: /api/site/bundle/<page> returns what every page loads
+(configuration, hero, contact details, social links and the page's SEO
+content) in the time of the slowest call rather than the sum of all five.
+
+When a client disconnects, its handler is cancelled along with the Django
+calls it is waiting on. Cached endpoints are fetched once however many
+clients ask for them at the same time; that shared fetch is shielded from
+the cancellation of any one of them and still fills the cache.
+
+Responses are cached in the same ProxyCache as app.py, invalidated by the
+same events and version checks.
+"""
+import argparse
+import asyncio
+import mimetypes
+import os
+
+from aiohttp import ClientError, ClientSession, ClientTimeout, DummyCookieJar, TCPConnector, web
+
+from app import (
+    ABOUT_DEFAULTS, DJANGO_API_BASE, HERO_DEFAULTS, PRECOMPRESSED_ENCODINGS, PRIVACY_POLICY_DEFAULTS,
+    TERMS_CONDITIONS_DEFAULTS, api_cache, app as flask_app, built_asset_encoding, gallery_params,
+    is_valid_invalidation_token, page_directory, process_enrollment, process_purchase, shape_blog_posts,
+    shape_contact_info, shape_kict_courses, shape_masterclasses, shape_publications, shape_seo_content,
+    shape_site_config, shape_social_media_links, wants_stream, warm_up, warm_up_paths
+)
+from django_admin.kambel_admin import fastjson
+
+
+# Seconds each call to Django may take, as in app.py
+UPSTREAM_TIMEOUT = 5
+VERSION_CHECK_TIMEOUT = 2
+SUGGEST_TIMEOUT = 2
+
+# Old pages and the pages that replaced them
+REDIRECTS = {
+    '/course-books.html': '/publications.html',
+    '/guidance-books.html': '/publications.html',
+    '/inspirational-books.html': '/publications.html',
+    '/literature.html': '/publications.html',
+    '/consultancy.html': '/consultancy-unified.html',
+    '/education.html': '/consultancy-unified.html',
+    '/career.html': '/consultancy-unified.html',
+    '/personal-development.html': '/consultancy-unified.html',
+    '/business.html': '/consultancy-unified.html',
+}
+PAGES = {
+    '/': 'index.html',
+    '/index.html': 'index.html',
+    '/publications.html': 'publications.html',
+    '/consultancy-unified.html': 'consultancy-unified.html',
+    '/about.html': 'about.html',
+    '/gallery.html': 'gallery.html',
+    '/masterclass.html': 'masterclass.html',
+    '/privacy-policy.html': 'privacy-policy.html',
+    '/terms-conditions.html': 'terms-conditions.html',
+}
+
+routes = web.RouteTableDef()
+_inflight = {}
+
+
+def timeout(seconds, stream=False):
+    """Per-call limit: on the whole call, or for a stream on connecting and on each read"""
+    if stream:
+        return ClientTimeout(sock_connect=seconds, sock_read=seconds)
+    return ClientTimeout(total=seconds)
+
+
+def json_response(data, status=200):
+    return web.Response(body=fastjson.dumps(data), status=status, content_type='application/json')
+
+
+def django(request):
+    return request.app['django']
+
+
+async def check_content_version(session):
+    """Drop cached responses that invalidation events we missed have made stale"""
+    try:
+        async with session.get(f"{DJANGO_API_BASE}/version/", timeout=timeout(VERSION_CHECK_TIMEOUT)) as response:
+            api_cache.check_version(fastjson.loads(await response.read())['version'])
+    except (ClientError, asyncio.TimeoutError, ValueError, KeyError) as e:
+        print(f"Failed to check the content version: {e}")
+
+
+async def _fetch_upstream(session, endpoint):
+    try:
+        async with session.get(f"{DJANGO_API_BASE}/{endpoint}", timeout=timeout(UPSTREAM_TIMEOUT)) as response:
+            if response.status != 200:
+                print(f"Django API error for {endpoint}: {response.status}")
+                return None
+            data = fastjson.loads(await response.read())
+            api_cache.set(endpoint, data, int(response.headers.get('X-Content-Version', 0)))
+            return data
+    except (ClientError, asyncio.TimeoutError) as e:
+        print(f"Failed to connect to Django API for {endpoint}: {e}")
+        return None
+
+
+async def fetch_from_django_api(session, endpoint, refresh=False):
+    """fetch_from_django_api() of app.py: cached, and fetched once for all concurrent callers"""
+    if api_cache.needs_check():
+        await check_content_version(session)
+    if refresh:
+        return await _fetch_upstream(session, endpoint)
+    cached = api_cache.get(endpoint)
+    if cached is not None:
+        return cached
+    task = _inflight.get(endpoint)
+    if task is None:
+        task = _inflight[endpoint] = asyncio.ensure_future(_fetch_upstream(session, endpoint))
+        task.add_done_callback(lambda _: _inflight.pop(endpoint, None))
+    # A client going away mustn't cancel the fetch other clients are waiting on
+    return await asyncio.shield(task)
+
+
+async def fetch_many(session, *endpoints):
+    """fetch_from_django_api() of every endpoint at once; results in the same order"""
+    return await asyncio.gather(*(fetch_from_django_api(session, endpoint) for endpoint in endpoints))
+
+
+async def relay_stream(request, response, chunk_size=64 * 1024):
+    """Pass a streamed Django API response through as it arrives, without decoding it"""
+    # Sent before the middleware sees the response, so the CORS header goes on here
+    relayed = web.StreamResponse(status=response.status, headers={
+        'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'
+    })
+    if 'X-Content-Version' in response.headers:
+        relayed.headers['X-Content-Version'] = response.headers['X-Content-Version']
+    await relayed.prepare(request)
+    async for chunk in response.content.iter_chunked(chunk_size):
+        await relayed.write(chunk)
+    await relayed.write_eof()
+    return relayed
+
+
+async def relay_json(request, path, fallback, timeout_seconds=UPSTREAM_TIMEOUT, what=None):
+    """Django's JSON answer with its status, or fallback (with 200) when Django can't be reached"""
+    try:
+        async with django(request).get(
+            f"{DJANGO_API_BASE}/{path}", params=request.query, timeout=timeout(timeout_seconds)
+        ) as response:
+            return json_response(await response.json(loads=fastjson.loads), response.status)
+    except (ClientError, asyncio.TimeoutError) as e:
+        print(f"Failed to fetch {what or path}: {e}")
+        return json_response(fallback)
+
+
+# Pages
+
+async def send_page(request):
+    filename = PAGES[request.path]
+    return web.FileResponse(os.path.join(flask_app.root_path, page_directory(filename), filename))
+
+
+async def redirect(request):
+    raise web.HTTPFound(REDIRECTS[request.path])
+
+
+@routes.get('/static/dist/{filename:.+}')
+async def built_asset(request):
+    """Serve a built asset, using its precompressed copy when the client accepts it"""
+    filename = request.match_info['filename']
+    dist_dir = os.path.join(flask_app.static_folder, 'dist')
+    path = os.path.normpath(os.path.join(dist_dir, filename))
+    if filename.endswith(('.br', '.gz')) or not path.startswith(dist_dir + os.sep) or not os.path.isfile(path):
+        raise web.HTTPNotFound()
+    encoding = built_asset_encoding(dist_dir, filename, request.headers.get('Accept-Encoding', ''))
+    response = web.FileResponse(path + dict(PRECOMPRESSED_ENCODINGS).get(encoding, ''), headers={
+        'Content-Type': mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+        'Cache-Control': 'public, max-age=31536000, immutable',
+        'Vary': 'Accept-Encoding',
+    })
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
+# Cached APIs
+
+@routes.get('/api/blog')
+async def api_get_blog_posts(request):
+    return json_response(shape_blog_posts(await fetch_from_django_api(django(request), 'blog/')))
+
+
+@routes.get(r'/api/blog/{post_id:\d+}')
+async def get_blog_post(request):
+    posts = shape_blog_posts(await fetch_from_django_api(django(request), 'blog/'))
+    post = next((p for p in posts if p['id'] == int(request.match_info['post_id'])), None)
+    if post:
+        return json_response(post)
+    return json_response({'error': 'Post not found'}, 404)
+
+
+@routes.get('/api/publications')
+async def api_get_publications(request):
+    return json_response(shape_publications(await fetch_from_django_api(django(request), 'publications/')))
+
+
+@routes.get('/api/publications/{category}')
+async def get_publications_by_category(request):
+    publications = shape_publications(await fetch_from_django_api(django(request), 'publications/'))
+    category = request.match_info['category']
+    if category in publications:
+        return json_response(publications[category])
+    return json_response({'error': 'Category not found'}, 404)
+
+
+@routes.get('/api/categories')
+async def api_get_categories(request):
+    return json_response(await fetch_from_django_api(django(request), 'categories/'))
+
+
+@routes.get('/api/consultancy')
+async def api_get_consultancy(request):
+    return json_response(await fetch_from_django_api(django(request), 'consultancy/'))
+
+
+@routes.get('/api/masterclasses')
+async def api_get_masterclasses(request):
+    return json_response(shape_masterclasses(await fetch_from_django_api(django(request), 'masterclasses/')))
+
+
+@routes.get(r'/api/masterclasses/{masterclass_id:\d+}')
+async def get_masterclass(request):
+    masterclasses = shape_masterclasses(await fetch_from_django_api(django(request), 'masterclasses/'))
+    masterclass_id = int(request.match_info['masterclass_id'])
+    masterclass = next((m for m in masterclasses['upcoming'] + masterclasses['previous'] if m['id'] == masterclass_id), None)
+    if masterclass:
+        return json_response(masterclass)
+    return json_response({'error': 'Masterclass not found'}, 404)
+
+
+@routes.get('/api/kict/courses')
+async def api_get_kict_courses(request):
+    return json_response(shape_kict_courses(await fetch_from_django_api(django(request), 'kict/courses/')))
+
+
+@routes.get('/api/site/contact-info')
+async def api_get_contact_info(request):
+    return json_response(shape_contact_info(await fetch_from_django_api(django(request), 'site/contact-info/')))
+
+
+@routes.get('/api/site/social-media')
+async def api_get_social_media(request):
+    return json_response(shape_social_media_links(await fetch_from_django_api(django(request), 'site/social-media/')))
+
+
+@routes.get('/api/site/seo/{page}')
+async def api_get_seo_content(request):
+    page = request.match_info['page']
+    return json_response(shape_seo_content(page, await fetch_from_django_api(django(request), f'site/seo/{page}/')))
+
+
+@routes.get('/api/site/config')
+async def api_get_site_config(request):
+    return json_response(shape_site_config(await fetch_from_django_api(django(request), 'site/config/')))
+
+
+@routes.get('/api/site/hero')
+async def api_get_hero_config(request):
+    return json_response(await fetch_from_django_api(django(request), 'site/hero/') or HERO_DEFAULTS)
+
+
+@routes.get('/api/site/bundle/{page}')
+async def api_get_page_bundle(request):
+    """Everything a page loads from the API, fetched concurrently"""
+    page = request.match_info['page']
+    config, hero, contact_info, social_media, seo = await fetch_many(
+        django(request), 'site/config/', 'site/hero/', 'site/contact-info/', 'site/social-media/', f'site/seo/{page}/'
+    )
+    return json_response({
+        'config': shape_site_config(config),
+        'hero': hero or HERO_DEFAULTS,
+        'contact_info': shape_contact_info(contact_info),
+        'social_media': shape_social_media_links(social_media),
+        'seo': shape_seo_content(page, seo),
+    })
+
+
+# Uncached APIs
+
+async def fetch_document(request, endpoint, defaults, what):
+    try:
+        async with django(request).get(f"{DJANGO_API_BASE}/{endpoint}", timeout=timeout(UPSTREAM_TIMEOUT)) as response:
+            if response.status == 200:
+                return json_response(await response.json(loads=fastjson.loads))
+            print(f"Django API error for {what}: {response.status}")
+    except (ClientError, asyncio.TimeoutError) as e:
+        print(f"Failed to fetch {what}: {e}")
+    return json_response(defaults)
+
+
+@routes.get('/api/site/privacy-policy')
+async def api_get_privacy_policy(request):
+    return await fetch_document(request, 'site/privacy-policy/', PRIVACY_POLICY_DEFAULTS, 'privacy policy')
+
+
+@routes.get('/api/site/terms-conditions')
+async def api_get_terms_conditions(request):
+    return await fetch_document(request, 'site/terms-conditions/', TERMS_CONDITIONS_DEFAULTS, 'terms & conditions')
+
+
+@routes.get('/api/site/about')
+async def api_get_about_config(request):
+    return await fetch_document(request, 'site/about/', ABOUT_DEFAULTS, 'about')
+
+
+@routes.get('/api/site/page/{slug}')
+async def api_get_page_content(request):
+    slug = request.match_info['slug']
+    try:
+        async with django(request).get(f"{DJANGO_API_BASE}/site/page/{slug}/", timeout=timeout(UPSTREAM_TIMEOUT)) as response:
+            if response.status == 200:
+                return json_response(await response.json(loads=fastjson.loads))
+            return json_response({'error': 'Page not found'}, 404)
+    except (ClientError, asyncio.TimeoutError) as e:
+        print(f"Failed to fetch page content for {slug}: {e}")
+        return json_response({'error': 'Failed to fetch page content'}, 500)
+
+
+@routes.get('/api/gallery')
+async def api_get_gallery(request):
+    params = gallery_params(request.query)
+    if not wants_stream(request.query):
+        gallery = await fetch_from_django_api(django(request), f"gallery/?featured={params['featured']}")
+        return json_response(gallery if gallery is not None else [])
+    try:
+        async with django(request).get(
+            f"{DJANGO_API_BASE}/gallery/", params={**params, 'stream': 1}, timeout=timeout(UPSTREAM_TIMEOUT, stream=True)
+        ) as response:
+            if response.status == 200:
+                return await relay_stream(request, response)
+        return json_response([])
+    except (ClientError, asyncio.TimeoutError) as e:
+        print(f"Failed to fetch gallery: {e}")
+        return json_response([])
+
+
+@routes.get('/api/version')
+async def api_content_version(request):
+    try:
+        async with django(request).get(f"{DJANGO_API_BASE}/version/", timeout=timeout(UPSTREAM_TIMEOUT, stream=True)) as response:
+            return await relay_stream(request, response)
+    except (ClientError, asyncio.TimeoutError) as e:
+        print(f"Failed to fetch content version: {e}")
+        return json_response({'error': 'Content version is not available'}, 503)
+
+
+@routes.get('/api/changes')
+async def api_content_changes(request):
+    try:
+        async with django(request).get(
+            f"{DJANGO_API_BASE}/changes/", params=request.query, timeout=timeout(UPSTREAM_TIMEOUT, stream=True)
+        ) as response:
+            return await relay_stream(request, response)
+    except (ClientError, asyncio.TimeoutError) as e:
+        print(f"Failed to fetch content changes: {e}")
+        return json_response({'error': 'Content changes are not available'}, 503)
+
+
+@routes.get('/api/search')
+async def api_search(request):
+    return await relay_json(
+        request, 'search/', {'query': request.query.get('q', ''), 'count': 0, 'results': []}, what='search results'
+    )
+
+
+@routes.get('/api/suggest')
+async def api_suggest(request):
+    return await relay_json(
+        request, 'suggest/', {'query': request.query.get('q', ''), 'suggestions': []}, SUGGEST_TIMEOUT, 'suggestions'
+    )
+
+
+@routes.get('/api/ready')
+async def api_ready(request):
+    status = warm_up.status()
+    return json_response(status, 200 if status['ready'] else 503)
+
+
+@routes.post('/internal/cache/invalidate')
+async def invalidate_api_cache(request):
+    """Invalidation event from Django: drop the named endpoints and fetch them again"""
+    if not is_valid_invalidation_token(request.headers.get('X-Invalidation-Token', '')):
+        return json_response({'error': 'Invalid token'}, 403)
+    try:
+        event = await request.json(loads=fastjson.loads)
+    except ValueError:
+        event = None
+    event = event if isinstance(event, dict) else {}
+    endpoints = event.get('endpoints')
+    if not isinstance(endpoints, list) or not isinstance(event.get('version'), int):
+        return json_response({'error': 'Expected {"version": <int>, "endpoints": [...]}'}, 400)
+    evicted = api_cache.invalidate(endpoints, event['version'])
+    for endpoint in evicted:
+        background(request.app, fetch_from_django_api(django(request), endpoint, refresh=True))
+    return json_response({'evicted': evicted})
+
+
+# Forms
+
+async def post_form(request, path, required, failure):
+    """Check the required fields, then forward the form to Django"""
+    try:
+        data = await request.json(loads=fastjson.loads)
+        for field in required:
+            if not data.get(field):
+                return json_response({'error': f'{field} is required'}, 400)
+        async with django(request).post(f"{DJANGO_API_BASE}/{path}", json=data, timeout=timeout(UPSTREAM_TIMEOUT)) as response:
+            if response.status == 200:
+                return json_response(await response.json(loads=fastjson.loads))
+            return json_response({'error': failure}, 500)
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
+
+
+@routes.post('/api/contact')
+async def contact(request):
+    return await post_form(request, 'contact/', ['name', 'email', 'subject', 'message'], 'Failed to submit contact form')
+
+
+@routes.post('/api/newsletter')
+async def newsletter(request):
+    return await post_form(request, 'newsletter/', ['email'], 'Failed to subscribe to newsletter')
+
+
+@routes.post('/api/masterclass/register')
+async def api_register_masterclass(request):
+    try:
+        data = await request.json(loads=fastjson.loads)
+        async with django(request).post(
+            f"{DJANGO_API_BASE}/masterclass/register/", json=data, timeout=timeout(UPSTREAM_TIMEOUT)
+        ) as response:
+            if response.status == 200:
+                return json_response(await response.json(loads=fastjson.loads))
+            return json_response({'success': False, 'message': 'Registration failed. Please try again.'}, response.status)
+    except (ClientError, asyncio.TimeoutError) as e:
+        print(f"Failed to register masterclass: {e}")
+        return json_response({'success': False, 'message': 'Unable to submit registration. Please try again later.'}, 500)
+
+
+async def process_locally(request, required, process, message):
+    try:
+        data = await request.json(loads=fastjson.loads)
+        for field in required:
+            if not data.get(field):
+                return json_response({'error': f'{field} is required'}, 400)
+        process(data)
+        return json_response({'message': message})
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
+
+
+@routes.post('/api/purchase')
+async def purchase(request):
+    return await process_locally(request, ['item_id', 'item_type', 'customer_info'], process_purchase, 'Purchase processed successfully')
+
+
+@routes.post('/api/enroll')
+async def enroll(request):
+    return await process_locally(request, ['course_id', 'student_info'], process_enrollment, 'Successfully enrolled in course')
+
+
+# Application
+
+def background(application, coroutine):
+    """Run a coroutine after the response, keeping a reference until it's done"""
+    task = asyncio.ensure_future(coroutine)
+    application['background'].add(task)
+    task.add_done_callback(application['background'].discard)
+
+
+@web.middleware
+async def cors_and_errors(request, handler):
+    """CORS headers on every response, as Flask-CORS adds them, and JSON error pages as in app.py"""
+    if request.method == 'OPTIONS' and 'Access-Control-Request-Method' in request.headers:
+        response = web.Response(headers={
+            'Access-Control-Allow-Methods': 'DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT',
+            'Access-Control-Allow-Headers': request.headers.get('Access-Control-Request-Headers', ''),
+        })
+    else:
+        try:
+            response = await handler(request)
+        except web.HTTPNotFound:
+            response = json_response({'error': 'Not found'}, 404)
+        except web.HTTPException as e:
+            e.headers['Access-Control-Allow-Origin'] = '*'
+            raise
+        except (asyncio.CancelledError, ConnectionResetError):
+            raise
+        except Exception:
+            request.app.logger.exception('Error handling %s', request.path)
+            response = json_response({'error': 'Internal server error'}, 500)
+    if not response.prepared:
+        response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
+
+
+async def django_session(application):
+    """One client session to Django for the whole app: pooled keep-alive connections and no cookie jar,
+    so cookies Django sets aren't sent on behalf of other visitors"""
+    application['django'] = ClientSession(
+        connector=TCPConnector(limit=flask_app.config['UPSTREAM_POOL_SIZE']), cookie_jar=DummyCookieJar()
+    )
+    application['background'] = set()
+    yield
+    for task in application['background']:
+        task.cancel()
+    await application['django'].close()
+
+
+def create_app():
+    application = web.Application(middlewares=[cors_and_errors])
+    application.cleanup_ctx.append(django_session)
+    for path in PAGES:
+        application.router.add_get(path, send_page)
+    for path in REDIRECTS:
+        application.router.add_get(path, redirect)
+    application.add_routes(routes)
+    application.router.add_static('/static', flask_app.static_folder)
+    return application
+
+
+async def warm_cache(base_url, workers=None):
+    """Request every warm-up path of the instance at base_url, as app.warm_cache() does"""
+    async with ClientSession(timeout=ClientTimeout(total=30)) as session:
+        async def fetch(path):
+            async with session.get(f"{base_url.rstrip('/')}{path}") as response:
+                await response.read()
+                return response.status
+        return await warm_up.run_async(fetch, warm_up_paths(), workers or flask_app.config['WARM_UP_WORKERS'])
+
+
+async def serve(host='0.0.0.0', port=5001):
+    # Handlers are cancelled when their client disconnects
+    runner = web.AppRunner(create_app(), handler_cancellation=True)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    print(f"Serving on http://{host}:{port}")
+    try:
+        if flask_app.config['WARM_UP_ON_BOOT']:
+            await warm_cache(f'http://127.0.0.1:{port}')
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Kambel Consult proxy on asyncio')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5001)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\nServer stopped by user")
+
+
+if __name__ == '__main__':
+    main()
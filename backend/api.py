@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request, current_app
 from werkzeug.utils import secure_filename
+import hashlib
 import os
 import json
 from datetime import datetime
@@ -16,18 +17,21 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 def save_file(file, folder):
-    """Save uploaded file"""
+    """Save uploaded file under its content hash, reusing an identical existing upload"""
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        # Add timestamp to avoid conflicts
-        name, ext = os.path.splitext(filename)
-        filename = f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ext}"
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: file.stream.read(1024 * 1024), b''):
+            digest.update(chunk)
+        file.stream.seek(0)
+        digest = digest.hexdigest()
+        ext = os.path.splitext(secure_filename(file.filename))[1].lower()
+        # Sharded so no directory grows too large: ab/cd/abcd...ef.jpg
+        filename = f"{digest[:2]}/{digest[2:4]}/{digest}{ext}"
         
-        upload_path = os.path.join(current_app.config['UPLOAD_FOLDER'], folder)
-        os.makedirs(upload_path, exist_ok=True)
-        
-        file_path = os.path.join(upload_path, filename)
-        file.save(file_path)
+        file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], folder, filename)
+        if not os.path.exists(file_path):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            file.save(file_path)
         return filename
     return None
 
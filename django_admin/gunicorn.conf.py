@@ -0,0 +1,60 @@
+"""
+gunicorn settings for the Django app in production (python3 start.py --production)
+
+    gunicorn -c gunicorn.conf.py kambel_admin.wsgi:application
+
+The application is loaded once in the master and the workers are forked from
+it, so they share its memory copy-on-write. A boot-time warm-up
+(WARM_UP_ON_BOOT) also runs in the master, before the first fork, so every
+worker starts with warm caches. Each worker serves requests on a few threads:
+requests spend much of their time waiting on SQLite and the disk. Workers
+are recycled after max_requests to cap memory growth. File responses
+(/media/, /static/) go out with sendfile.
+
+Every value can be overridden with the usual GUNICORN_CMD_ARGS, or the
+environment variables below.
+"""
+import multiprocessing
+import os
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+preload_app = True
+sendfile = True
+
+# Seconds a request may take, seconds a worker gets to finish its requests
+# on shutdown or reload, and seconds an idle keep-alive connection stays open
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle each worker after about this many requests; the jitter keeps them
+# from all restarting at once
+max_requests = 1000
+max_requests_jitter = 100
+
+accesslog = '-'
+errorlog = '-'
+raw_env = ['DJANGO_SETTINGS_MODULE=kambel_admin.settings']
+
+
+def when_ready(server):
+    """Finish the warm-up started while preloading, then fork from a clean master"""
+    from django.db import connections
+    from kambel_admin import warmup
+
+    if warmup.wait():
+        server.log.info('Warm-up finished: %s', warmup.status())
+    # Workers must open their own database connections
+    connections.close_all()
+
+
+def post_fork(server, worker):
+    from django.db import connections
+
+    connections.close_all()
@@ -1,22 +1,122 @@
 """
 Admin configuration for Kambel Consult
 """
+import csv
+import hashlib
+
+from django import forms
+from django.conf import settings
 from django.contrib import admin
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.db.models.expressions import RawSQL
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils.functional import cached_property
 from django.utils.html import format_html
+from . import exports, importers, search, uploads
 from .models import (
     Category, Book, ConsultancyService, ServiceFeature,
     BlogPost, ContactMessage, NewsletterSubscription, SiteConfig, HeroConfig, AboutConfig,
     ProfessionalJourneyItem, EducationQualification, Achievement, SpeakingEngagement,
-    Masterclass, SocialMediaLink, PrivacyPolicy, TermsConditions, GalleryItem, MasterclassRegistration
+    Masterclass, SocialMediaLink, PrivacyPolicy, TermsConditions, GalleryItem, MasterclassRegistration, MediaBlob,
+    UploadSession, ContentChange
 )
 
 
+
+class CachedCountPaginator(Paginator):
+    """Paginator that caches the COUNT(*) of each changelist query for a short while"""
+    
+    @cached_property
+    def count(self):
+        sql, params = self.object_list.query.sql_with_params()
+        key = 'admin-count:' + hashlib.md5(f'{sql}|{params!r}'.encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = Paginator.count.func(self)
+            cache.set(key, count, getattr(settings, 'ADMIN_COUNT_CACHE_TIMEOUT', 60))
+        return count
+
+
+class FullTextSearchMixin:
+    """Run changelist searches through the full-text index instead of LIKE scans"""
+    search_content_type = None
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+    
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not search.is_available():
+            return super().get_search_results(request, queryset, search_term)
+        
+        subquery = search.matching_ids_sql(search_term, self.search_content_type)
+        if subquery is None:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=RawSQL(*subquery)), False
+
+
+
+class ImportForm(forms.Form):
+    """Upload form for the bulk catalog importer"""
+    import_name = forms.ChoiceField(label='Import')
+    file = forms.FileField()
+    format = forms.ChoiceField(
+        choices=[('', 'Detect from file extension')] + [(f, f.upper()) for f in importers.FORMATS],
+        required=False
+    )
+    
+    def __init__(self, *args, import_names=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['import_name'].choices = [(name, name.capitalize()) for name in import_names]
+
+
+class BulkImportAdminMixin:
+    """Adds an "Import CSV/JSON" page that runs the bulk importer"""
+    import_names = []
+    change_list_template = 'admin/kambel_admin/change_list_import.html'
+    
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view), name='%s_%s_import' % info),
+        ] + super().get_urls()
+    
+    def import_view(self, request):
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+        
+        form = ImportForm(request.POST or None, request.FILES or None, import_names=self.import_names)
+        result = None
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            fmt = form.cleaned_data['format'] or importers.guess_format(upload.name)
+            try:
+                result = importers.import_rows(form.cleaned_data['import_name'], importers.read_rows(upload, fmt))
+            except (ValueError, UnicodeDecodeError, csv.Error) as e:
+                form.add_error('file', f'Could not read file: {e}')
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'title': f'Import {self.model._meta.verbose_name_plural}',
+            'opts': self.model._meta,
+            'form': form,
+            'result': result,
+            'imports': [
+                (name, importers.IMPORTS[name]['fields'], importers.IMPORTS[name]['key'])
+                for name in self.import_names
+            ],
+        }
+        return TemplateResponse(request, 'admin/kambel_admin/import.html', context)
+
+
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(BulkImportAdminMixin, admin.ModelAdmin):
     list_display = ['name', 'description', 'is_active', 'created_at']
     list_filter = ['is_active', 'created_at']
     search_fields = ['name', 'description']
     list_editable = ['is_active']
+    import_names = ['categories']
 
 
 class ServiceFeatureInline(admin.TabularInline):
@@ -61,11 +161,12 @@ class ServiceFeatureAdmin(admin.ModelAdmin):
 
 
 @admin.register(Book)
-class BookAdmin(admin.ModelAdmin):
+class BookAdmin(BulkImportAdminMixin, admin.ModelAdmin):
     list_display = ['title', 'author', 'category', 'price', 'is_active', 'created_at']
     list_filter = ['category', 'is_active', 'created_at']
     search_fields = ['title', 'author', 'description']
     list_editable = ['is_active']
+    import_names = ['books']
     fieldsets = (
         ('Basic Information', {
             'fields': ('title', 'author', 'description', 'category')
@@ -102,12 +203,14 @@ class BlogPostAdmin(admin.ModelAdmin):
 
 
 @admin.register(ContactMessage)
-class ContactMessageAdmin(admin.ModelAdmin):
+class ContactMessageAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ['name', 'email', 'subject', 'is_read', 'created_at']
     list_filter = ['is_read', 'created_at']
     search_fields = ['name', 'email', 'subject', 'message']
     list_editable = ['is_read']
     readonly_fields = ['created_at']
+    search_content_type = 'contact'
+    actions = [exports.make_admin_action('csv'), exports.make_admin_action('jsonl')]
     
     def get_queryset(self, request):
         return super().get_queryset(request).order_by('-created_at')
@@ -119,6 +222,7 @@ class NewsletterSubscriptionAdmin(admin.ModelAdmin):
     list_filter = ['is_active', 'subscribed_at']
     search_fields = ['email']
     list_editable = ['is_active']
+    actions = [exports.make_admin_action('csv'), exports.make_admin_action('jsonl')]
 
 
 @admin.register(SiteConfig)
@@ -203,11 +307,12 @@ class SpeakingEngagementInline(admin.TabularInline):
 
 
 @admin.register(AboutConfig)
-class AboutConfigAdmin(admin.ModelAdmin):
+class AboutConfigAdmin(BulkImportAdminMixin, admin.ModelAdmin):
     list_display = ['profile_name', 'profile_title', 'is_active', 'updated_at']
     list_filter = ['is_active', 'created_at']
     search_fields = ['profile_name', 'profile_title', 'bio_summary']
     list_editable = ['is_active']
+    import_names = ['journey', 'education', 'achievements', 'speaking']
     
     fieldsets = (
         ('Hero Section Stats', {
@@ -250,11 +355,12 @@ class AboutConfigAdmin(admin.ModelAdmin):
 
 
 @admin.register(Masterclass)
-class MasterclassAdmin(admin.ModelAdmin):
+class MasterclassAdmin(BulkImportAdminMixin, admin.ModelAdmin):
     list_display = ['title', 'instructor', 'date', 'duration', 'price', 'seats_available', 'is_upcoming', 'is_active', 'created_at']
     list_filter = ['is_upcoming', 'is_active', 'date', 'created_at']
     search_fields = ['title', 'description', 'instructor']
     list_editable = ['is_upcoming', 'is_active']
+    import_names = ['masterclasses']
     
     fieldsets = (
         ('Basic Information', {
@@ -377,19 +483,45 @@ class TermsConditionsAdmin(admin.ModelAdmin):
         return True
 
 
+class GalleryItemForm(forms.ModelForm):
+    """Gallery form that can attach a video sent through the chunked upload API"""
+    video_file_upload = forms.UUIDField(required=False, widget=forms.HiddenInput)
+    
+    class Meta:
+        model = GalleryItem
+        fields = '__all__'
+    
+    def clean_video_file_upload(self):
+        session_id = self.cleaned_data.get('video_file_upload')
+        if not session_id:
+            return None
+        session = UploadSession.objects.filter(id=session_id, target='gallery.video_file').first()
+        if session is None or not session.stored_name:
+            raise forms.ValidationError('The video upload has not finished; please upload it again.')
+        return session
+    
+    def save(self, commit=True):
+        session = self.cleaned_data.get('video_file_upload')
+        if session:
+            self.instance.video_file = session.stored_name
+        return super().save(commit)
+
+
 @admin.register(GalleryItem)
-class GalleryItemAdmin(admin.ModelAdmin):
+class GalleryItemAdmin(BulkImportAdminMixin, admin.ModelAdmin):
+    form = GalleryItemForm
     list_display = ['title', 'media_type', 'is_featured', 'is_active', 'order', 'created_at']
     list_filter = ['media_type', 'is_featured', 'is_active', 'created_at']
     search_fields = ['title', 'caption', 'description']
     ordering = ['order', '-created_at']
+    import_names = ['gallery']
     fieldsets = (
         ('Basic Information', {
             'fields': ('title', 'caption', 'description')
         }),
         ('Media', {
-            'fields': ('media_type', 'image', 'video_url', 'video_file', 'thumbnail'),
-            'description': 'For images: upload an image. For videos: provide a URL (YouTube/Vimeo) or upload a video file.'
+            'fields': ('media_type', 'image', 'video_url', 'video_file', 'video_file_upload', 'thumbnail'),
+            'description': 'For images: upload an image. For videos: provide a URL (YouTube/Vimeo) or upload a video file. Video files are sent in resumable chunks before the form is saved.'
         }),
         ('Display Settings', {
             'fields': ('order', 'is_featured', 'is_active')
@@ -401,16 +533,22 @@ class GalleryItemAdmin(admin.ModelAdmin):
     )
     readonly_fields = ['created_at', 'updated_at']
     
+    class Media:
+        js = ('admin/js/chunked_upload.js',)
+    
     def get_readonly_fields(self, request, obj=None):
         readonly = list(super().get_readonly_fields(request, obj))
         return readonly
 
 
 @admin.register(MasterclassRegistration)
-class MasterclassRegistrationAdmin(admin.ModelAdmin):
+class MasterclassRegistrationAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ['get_full_name', 'get_masterclass_title', 'email', 'phone', 'status', 'created_at']
     list_filter = ['status', 'created_at', 'subscribe_newsletter']
+    list_select_related = ['masterclass']
     search_fields = ['first_name', 'last_name', 'email', 'phone', 'masterclass_title', 'company']
+    search_content_type = 'registration'
+    actions = [exports.make_admin_action('csv'), exports.make_admin_action('jsonl')]
     readonly_fields = ['created_at', 'updated_at']
     fieldsets = (
         ('Masterclass Information', {
@@ -440,6 +578,57 @@ class MasterclassRegistrationAdmin(admin.ModelAdmin):
     get_masterclass_title.short_description = 'Masterclass'
 
 
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'size', 'ref_count', 'created_at']
+    list_filter = ['ref_count', 'created_at']
+    search_fields = ['name', 'sha256']
+    readonly_fields = ['name', 'sha256', 'size', 'ref_count', 'created_at']
+    
+    def has_add_permission(self, request):
+        # Rows are created by the storage backend when files are uploaded
+        return False
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'target', 'size', 'stored_name', 'created_by', 'updated_at']
+    list_filter = ['target', 'created_at']
+    search_fields = ['filename', 'stored_name']
+    readonly_fields = ['id', 'target', 'filename', 'size', 'chunk_size', 'sha256', 'stored_name',
+                       'created_by', 'created_at', 'updated_at']
+    
+    def has_add_permission(self, request):
+        # Sessions are started by the chunked upload API
+        return False
+    
+    def delete_model(self, request, obj):
+        uploads.abort(obj)
+    
+    def delete_queryset(self, request, queryset):
+        for session in queryset:
+            uploads.abort(session)
+
+
+
+@admin.register(ContentChange)
+class ContentChangeAdmin(admin.ModelAdmin):
+    list_display = ['model', 'object_id', 'version', 'deleted']
+    list_filter = ['model', 'deleted']
+    
+    def has_add_permission(self, request):
+        # Rows are written by the content version signals
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        # Clients syncing from an older version need every row
+        return False
+
+
 # Customize admin site
 admin.site.site_header = "Kambel Consult Administration"
 admin.site.site_title = "Kambel Consult Admin"
@@ -0,0 +1,12 @@
+"""
+App configuration for Kambel Consult
+"""
+from django.apps import AppConfig
+
+
+class KambelAdminConfig(AppConfig):
+    name = 'kambel_admin'
+
+    def ready(self):
+        # Register signal handlers
+        from . import signals  # noqa: F401
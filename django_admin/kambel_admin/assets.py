@@ -0,0 +1,471 @@
+"""
+Fingerprinted, minified and precompressed frontend assets
+
+build() minifies the site's CSS and JS, writes them to static/dist/ under
+names containing a hash of their content, with .gz (and .br, when the
+brotli package is installed) siblings next to them, and records the mapping
+in static/dist/manifest.json. Copies of the root HTML pages pointing at the
+hashed names are written to build/pages/ and served in place of the
+originals while they are newer; the tracked pages themselves are never
+changed. A changed file always gets a new name, so the built assets can be
+cached by browsers forever.
+
+optimize_images() does the same for the bundled favicons and images:
+properly sized icons and recompressed copies scaled to the size they are
+displayed at go into the same directory and manifest.
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Paths relative to the frontend static directory
+SOURCES = ['css/style.css', 'js/script.js']
+DIST_DIR = 'dist'
+# Relative to the frontend directory
+PAGES_BUILD_DIR = os.path.join('build', 'pages')
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 12
+# Compressed copies smaller than this aren't worth a second file
+COMPRESS_MIN_BYTES = 256
+
+ENCODINGS = {'br': '.br', 'gzip': '.gz'}
+
+
+def frontend_dir():
+    return str(settings.FRONTEND_DIR)
+
+
+def static_dir():
+    return os.path.join(frontend_dir(), 'static')
+
+
+def dist_dir():
+    return os.path.join(static_dir(), DIST_DIR)
+
+
+def pages_build_dir():
+    return os.path.join(frontend_dir(), PAGES_BUILD_DIR)
+
+
+def page_source(filename):
+    """Path of a root page to serve or process further: its built copy while
+    that is newer than the page, otherwise the page itself"""
+    page = os.path.join(frontend_dir(), filename)
+    built = os.path.join(pages_build_dir(), filename)
+    try:
+        if os.path.getmtime(built) >= os.path.getmtime(page):
+            return built
+    except OSError:
+        pass
+    return page
+
+
+def html_pages():
+    return sorted(
+        os.path.join(frontend_dir(), name) for name in os.listdir(frontend_dir()) if name.endswith('.html')
+    )
+
+
+def load_manifest():
+    try:
+        with open(os.path.join(dist_dir(), MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+# Strings, comments, and everything else, for both minifiers
+CSS_TOKEN_RE = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(/\*.*?\*/)|([^"'/]+|/)''', re.S)
+CSS_SPACE_RE = re.compile(r'\s*([{};,>])\s*|(:)\s+|\s+')
+CSS_URL_RE = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+
+def minify_css(source):
+    """Drop comments and redundant whitespace; strings are left untouched"""
+    source = CSS_TOKEN_RE.sub(lambda m: '' if m.group(2) else m.group(0), source)
+    out = []
+    for string, _, code in CSS_TOKEN_RE.findall(source):
+        if string:
+            out.append(string)
+        else:
+            out.append(CSS_SPACE_RE.sub(lambda m: m.group(1) or m.group(2) or ' ', code).replace(';}', '}'))
+    return ''.join(out).strip()
+
+
+def rebase_css_urls(css, prefix):
+    """Prefix relative url()s, for CSS moved away from the directory it was written for"""
+
+    def rebase(match):
+        quote, url = match.groups()
+        if re.match(r'^(?:[a-z]+:|/|#)', url, re.I):
+            return match.group(0)
+        return f'url({quote}{prefix}/{url}{quote})'
+
+    return CSS_URL_RE.sub(rebase, css)
+
+
+# A / starts a regular expression, not a division, after these
+JS_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+JS_REGEX_KEYWORDS = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void', 'throw', 'case', 'do', 'else'}
+# Whitespace next to these can always go; + - / . are left alone so `a - -b`
+# and `a / /re/` keep their meaning
+JS_PUNCTUATION = set('{}()[];,:=?!&|<>*%^~')
+JS_WORD_RE = re.compile(r'[A-Za-z0-9_$]+|.')
+
+
+def _js_tokens(source):
+    """(kind, text) pairs: 'string', 'regex', 'comment', 'space', 'newline' or 'code'"""
+    i, n = 0, len(source)
+    last = ''  # last significant code text, to tell regexes from divisions
+    while i < n:
+        c = source[i]
+        if c in '"\'`':
+            j = i + 1
+            depth = 0
+            while j < n:
+                if source[j] == '\\':
+                    j += 2
+                    continue
+                if c == '`' and source.startswith('${', j):
+                    depth += 1
+                elif c == '`' and depth and source[j] == '}':
+                    depth -= 1
+                elif source[j] == c and not depth:
+                    break
+                elif source[j] == '\n' and c != '`':
+                    break
+                j += 1
+            yield 'string', source[i:j + 1]
+            last = 'a'
+            i = j + 1
+        elif source.startswith('//', i):
+            j = source.find('\n', i)
+            i = n if j == -1 else j
+            yield 'comment', ''
+        elif source.startswith('/*', i):
+            j = source.find('*/', i + 2)
+            i = n if j == -1 else j + 2
+            yield 'comment', ''
+        elif c == '/' and (not last or last[-1] in JS_REGEX_PRECEDERS or last in JS_REGEX_KEYWORDS):
+            j = i + 1
+            in_class = False
+            while j < n and source[j] != '\n':
+                if source[j] == '\\':
+                    j += 2
+                    continue
+                if source[j] == '[':
+                    in_class = True
+                elif source[j] == ']':
+                    in_class = False
+                elif source[j] == '/' and not in_class:
+                    break
+                j += 1
+            j += 1
+            while j < n and (source[j].isalnum() or source[j] in '$_'):
+                j += 1
+            yield 'regex', source[i:j]
+            last = 'a'
+            i = j
+        elif c == '\n':
+            yield 'newline', c
+            i += 1
+        elif c.isspace():
+            j = i
+            while j < n and source[j].isspace() and source[j] != '\n':
+                j += 1
+            yield 'space', ' '
+            i = j
+        else:
+            match = JS_WORD_RE.match(source, i)
+            yield 'code', match.group(0)
+            last = match.group(0)
+            i = match.end()
+
+
+def minify_js(source):
+    """Conservative minifier: drops comments, indentation, blank lines and
+    whitespace around punctuation, but keeps line breaks so automatic
+    semicolon insertion still applies"""
+    out = []
+    pending = ''
+    for kind, text in _js_tokens(source):
+        if kind == 'comment':
+            continue
+        if kind in ('space', 'newline'):
+            if kind == 'newline' or not pending:
+                pending = text if kind == 'newline' else ' '
+            continue
+        if pending and out:
+            if pending == '\n':
+                if out[-1] != '\n':
+                    out.append('\n')
+            elif out[-1][-1] not in JS_PUNCTUATION and text[0] not in JS_PUNCTUATION and out[-1] != '\n':
+                out.append(' ')
+        pending = ''
+        out.append(text)
+    return ''.join(out).strip() + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def hashed_name(path, content):
+    stem, extension = os.path.splitext(os.path.basename(path))
+    return f'{DIST_DIR}/{stem}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}{extension}'
+
+
+def compress(path, content):
+    """Write precompressed siblings of a built file; returns their names"""
+    written = []
+    if len(content) < COMPRESS_MIN_BYTES:
+        return written
+    # mtime=0 keeps the output identical between builds of the same content
+    outputs = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        outputs['.br'] = brotli.compress(content, quality=11)
+    for suffix, data in outputs.items():
+        if len(data) < len(content):
+            with open(path + suffix, 'wb') as f:
+                f.write(data)
+            written.append(os.path.basename(path) + suffix)
+    return written
+
+
+def reference_pattern(source):
+    """Matches a page's reference to a source or to any earlier build of it"""
+    stem, extension = os.path.splitext(os.path.basename(source))
+    return re.compile(
+        r'(?P<prefix>["\'(]/?static/)(?:' + re.escape(source) + '|' +
+        re.escape(f'{DIST_DIR}/{stem}.') + r'[0-9a-f]{' + str(HASH_LENGTH) + '}' + re.escape(extension) +
+        r')(?P<suffix>[?#"\')])'
+    )
+
+
+def rewrite_references(text, manifest):
+    """Replace references to the manifest's sources, or earlier builds of them, in HTML/CSS/JS"""
+    for source, target in manifest.items():
+        text = reference_pattern(source).sub(lambda m: f"{m.group('prefix')}{target}{m.group('suffix')}", text)
+    return text
+
+
+def rewrite_pages(manifest):
+    """Write copies of the root HTML pages pointing at the names in manifest to
+    build/pages/; returns the pages whose copy changed"""
+    os.makedirs(pages_build_dir(), exist_ok=True)
+    changed = []
+    for page in html_pages():
+        with open(page, encoding='utf-8') as f:
+            html = f.read()
+        built = os.path.join(pages_build_dir(), os.path.basename(page))
+        try:
+            with open(built, encoding='utf-8') as f:
+                previous = f.read()
+        except FileNotFoundError:
+            previous = html
+        updated = rewrite_references(html, manifest)
+        # Written even when unchanged, so the copy stays newer than its page
+        with open(built, 'w', encoding='utf-8') as f:
+            f.write(updated)
+        if updated != previous:
+            changed.append(os.path.basename(page))
+    return changed
+
+
+def save_manifest(manifest, previous):
+    """Write the manifest, rewrite the pages and prune old builds; returns the changed pages
+
+    Files from the previous build are kept, so pages already loaded in a
+    browser can still fetch them; anything older is deleted.
+    """
+    with open(os.path.join(dist_dir(), MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    pages = rewrite_pages(manifest)
+
+    keep = {os.path.basename(name) for name in list(manifest.values()) + list(previous.values())}
+    for filename in os.listdir(dist_dir()):
+        built = os.path.splitext(filename)[0] if filename.endswith(tuple(ENCODINGS.values())) else filename
+        if filename != MANIFEST_NAME and built not in keep:
+            os.remove(os.path.join(dist_dir(), filename))
+    return pages
+
+
+def write_output(source, content):
+    """Store built content under its hashed name; returns that name"""
+    target = hashed_name(source, content)
+    with open(os.path.join(static_dir(), target), 'wb') as f:
+        f.write(content)
+    return target
+
+
+def build(sources=None, minify=True):
+    """Build the CSS/JS sources, update the manifest and rewrite the pages
+
+    References to optimized images already in the manifest are rewritten
+    inside the built files too.
+    """
+    sources = sources or SOURCES
+    os.makedirs(dist_dir(), exist_ok=True)
+    previous = load_manifest()
+    manifest = {source: target for source, target in previous.items() if source not in sources}
+    report = []
+    for source in sources:
+        with open(os.path.join(static_dir(), source), encoding='utf-8') as f:
+            text = f.read()
+        extension = os.path.splitext(source)[1]
+        text = rewrite_references(text, {name: manifest[name] for name in IMAGE_ASSETS if name in manifest})
+        if extension == '.css':
+            # The built file lives in dist/, not next to its source
+            text = rebase_css_urls(text, os.path.relpath(os.path.dirname(source), DIST_DIR).replace(os.sep, '/'))
+        if minify and extension in MINIFIERS:
+            text = MINIFIERS[extension](text)
+        content = text.encode('utf-8')
+        target = write_output(source, content)
+        compress(os.path.join(static_dir(), target), content)
+        manifest[source] = target
+        report.append((source, target, os.path.getsize(os.path.join(static_dir(), source)), len(content)))
+    return report, save_manifest(manifest, previous)
+
+
+# Images shipped with the frontend and what they are displayed as. Icons are
+# padded to squares of the listed sizes (one .ico holds them all); other
+# images are scaled down to fit max_size, where 0 leaves that side free,
+# chosen as twice their largest size in style.css for high-density screens.
+IMAGE_ASSETS = {
+    'favicon.ico': {'icon_sizes': [16, 32, 48]},
+    'favicon.png': {'icon_sizes': [32]},
+    'apple-touch-icon.png': {'icon_sizes': [180]},
+    'css/klogo.jpeg': {'max_size': (0, 160)},
+    'css/profilepicture.jpeg': {'max_size': (700, 0)},
+}
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.ico', '.gif', '.webp'}
+JPEG_QUALITY = 88
+
+
+def find_duplicate_images():
+    """{sha256: [paths]} of static images with identical content, a list of
+    (path, actual format) for files whose content doesn't match their extension
+    and a list of paths Pillow can't read"""
+    by_digest = {}
+    mislabelled = []
+    unreadable = []
+    for root, dirs, files in os.walk(static_dir()):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != dist_dir())
+        for filename in sorted(files):
+            extension = os.path.splitext(filename)[1].lower()
+            if extension not in IMAGE_EXTENSIONS:
+                continue
+            path = os.path.join(root, filename)
+            name = os.path.relpath(path, static_dir()).replace(os.sep, '/')
+            with open(path, 'rb') as f:
+                by_digest.setdefault(hashlib.sha256(f.read()).hexdigest(), []).append(name)
+            try:
+                with Image.open(path) as image:
+                    actual = image.format
+            except (OSError, Image.UnidentifiedImageError):
+                unreadable.append(name)
+                continue
+            if actual != Image.registered_extensions().get(extension):
+                mislabelled.append((name, actual))
+    duplicates = {digest: names for digest, names in by_digest.items() if len(names) > 1}
+    return duplicates, mislabelled, unreadable
+
+
+def _square(image, size):
+    """Pad to a square with the image's corner colour, then scale to size"""
+    image = image.convert('RGBA')
+    side = max(image.size)
+    background = Image.new('RGBA', (side, side), image.getpixel((0, 0)))
+    background.paste(image, ((side - image.width) // 2, (side - image.height) // 2))
+    return background.resize((size, size), Image.LANCZOS)
+
+
+def _fit(image, max_width, max_height):
+    scale = min(
+        max_width / image.width if max_width else 1,
+        max_height / image.height if max_height else 1,
+        1,
+    )
+    if scale == 1:
+        return image
+    return image.resize((round(image.width * scale), round(image.height * scale)), Image.LANCZOS)
+
+
+def optimize_image(source, options):
+    """Optimized bytes of one static image"""
+    extension = os.path.splitext(source)[1].lower()
+    with Image.open(os.path.join(static_dir(), source)) as original:
+        image = ImageOps.exif_transpose(original)
+        icc_profile = original.info.get('icc_profile')
+        out = io.BytesIO()
+        if extension == '.ico':
+            largest = max(options['icon_sizes'])
+            _square(image, largest).save(out, 'ICO', sizes=[(size, size) for size in options['icon_sizes']])
+        elif extension == '.png':
+            icon = _square(image, options['icon_sizes'][0]) if 'icon_sizes' in options else image
+            if icon.mode == 'RGBA' and icon.getextrema()[3][0] == 255:
+                icon = icon.convert('RGB')
+            icon.save(out, 'PNG', optimize=True)
+        else:
+            image = _fit(image, *options.get('max_size', (0, 0))).convert('RGB')
+            image.save(out, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True, icc_profile=icc_profile)
+    return out.getvalue()
+
+
+def optimize_images():
+    """Write optimized copies of IMAGE_ASSETS, update the manifest and rewrite the pages
+
+    Returns (report, pages): report rows are (source, target, original
+    bytes, optimized bytes). An optimized file that would be larger than its
+    source (only possible when it isn't resized) is replaced by the source.
+    """
+    os.makedirs(dist_dir(), exist_ok=True)
+    previous = load_manifest()
+    manifest = dict(previous)
+    report = []
+    for source, options in IMAGE_ASSETS.items():
+        path = os.path.join(static_dir(), source)
+        if not os.path.isfile(path):
+            continue
+        content = optimize_image(source, options)
+        original_size = os.path.getsize(path)
+        with Image.open(path) as original, Image.open(io.BytesIO(content)) as optimized:
+            resized = optimized.size != original.size
+        if not resized and len(content) >= original_size:
+            with open(path, 'rb') as f:
+                content = f.read()
+        manifest[source] = write_output(source, content)
+        report.append((source, manifest[source], original_size, len(content)))
+    return report, save_manifest(manifest, previous)
+
+
+def clean():
+    """Remove the build, so the original pages and sources are served again;
+    returns the built pages removed"""
+    pages = sorted(os.listdir(pages_build_dir())) if os.path.isdir(pages_build_dir()) else []
+    for directory in (dist_dir(), pages_build_dir()):
+        if os.path.isdir(directory):
+            for filename in os.listdir(directory):
+                os.remove(os.path.join(directory, filename))
+            os.rmdir(directory)
+    return pages
+
+
+def find_encoded(path, accept_encoding):
+    """(path, encoding) of the best precompressed copy of path the client accepts"""
+    accepted = {part.split(';')[0].strip().lower() for part in (accept_encoding or '').split(',')}
+    for encoding, suffix in ENCODINGS.items():
+        if encoding in accepted and os.path.isfile(path + suffix):
+            return path + suffix, encoding
+    return path, None
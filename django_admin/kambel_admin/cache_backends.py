@@ -0,0 +1,60 @@
+"""
+Django cache backends
+
+SQLiteCache keeps entries in a sqlite_cache.SharedCache file, shared by every
+process on the machine that opens it:
+
+    CACHES = {'default': {
+        'BACKEND': 'kambel_admin.cache_backends.SQLiteCache',
+        'LOCATION': BASE_DIR / 'cache' / 'default.sqlite3',
+        'OPTIONS': {'MAX_BYTES': 256 * 1024 * 1024},
+    }}
+"""
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .sqlite_cache import DEFAULT_MAX_BYTES, SharedCache
+
+
+class SQLiteCache(BaseCache):
+    """Django cache backend storing entries in a SharedCache file at LOCATION"""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._cache = SharedCache(location, max_bytes=options.get('MAX_BYTES', DEFAULT_MAX_BYTES))
+
+    def _timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._cache.add(key, value, self._timeout(timeout))
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._cache.get(key, default)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._cache.set(key, value, self._timeout(timeout))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._cache.touch(key, self._timeout(timeout))
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._cache.delete(key)
+
+    def incr(self, key, delta=1, version=None):
+        value = self._cache.incr(self.make_and_validate_key(key, version=version), delta)
+        if value is None:
+            raise ValueError("Key '%s' not found" % key)
+        return value
+
+    def clear(self):
+        self._cache.clear()
+
+    def close(self, **kwargs):
+        # The connection is per process and kept for the next request
+        pass
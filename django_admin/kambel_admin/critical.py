@@ -0,0 +1,244 @@
+"""
+Critical CSS for the root HTML pages
+
+For each page, the markup above the fold (everything up to the end of the
+first <section>, or the first FOLD_BYTES of the body when there is none) is
+scanned for the tags, classes, ids and attributes it uses. The rules of the
+page's stylesheet that can match them are inlined into the head, and the
+full stylesheet is loaded without blocking rendering. Selectors are matched
+per compound selector, ignoring combinators and pseudo-classes, so a rule is
+kept whenever it might apply; nothing above the fold loses its style.
+
+Pages are read from their asset build (see assets.page_source()) when there
+is an up-to-date one. The processed pages are written to build/critical/ and
+preferred by the page views in Django and Flask for as long as they are
+newer than both the page they were made from and static/css/style.css, the
+stylesheet their rules come from (the fingerprinted copies in static/dist
+are built from it).
+"""
+import os
+import re
+from html.parser import HTMLParser
+
+from django.conf import settings
+
+from . import assets
+
+
+BUILD_DIR = os.path.join('build', 'critical')
+SOURCE_STYLESHEET = os.path.join('static', 'css', 'style.css')
+FOLD_BYTES = 12 * 1024
+# Always kept: they style the page before any element is matched
+ALWAYS_SELECTORS = {':root', '*', 'html', 'body'}
+# Media queries whose rules can't affect the first paint
+SKIPPED_MEDIA = ('print',)
+
+STYLESHEET_RE = re.compile(
+    r'<link\s+rel="stylesheet"\s+href="(?P<href>static/(?:css/style\.css|dist/style\.[0-9a-f]+\.css))"\s*/?>'
+)
+
+
+def build_dir():
+    return os.path.join(str(settings.FRONTEND_DIR), BUILD_DIR)
+
+
+def page_path(page_name):
+    """Path to serve for a root page: its critical build when that is up to date"""
+    source = assets.page_source(f'{page_name}.html')
+    built = os.path.join(build_dir(), f'{page_name}.html')
+    stylesheet = os.path.join(str(settings.FRONTEND_DIR), SOURCE_STYLESHEET)
+    try:
+        if os.path.getmtime(built) >= max(os.path.getmtime(source), os.path.getmtime(stylesheet)):
+            return built
+    except OSError:
+        pass
+    return source
+
+
+class FoldParser(HTMLParser):
+    """Collects the tags, classes, ids and attribute names used above the fold"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tags = set()
+        self.classes = set()
+        self.ids = set()
+        self.attributes = set()
+        self.in_body = False
+        self.section_depth = 0
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == 'body':
+            self.in_body = True
+        if not self.in_body:
+            return
+        if tag == 'section':
+            self.section_depth += 1
+        self.tags.add(tag)
+        for name, value in attrs:
+            self.attributes.add(name)
+            if name == 'class' and value:
+                self.classes.update(value.split())
+            elif name == 'id' and value:
+                self.ids.add(value)
+
+    def handle_endtag(self, tag):
+        if tag == 'section' and self.in_body and not self.done:
+            self.section_depth -= 1
+            if self.section_depth == 0:
+                self.done = True
+
+
+def fold_usage(html):
+    """FoldParser fed with the above-the-fold part of a page"""
+    parser = FoldParser()
+    body = html.find('<body')
+    has_section = '<section' in html[body:] if body != -1 else False
+    parser.feed(html if has_section else html[:(body if body != -1 else 0) + FOLD_BYTES])
+    return parser
+
+
+def parse_rules(css):
+    """[(prelude, body)] of top-level rules; body is a string of declarations,
+    or a nested list for block at-rules such as @media"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    rules = []
+    i, n = 0, len(css)
+    start = 0
+    while i < n:
+        c = css[i]
+        if c in '"\'':
+            end = i + 1
+            while end < n and css[end] != c:
+                end += 2 if css[end] == '\\' else 1
+            i = end + 1
+            continue
+        if c == ';' and css[start:i].strip().startswith('@'):
+            # Statement at-rule such as @import or @charset
+            rules.append((css[start:i].strip(), None))
+            start = i + 1
+        elif c == '{':
+            depth = 1
+            j = i + 1
+            while j < n and depth:
+                if css[j] in '"\'':
+                    quote = css[j]
+                    j += 1
+                    while j < n and css[j] != quote:
+                        j += 2 if css[j] == '\\' else 1
+                elif css[j] == '{':
+                    depth += 1
+                elif css[j] == '}':
+                    depth -= 1
+                j += 1
+            prelude = css[start:i].strip()
+            body = css[i + 1:j - 1]
+            if prelude.startswith(('@media', '@supports')):
+                rules.append((prelude, parse_rules(body)))
+            else:
+                rules.append((prelude, body.strip()))
+            i = start = j
+            continue
+        i += 1
+    return rules
+
+
+SIMPLE_SELECTOR_RE = re.compile(r'([.#]?)(-?[_a-zA-Z][\w-]*|\*)|\[\s*([\w-]+)[^\]]*\]')
+PSEUDO_RE = re.compile(r'::?[\w-]+(\((?:[^()]|\([^()]*\))*\))?')
+
+
+def selector_matches(selector, usage):
+    """Whether every compound part of a selector uses only things seen above the fold"""
+    selector = selector.strip()
+    if selector in ALWAYS_SELECTORS:
+        return True
+    for compound in re.split(r'\s*[\s>+~]\s*', PSEUDO_RE.sub('', selector)):
+        for prefix, name, attribute in SIMPLE_SELECTOR_RE.findall(compound):
+            if attribute:
+                if attribute not in usage.attributes:
+                    return False
+            elif prefix == '.':
+                if name not in usage.classes:
+                    return False
+            elif prefix == '#':
+                if name not in usage.ids:
+                    return False
+            elif name != '*' and name.lower() not in usage.tags | {'html', 'body'}:
+                return False
+    return True
+
+
+def critical_rules(rules, usage, animations):
+    """CSS text of the rules that may apply above the fold"""
+    out = []
+    for prelude, body in rules:
+        if body is None:
+            continue
+        if isinstance(body, list):
+            if any(media in prelude for media in SKIPPED_MEDIA):
+                continue
+            inner = critical_rules(body, usage, animations)
+            if inner:
+                out.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@keyframes') or prelude.startswith('@-webkit-keyframes'):
+            if prelude.split()[-1] in animations:
+                out.append(f'{prelude}{{{body}}}')
+        elif prelude.startswith('@font-face'):
+            out.append(f'{prelude}{{{body}}}')
+        elif any(selector_matches(selector, usage) for selector in prelude.split(',')):
+            out.append(f'{prelude}{{{body}}}')
+    return ''.join(out)
+
+
+def extract(html, css):
+    """Minified critical CSS for a page"""
+    usage = fold_usage(html)
+    rules = parse_rules(css)
+    # Animations used by kept rules need their @keyframes
+    selected = critical_rules([rule for rule in rules if not rule[0].startswith('@')], usage, set())
+    animations = {
+        word for value in re.findall(r'animation(?:-name)?\s*:([^;}]*)', selected) for word in value.split()
+    }
+    return assets.minify_css(critical_rules(rules, usage, animations))
+
+
+def async_stylesheet(href):
+    """Markup that loads a stylesheet without blocking the first paint"""
+    return (
+        f'<link rel="preload" href="{href}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+        f'<noscript><link rel="stylesheet" href="{href}"></noscript>'
+    )
+
+
+def process_page(page):
+    """(critical bytes, stylesheet bytes) after writing the critical build of a page,
+    or None when the page doesn't use the site stylesheet"""
+    with open(page, encoding='utf-8') as f:
+        html = f.read()
+    match = STYLESHEET_RE.search(html)
+    if not match:
+        return None
+    with open(os.path.join(str(settings.FRONTEND_DIR), match.group('href')), encoding='utf-8') as f:
+        css = f.read()
+    # Inlined rules resolve url()s against the page, not the stylesheet
+    critical = assets.rebase_css_urls(extract(html, css), os.path.dirname(match.group('href')))
+    html = html[:match.start()] + f'<style>{critical}</style>\n    ' + async_stylesheet(match.group('href')) + html[match.end():]
+
+    os.makedirs(build_dir(), exist_ok=True)
+    with open(os.path.join(build_dir(), os.path.basename(page)), 'w', encoding='utf-8') as f:
+        f.write(html)
+    return len(critical.encode()), len(css.encode())
+
+
+def build(pages=None):
+    """Write the critical builds of the given root pages, or all of them; returns
+    {page name: (critical bytes, stylesheet bytes)}"""
+    results = {}
+    for page in pages or assets.html_pages():
+        result = process_page(assets.page_source(os.path.basename(page)))
+        if result:
+            results[os.path.basename(page)] = result
+    return results
@@ -0,0 +1,140 @@
+"""
+Streaming CSV/JSONL exports for registrations, contact messages and subscribers
+
+Rows are fetched with a chunked iterator over values_list() and encoded as
+they arrive, so memory stays flat no matter how large the table is.
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import ContactMessage, MasterclassRegistration, NewsletterSubscription
+
+
+EXPORTS = {
+    'registrations': {
+        'model': MasterclassRegistration,
+        'fields': [
+            'id', 'masterclass_id', 'masterclass_title', 'first_name', 'last_name', 'email', 'phone',
+            'company', 'experience_years', 'motivation', 'subscribe_newsletter', 'status', 'notes', 'created_at'
+        ],
+        'date_field': 'created_at',
+        'statuses': {
+            'pending': {'status': 'pending'},
+            'confirmed': {'status': 'confirmed'},
+            'cancelled': {'status': 'cancelled'},
+        },
+    },
+    'contacts': {
+        'model': ContactMessage,
+        'fields': ['id', 'name', 'email', 'subject', 'message', 'is_read', 'created_at'],
+        'date_field': 'created_at',
+        'statuses': {
+            'read': {'is_read': True},
+            'unread': {'is_read': False},
+        },
+    },
+    'subscribers': {
+        'model': NewsletterSubscription,
+        'fields': ['id', 'email', 'is_active', 'subscribed_at'],
+        'date_field': 'subscribed_at',
+        'statuses': {
+            'active': {'is_active': True},
+            'inactive': {'is_active': False},
+        },
+    },
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def export_for_model(model):
+    """Return the export name for a model class, or None"""
+    for name, export in EXPORTS.items():
+        if export['model'] is model:
+            return name
+    return None
+
+
+def _day_bound(day, end=False):
+    """Aware datetime at the start of day (or start of the following day)"""
+    bound = datetime.combine(day, time.min)
+    if end:
+        bound += timedelta(days=1)
+    return timezone.make_aware(bound)
+
+
+def filter_queryset(name, since=None, until=None, status=None):
+    """Queryset for an export, filtered by an inclusive date range and a status"""
+    export = EXPORTS[name]
+    queryset = export['model'].objects.all()
+    if since:
+        queryset = queryset.filter(**{f"{export['date_field']}__gte": _day_bound(since)})
+    if until:
+        queryset = queryset.filter(**{f"{export['date_field']}__lt": _day_bound(until, end=True)})
+    if status:
+        queryset = queryset.filter(**export['statuses'][status])
+    return queryset
+
+
+class _Echo:
+    """File-like object whose write() hands the value back to csv.writer's caller"""
+
+    def write(self, value):
+        return value
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def stream_export(name, queryset, fmt='csv', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the export as text, one chunk of rows at a time"""
+    fields = EXPORTS[name]['fields']
+    rows = queryset.order_by('pk').values_list(*fields).iterator(chunk_size=chunk_size)
+
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(fields)
+
+        def encode(row):
+            return writer.writerow(map(_encode_value, row))
+    else:
+        def encode(row):
+            return json.dumps(dict(zip(fields, map(_encode_value, row))), ensure_ascii=False) + '\n'
+
+    lines = []
+    for row in rows:
+        lines.append(encode(row))
+        if len(lines) >= chunk_size:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def make_admin_action(fmt):
+    """Admin action that streams the selected rows in the given format"""
+    def export_selected(modeladmin, request, queryset):
+        return export_response(export_for_model(queryset.model), queryset, fmt)
+    export_selected.__name__ = f'export_selected_{fmt}'
+    export_selected.short_description = f'Export selected as {fmt.upper()}'
+    return export_selected
+
+
+def export_response(name, queryset, fmt='csv'):
+    """StreamingHttpResponse that downloads the export as a file"""
+    response = StreamingHttpResponse(stream_export(name, queryset, fmt), content_type=FORMATS[fmt])
+    filename = f"{name}-{timezone.now().strftime('%Y%m%d-%H%M%S')}.{fmt}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
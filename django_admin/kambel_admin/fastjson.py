@@ -0,0 +1,99 @@
+"""
+Fast JSON encoding for the API responses
+
+dumps() turns a payload into compact UTF-8 JSON bytes with the backend named
+by BACKEND: orjson when it is installed, the standard library otherwise.
+Both encode the values the models hand out without any conversion in the
+views: Decimal as a number, date as YYYY-MM-DD, datetime and time as ISO
+8601, UUID as a string and lazy translation strings as their text, so the
+two backends produce the same document.
+
+The module doesn't need Django, so the Flask proxy imports it for its JSON
+provider in an environment without Django installed; the Django responses
+built on it are in json_responses.py. The bytes are final: a cache can
+store them and hand them back to a response as they are.
+
+iter_array() encodes a JSON array while its items are still being produced,
+a batch at a time, in exactly the bytes dumps() would give for the whole
+list.
+"""
+import datetime
+import decimal
+import itertools
+import json
+import uuid
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from django.utils.functional import Promise
+except ImportError:
+    # Without Django there are no lazy strings to encode
+    Promise = ()
+
+
+STREAM_BATCH_SIZE = 200
+
+
+def default(obj):
+    """JSON-compatible stand-in for the types neither encoder handles itself"""
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, Promise):
+        return str(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class _Encoder(json.JSONEncoder):
+    def default(self, obj):
+        # Same output as orjson: datetimes keep their microseconds and offset
+        if isinstance(obj, (datetime.date, datetime.time)):
+            return obj.isoformat()
+        if isinstance(obj, uuid.UUID):
+            return str(obj)
+        return default(obj)
+
+
+_stdlib_encoder = _Encoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def _stdlib_dumps(obj):
+    return _stdlib_encoder.encode(obj).encode()
+
+
+def _orjson_dumps(obj):
+    return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+
+
+BACKENDS = {'json': _stdlib_dumps}
+if orjson is not None:
+    BACKENDS['orjson'] = _orjson_dumps
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def dumps(obj, backend=None):
+    """UTF-8 JSON bytes of obj"""
+    return BACKENDS[backend or BACKEND](obj)
+
+
+def iter_array(items, batch_size=STREAM_BATCH_SIZE):
+    """JSON array of items as a series of byte chunks, encoding batch_size items at a time"""
+    items = iter(items)
+    yield b'['
+    separator = b''
+    while True:
+        batch = list(itertools.islice(items, batch_size))
+        if not batch:
+            break
+        # Strip the brackets of the batch's own array
+        yield separator + dumps(batch)[1:-1]
+        separator = b','
+    yield b']'
+
+
+def loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
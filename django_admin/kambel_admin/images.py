@@ -0,0 +1,262 @@
+"""
+Responsive image variants for uploaded pictures
+
+Each image field in IMAGE_SOURCES gets WebP and JPEG copies at a few fixed
+widths, stored next to the media under variants/ and recorded, with their
+dimensions, in the model's <field>_variants JSON field. Generation runs on a
+small background thread pool after the upload is committed, and is idempotent:
+a record whose source matches the current file is left alone.
+
+The intrinsic size and a tiny blurred placeholder are cheaper, so they are
+computed while the upload is saved and stored in <field>_width,
+<field>_height and <field>_placeholder.
+"""
+import base64
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import connection, transaction
+from django.db.models import Q
+from PIL import Image, ImageFilter, ImageOps, features
+
+from . import invalidation, static_site, storage, versioning
+from .models import AboutConfig, BlogPost, Book, ConsultancyService, GalleryItem, HeroConfig, Masterclass
+
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SOURCES = {
+    Book: ['cover_image'],
+    ConsultancyService: ['cover_image'],
+    BlogPost: ['cover_image'],
+    HeroConfig: ['profile_picture'],
+    AboutConfig: ['profile_picture'],
+    Masterclass: ['cover_image'],
+    GalleryItem: ['image'],
+}
+
+VARIANT_WIDTHS = getattr(settings, 'IMAGE_VARIANT_WIDTHS', [320, 640, 1024, 1600])
+
+# Encoder settings per output format (Pillow format name, extension, save options)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+VARIANT_DIR = 'variants'
+
+# Variants are derived from their source's name, so they bypass the
+# content-addressed default storage and keep predictable names in MEDIA_ROOT
+variant_storage = FileSystemStorage()
+
+# Longest side of the placeholder image; the browser scales and blurs it further
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 50
+
+# EXIF orientations that rotate the image by 90 degrees
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'IMAGE_VARIANT_WORKERS', 2), thread_name_prefix='image-variants'
+)
+
+
+def variants_field(field_name):
+    return f'{field_name}_variants'
+
+
+def output_formats():
+    """WebP is skipped when Pillow was built without it"""
+    return [fmt for fmt in VARIANT_FORMATS if fmt != 'webp' or features.check('webp')]
+
+
+def target_widths(width):
+    """Configured widths narrower than the original, plus the original if it is smaller than the largest"""
+    widths = [w for w in VARIANT_WIDTHS if w < width]
+    if width <= max(VARIANT_WIDTHS) and width not in widths:
+        widths.append(width)
+    return widths
+
+
+def variant_name(source_name, width, extension):
+    stem, _ = os.path.splitext(source_name)
+    return f'{VARIANT_DIR}/{stem}-{width}w.{extension}'
+
+
+def _open(field_file):
+    with field_file.open('rb') as f:
+        image = Image.open(f)
+        image.load()
+    # Apply the camera orientation before the EXIF block is dropped
+    return ImageOps.exif_transpose(image)
+
+
+def placeholder_values(field_name, image_file):
+    """Model field values for the intrinsic size and placeholder of an image file"""
+    values = {f'{field_name}_width': None, f'{field_name}_height': None, f'{field_name}_placeholder': ''}
+    if not image_file:
+        return values
+    image_file.seek(0)
+    with Image.open(image_file) as image:
+        width, height = image.size
+        if image.getexif().get(0x0112) in TRANSPOSED_ORIENTATIONS:
+            width, height = height, width
+        # JPEG draft mode decodes at a fraction of the resolution, so large photos stay cheap
+        image.draft('RGB', (PLACEHOLDER_SIZE * 4, PLACEHOLDER_SIZE * 4))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.BOX)
+        preview = _flatten(image).filter(ImageFilter.GaussianBlur(1))
+    image_file.seek(0)
+    buffer = io.BytesIO()
+    preview.save(buffer, 'JPEG', quality=PLACEHOLDER_QUALITY)
+    values.update({
+        f'{field_name}_width': width,
+        f'{field_name}_height': height,
+        f'{field_name}_placeholder': 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode(),
+    })
+    return values
+
+
+def _flatten(image):
+    """RGB copy for JPEG, with transparency composited onto white"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def encode(image, fmt):
+    """Encode a Pillow image as one of VARIANT_FORMATS"""
+    pil_format, _, options = VARIANT_FORMATS[fmt]
+    if fmt == 'jpeg':
+        image = _flatten(image)
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+    buffer = io.BytesIO()
+    # No exif= argument, so metadata from the upload is not carried over
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def build_variants(field_file):
+    """Write all variants of an image file and return the record to store"""
+    image = _open(field_file)
+    width, height = image.size
+    record = {'source': field_file.name, 'width': width, 'height': height}
+    for fmt in output_formats():
+        extension = VARIANT_FORMATS[fmt][1]
+        record[fmt] = []
+        for target in target_widths(width):
+            size = (target, max(1, round(height * target / width)))
+            name = variant_name(field_file.name, target, extension)
+            if variant_storage.exists(name):
+                # A content-addressed source means identical uploads already produced this file
+                if storage.is_content_addressed(field_file.name):
+                    record[fmt].append({'name': name, 'width': size[0], 'height': size[1]})
+                    continue
+                variant_storage.delete(name)
+            resized = image if target == width else image.resize(size, Image.LANCZOS)
+            saved_name = variant_storage.save(name, ContentFile(encode(resized, fmt)))
+            record[fmt].append({'name': saved_name, 'width': resized.width, 'height': resized.height})
+    return record
+
+
+def is_current(field_file, record):
+    """True when record describes field_file and all its variants exist"""
+    if not field_file or not record or record.get('source') != field_file.name:
+        return False
+    return all(
+        fmt in record and all(variant_storage.exists(variant['name']) for variant in record[fmt])
+        for fmt in output_formats()
+    )
+
+
+def delete_variants(record):
+    """Remove a record's files unless another row still uses the same source file"""
+    if record and record.get('source') and storage.count_references(record['source']):
+        return
+    for fmt in VARIANT_FORMATS:
+        for variant in (record or {}).get(fmt, []):
+            try:
+                variant_storage.delete(variant['name'])
+            except OSError:
+                logger.warning('Could not delete image variant %s', variant['name'])
+
+
+def process(model, pk, field_name, force=False):
+    """Generate (or clear) the variants of one field; returns True if anything was written"""
+    obj = model.objects.filter(pk=pk).first()
+    if obj is None:
+        return False
+    field_file = getattr(obj, field_name)
+    old_record = getattr(obj, variants_field(field_name))
+    if not force and (is_current(field_file, old_record) or (not field_file and not old_record)):
+        return False
+
+    record = build_variants(field_file) if field_file else {}
+    # Only store the record if the image was not replaced while we worked
+    if field_file:
+        unchanged = Q(**{field_name: field_file.name})
+    else:
+        unchanged = Q(**{field_name: ''}) | Q(**{f'{field_name}__isnull': True})
+    updated = model.objects.filter(unchanged, pk=pk).update(**{variants_field(field_name): record})
+    if not updated:
+        delete_variants(record)
+        return False
+    current = {v['name'] for fmt in VARIANT_FORMATS for v in record.get(fmt, [])}
+    stale = {
+        fmt: [v for v in (old_record or {}).get(fmt, []) if v['name'] not in current] for fmt in VARIANT_FORMATS
+    }
+    delete_variants(dict(stale, source=(old_record or {}).get('source')))
+    return True
+
+
+def _run(model, pk, field_name):
+    try:
+        if process(model, pk, field_name):
+            # Variants are stored with update(), which sends no post_save
+            static_site.schedule(model)
+            versioning.bump(model, pk)
+            invalidation.schedule(model)
+    except Exception:
+        logger.exception('Failed to build image variants for %s %s.%s', model.__name__, pk, field_name)
+    finally:
+        connection.close()
+
+
+def schedule(model, pk, field_name):
+    """Queue variant generation for after the current transaction commits"""
+    transaction.on_commit(lambda: _executor.submit(_run, model, pk, field_name))
+
+
+def needs_processing(instance, field_name):
+    field_file = getattr(instance, field_name)
+    record = getattr(instance, variants_field(field_name)) or {}
+    return (field_file.name or '') != record.get('source', '')
+
+
+def variant_map(request, instance, field_name):
+    """srcset-style description of an image's variants for API responses, or None"""
+    record = getattr(instance, variants_field(field_name)) or {}
+    if not getattr(instance, field_name) or record.get('source') != getattr(instance, field_name).name:
+        return None
+    data = {'width': record['width'], 'height': record['height'], 'srcset': {}, 'variants': {}}
+    for fmt in output_formats():
+        variants = [
+            {
+                'url': request.build_absolute_uri(variant_storage.url(v['name'])),
+                'width': v['width'],
+                'height': v['height'],
+            }
+            for v in record.get(fmt, [])
+        ]
+        data['variants'][fmt] = variants
+        data['srcset'][fmt] = ', '.join(f"{v['url']} {v['width']}w" for v in variants)
+    return data
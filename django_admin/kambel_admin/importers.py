@@ -0,0 +1,334 @@
+"""
+Bulk catalog import from CSV, JSON or JSON Lines
+
+Rows are validated in chunks without touching the database, then each chunk
+is written with one bulk_create and one batched UPDATE inside a transaction.
+Bulk writes send no post_save, so each chunk then does what the handlers in
+signals.py would: bump the content version, publish the cache invalidation,
+re-export the static site and recount media references. Existing rows are
+matched on a natural key, so re-importing a file updates rather than
+duplicates. Invalid rows are reported and skipped; they never abort the rest
+of the import.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from . import invalidation, search, static_site, storage, suggest, versioning
+from .models import (
+    AboutConfig, Achievement, Book, Category, EducationQualification, GalleryItem, Masterclass,
+    ProfessionalJourneyItem, SpeakingEngagement
+)
+
+
+IMPORTS = {
+    'categories': {
+        'model': Category,
+        'fields': ['name', 'description', 'is_active'],
+        'key': ['name'],
+    },
+    'books': {
+        'model': Book,
+        'fields': ['title', 'author', 'description', 'category', 'pages', 'price', 'purchase_link', 'is_active'],
+        'key': ['title'],
+        # Foreign keys are given by a unique field of the related model
+        'lookups': {'category': (Category, 'name')},
+    },
+    'gallery': {
+        'model': GalleryItem,
+        'fields': ['title', 'caption', 'description', 'media_type', 'video_url', 'order', 'is_featured', 'is_active'],
+        'key': ['title'],
+    },
+    'masterclasses': {
+        'model': Masterclass,
+        'fields': [
+            'title', 'description', 'instructor', 'date', 'duration', 'price', 'total_seats',
+            'seats_available', 'video_url', 'is_upcoming', 'is_active'
+        ],
+        'key': ['title', 'date'],
+    },
+    'journey': {
+        'model': ProfessionalJourneyItem,
+        'fields': ['title', 'organization', 'period', 'description', 'icon', 'order', 'is_active'],
+        'key': ['title', 'organization'],
+        'about_config': True,
+    },
+    'education': {
+        'model': EducationQualification,
+        'fields': ['qualification', 'institution', 'year', 'icon', 'order', 'is_active'],
+        'key': ['qualification', 'institution'],
+        'about_config': True,
+    },
+    'achievements': {
+        'model': Achievement,
+        'fields': ['title', 'description', 'year', 'icon', 'order', 'is_active'],
+        'key': ['title', 'year'],
+        'about_config': True,
+    },
+    'speaking': {
+        'model': SpeakingEngagement,
+        'fields': ['title', 'event', 'date', 'location', 'order', 'is_active'],
+        'key': ['title', 'event'],
+        'about_config': True,
+    },
+}
+
+FORMATS = ['csv', 'json', 'jsonl']
+
+DEFAULT_CHUNK_SIZE = 1000
+
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y', 'on'}
+FALSE_VALUES = {'0', 'false', 'f', 'no', 'n', 'off'}
+
+
+class ImportResult:
+    """Counts of written rows plus (row number, message) pairs for rejected rows"""
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.errors = []
+
+    @property
+    def total(self):
+        return self.created + self.updated + len(self.errors)
+
+
+def guess_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    return extension if extension in FORMATS else 'csv'
+
+
+def read_rows(stream, fmt):
+    """Iterate dict rows from a binary or text stream"""
+    if hasattr(stream, 'chunks'):
+        # Django UploadedFile: wrap the underlying binary file
+        stream = stream.file
+    if isinstance(stream, (io.RawIOBase, io.BufferedIOBase)) or not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    elif fmt == 'jsonl':
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        data = json.load(stream)
+        yield from (data if isinstance(data, list) else data.get('rows', []))
+
+
+class Importer:
+    """Validates and writes rows for one entry of IMPORTS"""
+
+    def __init__(self, name, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False):
+        self.name = name
+        self.spec = IMPORTS[name]
+        self.model = self.spec['model']
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.result = ImportResult()
+        self.fields = {f: self.model._meta.get_field(f) for f in self.spec['fields']}
+        self.lookup_cache = {name: {} for name in self.spec.get('lookups', {})}
+        self.about_config = None
+        if self.spec.get('about_config'):
+            self.about_config = AboutConfig.objects.filter(is_active=True).first() or AboutConfig.objects.first()
+            if self.about_config is None:
+                raise ValueError('Create the About Page Configuration before importing its items')
+
+    def run(self, rows):
+        numbered = enumerate(rows, start=1)
+        while True:
+            chunk = list(islice(numbered, self.chunk_size))
+            if not chunk:
+                break
+            self._import_chunk(chunk)
+        if not self.dry_run:
+            self._refresh_indexes()
+        return self.result
+
+    def _resolve_lookups(self, chunk):
+        """Fetch the related objects a chunk refers to in one query per foreign key"""
+        for field_name, (related_model, lookup_field) in self.spec.get('lookups', {}).items():
+            cache = self.lookup_cache[field_name]
+            wanted = {row.get(field_name) for _, row in chunk if row.get(field_name)} - set(cache)
+            if wanted:
+                for obj in related_model.objects.filter(**{f'{lookup_field}__in': wanted}):
+                    cache[getattr(obj, lookup_field)] = obj
+
+    def _convert(self, field_name, value):
+        field = self.fields[field_name]
+        if field_name in self.lookup_cache:
+            if value in (None, ''):
+                return None
+            if value not in self.lookup_cache[field_name]:
+                raise ValidationError(f'Unknown {field_name} "{value}"')
+            return self.lookup_cache[field_name][value]
+        if isinstance(value, str):
+            value = value.strip()
+            if field.get_internal_type() == 'BooleanField':
+                if value.lower() in TRUE_VALUES:
+                    return True
+                if value.lower() in FALSE_VALUES:
+                    return False
+        return field.clean(value, None)
+
+    def _build(self, row):
+        """Return (values, errors) for one input row"""
+        values = {}
+        errors = []
+        for field_name, field in self.fields.items():
+            if field_name not in row:
+                continue
+            value = row[field_name]
+            if value in (None, '') and field.has_default():
+                continue
+            try:
+                values[field_name] = self._convert(field_name, value)
+            except ValidationError as e:
+                errors.append(f"{field_name}: {' '.join(e.messages)}")
+        missing = [k for k in self.spec['key'] if k not in values]
+        if missing and not errors:
+            errors.append(f"missing key field(s): {', '.join(missing)}")
+        return values, errors
+
+    def _key(self, values):
+        return tuple(values[k] for k in self.spec['key'])
+
+    def _import_chunk(self, chunk):
+        self._resolve_lookups(chunk)
+        rows = {}
+        for row_number, row in chunk:
+            values, errors = self._build(row)
+            if errors:
+                self.result.errors.append((row_number, '; '.join(errors)))
+            else:
+                # Later rows with the same key win
+                rows[self._key(values)] = (row_number, values)
+
+        existing = self._existing(rows)
+        to_create, to_update, update_fields = [], [], set()
+        for key, (row_number, values) in rows.items():
+            obj = existing.get(key)
+            if obj is None:
+                missing = [
+                    name for name, field in self.fields.items()
+                    if name not in values and not field.blank and not field.has_default()
+                ]
+                if missing:
+                    self.result.errors.append((row_number, f"missing required field(s): {', '.join(missing)}"))
+                    continue
+                obj = self.model(**values)
+                if self.about_config:
+                    obj.about_config = self.about_config
+                to_create.append((row_number, obj))
+            else:
+                for field_name, value in values.items():
+                    setattr(obj, field_name, value)
+                update_fields.update(values)
+                to_update.append((row_number, obj))
+
+        if self.dry_run:
+            self.result.created += len(to_create)
+            self.result.updated += len(to_update)
+            return
+        if hasattr(self.model, 'updated_at'):
+            now = timezone.now()
+            for _, obj in to_update:
+                obj.updated_at = now
+            update_fields.add('updated_at')
+        self._write(to_create, to_update, sorted(update_fields))
+
+    def _existing(self, rows):
+        """Existing objects keyed like rows, fetched with one query on the first key field"""
+        if not rows:
+            return {}
+        first = self.spec['key'][0]
+        queryset = self.model.objects.filter(**{f'{first}__in': {key[0] for key in rows}})
+        if self.about_config:
+            queryset = queryset.filter(about_config=self.about_config)
+        return {tuple(getattr(obj, k) for k in self.spec['key']): obj for obj in queryset}
+
+    def _write(self, to_create, to_update, update_fields):
+        try:
+            with transaction.atomic():
+                created = self.model.objects.bulk_create([obj for _, obj in to_create], batch_size=500)
+                if to_update:
+                    self._bulk_update([obj for _, obj in to_update], update_fields)
+                self._record_changes(created + [obj for _, obj in to_update])
+            self.result.created += len(to_create)
+            self.result.updated += len(to_update)
+        except DatabaseError:
+            # Find the offending rows one at a time so the rest of the chunk still lands.
+            # save() sends post_save, so each row that lands is recorded by its handlers
+            for row_number, obj in to_create:
+                obj.pk = None
+                try:
+                    with transaction.atomic():
+                        obj.save(force_insert=True)
+                    self.result.created += 1
+                except DatabaseError as e:
+                    self.result.errors.append((row_number, str(e)))
+            for row_number, obj in to_update:
+                try:
+                    with transaction.atomic():
+                        obj.save(update_fields=update_fields)
+                    self.result.updated += 1
+                except DatabaseError as e:
+                    self.result.errors.append((row_number, str(e)))
+
+    def _bulk_update(self, objs, update_fields):
+        """One parameterized UPDATE run with executemany
+
+        bulk_update() builds a CASE expression per field over the whole batch,
+        which gets slow for wide rows; a prepared statement per row does not.
+        """
+        fields = [self.model._meta.get_field(name) for name in update_fields]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        assignments = ', '.join(f'{connection.ops.quote_name(field.column)} = %s' for field in fields)
+        pk_column = connection.ops.quote_name(self.model._meta.pk.column)
+        params = [
+            [field.get_db_prep_save(getattr(obj, field.attname), connection) for field in fields] + [obj.pk]
+            for obj in objs
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(f'UPDATE {table} SET {assignments} WHERE {pk_column} = %s', params)
+
+    def _record_changes(self, objs):
+        """What the post_save handlers in signals.py do, once for a written batch"""
+        if not objs:
+            return
+        if self.model in versioning.PUBLIC_MODELS:
+            versioning.bump_many(self.model, [obj.pk for obj in objs])
+            invalidation.schedule(self.model)
+        static_site.schedule(self.model)
+        # Files an imported field now points at, and the ones it pointed at when loaded
+        file_fields = [name for model, name in storage.file_fields() if model is self.model and name in self.fields]
+        names = set()
+        for obj in objs:
+            previous = getattr(obj, '_media_files', {})
+            for name in file_fields:
+                names.update((getattr(obj, name).name or '', previous.get(name, '')))
+        if names - {''}:
+            storage.refresh_references(names - {''})
+
+    def _refresh_indexes(self):
+        """Bulk writes skip model signals, so refresh the derived indexes here"""
+        if not self.result.created and not self.result.updated:
+            return
+        content_type, _ = search.source_for_model(self.model)
+        if content_type is None and self.model is Category:
+            content_type = 'book'
+        if content_type and search.is_available():
+            search.rebuild([content_type])
+        if suggest.source_for_model(self.model) and suggest.index.built_at is not None:
+            suggest.index.rebuild_in_background()
+
+
+def import_rows(name, rows, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False):
+    """Import an iterable of dict rows and return an ImportResult"""
+    return Importer(name, chunk_size=chunk_size, dry_run=dry_run).run(rows)
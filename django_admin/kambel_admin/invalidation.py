@@ -0,0 +1,97 @@
+"""
+Cache invalidation events for the Flask proxy
+
+Once a transaction that changed public content commits, the API endpoints
+built from the changed models (see static_site.API_OUTPUTS) are POSTed with
+the new content version to every URL in CACHE_INVALIDATION_URLS:
+
+    {"version": 44, "endpoints": ["publications/", "site/seo/<str:page>/"]}
+
+Endpoints are relative to /api/ and may hold URL parameters, which match any
+value. Each event carries the token the proxy checks, see token(). Events are
+sent by one background thread; changes that pile up while an event is being
+sent go out together in the next one. A receiver that is down is retried for
+a while and then given up on; the proxy's own version check (see
+proxy_cache.py) catches it up once it is back.
+"""
+import json
+import logging
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from . import shared_secrets, static_site, versioning
+
+
+logger = logging.getLogger(__name__)
+
+TOKEN_HEADER = 'X-Invalidation-Token'
+# Seconds to wait before each new attempt at an event a receiver didn't take
+RETRY_DELAYS = (1, 5, 15)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cache-invalidation')
+_pending = set()
+_lock = threading.Lock()
+
+
+def urls():
+    return getattr(settings, 'CACHE_INVALIDATION_URLS', [])
+
+
+def token():
+    """CACHE_INVALIDATION_TOKEN, or the token shared with the proxy through CACHE_INVALIDATION_TOKEN_FILE"""
+    return settings.CACHE_INVALIDATION_TOKEN or shared_secrets.load_or_create(str(settings.CACHE_INVALIDATION_TOKEN_FILE))
+
+
+def endpoints_for(model):
+    """API endpoints, relative to /api/, whose responses are built from model"""
+    return {route[len('api/'):] for route, models in static_site.API_OUTPUTS.items() if model in models}
+
+
+def deliver(url, event):
+    """POST an event to a receiver, retrying on failure; returns True if it was accepted"""
+    body = json.dumps(event).encode()
+    headers = {'Content-Type': 'application/json', TOKEN_HEADER: token()}
+    for delay in (0,) + RETRY_DELAYS:
+        time.sleep(delay)
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, body, headers), timeout=5):
+                return True
+        except OSError as e:
+            error = e
+    logger.warning('Cache invalidation for %s was not delivered to %s: %s', ', '.join(event['endpoints']), url, error)
+    return False
+
+
+def _flush():
+    with _lock:
+        endpoints = sorted(_pending)
+        _pending.clear()
+    if not endpoints:
+        return
+    try:
+        event = {'version': versioning.current(), 'endpoints': endpoints}
+        for url in urls():
+            deliver(url, event)
+    except Exception:
+        logger.exception('Cache invalidation failed for %s', ', '.join(endpoints))
+    finally:
+        connection.close()
+
+
+def schedule(model):
+    """Publish the endpoints built from model once the current transaction commits"""
+    endpoints = endpoints_for(model)
+    if not urls() or not endpoints:
+        return
+
+    def publish():
+        with _lock:
+            _pending.update(endpoints)
+        _executor.submit(_flush)
+
+    transaction.on_commit(publish)
@@ -0,0 +1,40 @@
+"""
+Django responses encoded with fastjson
+
+JsonResponse sends a payload, or bytes fastjson.dumps() produced earlier,
+e.g. from a cache. StreamingJsonResponse sends a JSON array while its items
+are still being produced, in exactly the bytes JsonResponse would give for
+the whole list.
+"""
+from django.http import HttpResponse, StreamingHttpResponse
+
+from .fastjson import STREAM_BATCH_SIZE, dumps, iter_array
+
+
+CONTENT_TYPE = 'application/json'
+
+
+class JsonResponse(HttpResponse):
+    """django.http.JsonResponse encoded with dumps()
+
+    data may also be bytes produced by dumps() earlier, e.g. from a cache,
+    which are sent as they are.
+    """
+
+    def __init__(self, data, safe=True, **kwargs):
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            content = data
+        else:
+            if safe and not isinstance(data, dict):
+                raise TypeError('In order to allow non-dict objects to be serialized set the safe parameter to False.')
+            content = dumps(data)
+        kwargs.setdefault('content_type', CONTENT_TYPE)
+        super().__init__(content=content, **kwargs)
+
+
+class StreamingJsonResponse(StreamingHttpResponse):
+    """A JSON array streamed from an iterable of items, see iter_array()"""
+
+    def __init__(self, items, batch_size=STREAM_BATCH_SIZE, **kwargs):
+        kwargs.setdefault('content_type', CONTENT_TYPE)
+        super().__init__(iter_array(items, batch_size), **kwargs)
@@ -0,0 +1,49 @@
+"""
+Management command to compute image sizes and placeholders for existing uploads
+"""
+from django.core.management.base import BaseCommand
+from kambel_admin import images, invalidation, static_site, versioning
+
+
+class Command(BaseCommand):
+    help = 'Store the intrinsic size and blurred placeholder of uploaded images that have none yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', action='append', dest='models', choices=[m.__name__ for m in images.IMAGE_SOURCES],
+            help='Only process the given model (can be repeated)'
+        )
+        parser.add_argument('--force', action='store_true', help='Recompute placeholders that are already stored')
+
+    def handle(self, *args, **options):
+        updated = failed = 0
+        changed = {}
+        for model, field_names in images.IMAGE_SOURCES.items():
+            if options['models'] and model.__name__ not in options['models']:
+                continue
+            for field_name in field_names:
+                queryset = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+                if not options['force']:
+                    queryset = queryset.filter(**{f'{field_name}_placeholder': ''})
+                for obj in queryset.only('pk', field_name).iterator():
+                    field_file = getattr(obj, field_name)
+                    try:
+                        with field_file.open('rb') as f:
+                            values = images.placeholder_values(field_name, f)
+                    except Exception as e:
+                        failed += 1
+                        self.stderr.write(f'  {model.__name__} {obj.pk}.{field_name}: {e}')
+                        continue
+                    # update() skips save signals and auto_now fields
+                    model.objects.filter(pk=obj.pk).update(**values)
+                    changed.setdefault(model, set()).add(obj.pk)
+                    updated += 1
+
+        # The API serves the stored sizes and placeholders, so record the
+        # changes the post_save handlers would
+        for model, pks in changed.items():
+            if model in versioning.PUBLIC_MODELS:
+                versioning.bump_many(model, pks)
+                invalidation.schedule(model)
+            static_site.schedule(model)
+        self.stdout.write(self.style.SUCCESS(f'Stored placeholders for {updated} images ({failed} failed)'))
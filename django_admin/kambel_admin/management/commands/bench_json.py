@@ -0,0 +1,111 @@
+"""
+Management command to benchmark JSON encoding of the API payloads
+
+Synthetic publications and gallery payloads shaped like the API responses are
+encoded with every fastjson backend and, for comparison, the way
+django.http.JsonResponse did it: values converted to strings and floats by
+hand, then json.dumps() with DjangoJSONEncoder.
+"""
+import datetime
+import json
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.management.base import BaseCommand
+from kambel_admin import fastjson
+
+
+MEDIA_URL = 'http://localhost:8000/media/'
+
+
+def publication(rng, i):
+    return {
+        'id': i,
+        'title': f'Publication {i}',
+        'author': 'Dr. Kwame Kambel',
+        'description': ' '.join(rng.choices(['career', 'growth', 'leadership', 'strategy', 'vision'], k=40)),
+        'pages': rng.randint(80, 600),
+        'price': Decimal(rng.randint(500, 9999)) / 100,
+        'cover_image_url': f'{MEDIA_URL}books/covers/{i:x}.jpg',
+        'cover_image_variants': {
+            str(width): {'jpeg': f'{MEDIA_URL}variants/{i:x}-{width}.jpg', 'webp': f'{MEDIA_URL}variants/{i:x}-{width}.webp'}
+            for width in (320, 640, 1280)
+        },
+        'cover_image_width': 1280,
+        'cover_image_height': 1920,
+        'cover_image_placeholder': 'data:image/jpeg;base64,' + 'A' * 120,
+        'purchase_link': f'https://example.com/buy/{i}',
+        'category': rng.choice(['Business', 'Career', 'Education', 'Literature']),
+    }
+
+
+def gallery_item(rng, i):
+    return {
+        'id': i,
+        'title': f'Gallery item {i}',
+        'caption': 'Workshop in Accra',
+        'description': ' '.join(rng.choices(['keynote', 'panel', 'students', 'award', 'launch'], k=20)),
+        'media_type': 'image',
+        'media_url': f'{MEDIA_URL}gallery/{i:x}.jpg',
+        'thumbnail_url': f'{MEDIA_URL}gallery/{i:x}.jpg',
+        'image_variants': {str(width): {'jpeg': f'{MEDIA_URL}variants/{i:x}-{width}.jpg'} for width in (320, 640)},
+        'image_width': 1600,
+        'image_height': 1067,
+        'image_placeholder': None,
+        'is_featured': i % 7 == 0,
+        'order': i,
+        'created_at': datetime.date(2024, 1, 1) + datetime.timedelta(days=i % 700),
+    }
+
+
+def hand_converted(item):
+    """An item as the views used to build it, before fastjson"""
+    item = dict(item)
+    if 'price' in item:
+        item['price'] = float(item['price'])
+    if 'created_at' in item:
+        item['created_at'] = item['created_at'].strftime('%Y-%m-%d')
+    return item
+
+
+class Command(BaseCommand):
+    help = 'Benchmark JSON encoding of the publications and gallery payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=10000, help='Items per payload')
+        parser.add_argument('--repeat', type=int, default=20, help='Encodes to time per encoder')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        payloads = {
+            'publications': [publication(rng, i) for i in range(options['items'])],
+            'gallery': [gallery_item(rng, i) for i in range(options['items'])],
+        }
+        self.stdout.write(f"Default backend: {fastjson.BACKEND} ({', '.join(fastjson.BACKENDS)} available)")
+
+        for name, payload in payloads.items():
+            encoders = {
+                'JsonResponse': lambda: json.dumps([hand_converted(item) for item in payload], cls=DjangoJSONEncoder).encode(),
+            }
+            for backend in fastjson.BACKENDS:
+                encoders[f'fastjson/{backend}'] = lambda backend=backend: fastjson.dumps(payload, backend)
+
+            self.stdout.write(f"{name} ({options['items']:,} items)")
+            baseline = None
+            for label, encode in encoders.items():
+                size = len(encode())
+                timings = []
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    encode()
+                    timings.append(time.perf_counter() - start)
+                median = statistics.median(timings)
+                baseline = baseline or median
+                self.stdout.write(
+                    f'  {label:>18}: {median * 1000:7.2f}ms  {options["items"] / median:12,.0f} items/s  '
+                    f'{size / median / 2 ** 20:7.1f} MiB/s  {size:,} bytes  x{baseline / median:.1f}'
+                )
@@ -0,0 +1,125 @@
+"""
+Management command to benchmark media download throughput
+
+Without --url a large synthetic file is written to a temporary MEDIA_ROOT
+and served by Django on a local threaded wsgiref server. wsgiref has no
+sendfile support, so this measures the Python path; point --url at a
+gunicorn deployment to measure zero-copy transfers.
+"""
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+from socketserver import ThreadingMixIn
+from unittest import mock
+from urllib.parse import urlsplit
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.test.utils import override_settings
+from kambel_admin import serving
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Measure full-file and byte-range download throughput of the media handler'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=256, help='Size of the synthetic file in MiB')
+        parser.add_argument('--requests', type=int, default=20, help='Downloads per scenario')
+        parser.add_argument('--concurrency', type=int, default=4, help='Parallel downloads')
+        parser.add_argument('--range-size', type=int, default=1024, help='Size of each range request in KiB')
+        parser.add_argument('--url', help='Benchmark an already running server instead, e.g. http://host:8000/media/x.mp4')
+
+    def handle(self, *args, **options):
+        if options['url']:
+            self._run(options['url'], options)
+            return
+
+        media_root = tempfile.mkdtemp()
+        try:
+            path = os.path.join(media_root, 'bench.bin')
+            with open(path, 'wb') as f:
+                chunk = os.urandom(1024 * 1024)
+                for _ in range(options['size']):
+                    f.write(chunk)
+            # Lift the per-client stream limit: every request comes from 127.0.0.1
+            limiter = serving.StreamLimiter(options['concurrency'] + 1)
+            with override_settings(MEDIA_ROOT=media_root, DEBUG=False, ALLOWED_HOSTS=['*']), \
+                    mock.patch.object(serving, 'limiter', limiter):
+                server = make_server(
+                    '127.0.0.1', 0, get_wsgi_application(),
+                    server_class=ThreadingWSGIServer, handler_class=QuietHandler
+                )
+                thread = threading.Thread(target=server.serve_forever, daemon=True)
+                thread.start()
+                try:
+                    self._run(f'http://127.0.0.1:{server.server_port}{settings.MEDIA_URL}bench.bin', options)
+                finally:
+                    server.shutdown()
+        finally:
+            shutil.rmtree(media_root)
+
+    def _run(self, url, options):
+        parts = urlsplit(url)
+        size = self._fetch(parts, {})[1]
+        self.stdout.write(f'{url}: {size / 1024 / 1024:.0f} MiB')
+        range_bytes = options['range_size'] * 1024
+        rng = random.Random(42)
+
+        def full():
+            return self._fetch(parts, {})
+
+        def ranged():
+            start = rng.randrange(0, max(size - range_bytes, 1))
+            return self._fetch(parts, {'Range': f'bytes={start}-{start + range_bytes - 1}'})
+
+        self._report('full file', full, options)
+        self._report(f"{options['range_size']} KiB ranges", ranged, options)
+
+    def _fetch(self, parts, headers):
+        connection = HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+        try:
+            start = time.perf_counter()
+            connection.request('GET', parts.path, headers=headers)
+            response = connection.getresponse()
+            received = 0
+            while True:
+                data = response.read(256 * 1024)
+                if not data:
+                    break
+                received += len(data)
+            if response.status not in (200, 206):
+                raise RuntimeError(f'HTTP {response.status}')
+            return time.perf_counter() - start, received
+        finally:
+            connection.close()
+
+    def _report(self, label, fetch, options):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            results = list(pool.map(lambda _: fetch(), range(options['requests'])))
+        elapsed = time.perf_counter() - start
+        total = sum(received for _, received in results)
+        latencies = sorted(seconds * 1000 for seconds, _ in results)
+        self.stdout.write(
+            f'  {label:<16} {total / elapsed / 1024 / 1024:8.1f} MiB/s  '
+            f'p50={statistics.median(latencies):.1f}ms  max={latencies[-1]:.1f}ms  '
+            f"({options['requests']} requests, concurrency {options['concurrency']})"
+        )
+
@@ -0,0 +1,82 @@
+"""
+Management command to benchmark full-text search query latency
+
+Synthetic documents are inserted into the search index inside a transaction
+that is rolled back at the end, so the real index is left untouched.
+"""
+import itertools
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from kambel_admin import search
+
+
+COMMON_WORDS = (
+    'career development business strategy leadership education training personal growth '
+    'management coaching mentorship success mindset planning finance marketing innovation '
+    'communication teamwork productivity guidance inspiration literature course workshop '
+    'entrepreneur excellence vision consulting professional skills learning future'
+).split()
+SYLLABLES = ['ka', 'mbe', 'lo', 'ri', 'ta', 'nu', 'se', 'vo', 'di', 'gra', 'pel', 'mon', 'tis', 'fa', 'qui', 'zen']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark full-text search latency against a synthetic index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--docs', type=int, default=100000, help='Number of synthetic documents')
+        parser.add_argument('--queries', type=int, default=500, help='Number of queries to time')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError('Full-text search requires the SQLite database backend')
+
+        rng = random.Random(options['seed'])
+        content_types = list(search.PUBLIC_TYPES)
+        # A long tail of rare words next to a few very common ones, like real prose
+        rare_words = sorted({''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(20000)})
+        words = COMMON_WORDS + rare_words
+        cum_weights = list(itertools.accumulate([200] * len(COMMON_WORDS) + [1] * len(rare_words)))
+
+        with transaction.atomic():
+            start = time.perf_counter()
+            with connection.cursor() as cursor:
+                batch = []
+                for i in range(options['docs']):
+                    content_type = content_types[i % len(content_types)]
+                    object_id = 10_000_000 + i
+                    title = ' '.join(rng.choices(words, cum_weights=cum_weights, k=4)).title()
+                    body = ' '.join(rng.choices(words, cum_weights=cum_weights, k=80))
+                    batch.append((search.make_rowid(content_type, object_id), content_type, object_id, title, body))
+                    if len(batch) >= 5000:
+                        search.insert_rows(cursor, batch)
+                        batch = []
+                if batch:
+                    search.insert_rows(cursor, batch)
+            self.stdout.write(f"Indexed {options['docs']} documents in {time.perf_counter() - start:.2f}s")
+
+            common = [' '.join(rng.choices(COMMON_WORDS, k=2)) for _ in range(options['queries'])]
+            rare = [' '.join(rng.choices(rare_words, k=rng.randint(1, 2))) for _ in range(options['queries'])]
+            self._report('rare terms', [lambda q=q: search.search(q, prefix=False) for q in rare])
+            self._report('rare prefixes', [lambda q=q: search.search(q[:4]) for q in rare])
+            self._report('common terms', [lambda q=q: search.search(q, prefix=False) for q in common])
+            self._report('filtered by type', [lambda q=q: search.search(q, content_types=['book']) for q in rare])
+
+            transaction.set_rollback(True)
+
+    def _report(self, label, calls):
+        timings = []
+        for call in calls:
+            start = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        self.stdout.write(
+            f'{label:>18}: p50 {statistics.median(timings):.2f}ms  p95 {p95:.2f}ms  p99 {p99:.2f}ms'
+        )
@@ -0,0 +1,146 @@
+"""
+Management command to compare the development server with the production one
+
+Each server is started on a free local port with DEBUG off, against the
+configured database: runserver (one process, a thread per request) and
+gunicorn with gunicorn.conf.py (preforked workers). Once /api/ready/ answers,
+--clients keep-alive clients request a mix of API, page and static paths
+for --seconds, and throughput and latency percentiles are reported. With
+--url, already running servers are measured instead.
+"""
+import importlib.util
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.client import HTTPConnection
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+DEFAULT_PATHS = ['api/publications/', 'api/masterclasses/', 'api/site/seo/index/', '', 'static/admin/js/actions.js']
+
+SERVERS = {
+    'runserver': lambda port: [sys.executable, 'manage.py', 'runserver', '--noreload', f'127.0.0.1:{port}'],
+    'gunicorn': lambda port: [
+        sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+        'kambel_admin.wsgi:application'
+    ],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = 'Measure throughput and latency of runserver against gunicorn'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servers', nargs='+', choices=list(SERVERS), default=list(SERVERS))
+        parser.add_argument('--clients', type=int, default=32, help='Concurrent keep-alive clients')
+        parser.add_argument('--seconds', type=float, default=10, help='Duration of each run')
+        parser.add_argument('--path', action='append', dest='paths', help=f'Path to request (repeatable); default {DEFAULT_PATHS}')
+        parser.add_argument('--url', action='append', dest='urls', help='Benchmark an already running server instead (repeatable)')
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or DEFAULT_PATHS
+        if options['urls']:
+            for url in options['urls']:
+                self._report(url, self._load(url, paths, options))
+            return
+
+        for name in options['servers']:
+            if name == 'gunicorn' and importlib.util.find_spec('gunicorn') is None:
+                self.stdout.write(self.style.WARNING('gunicorn: not installed, skipped'))
+                continue
+            port = free_port()
+            process = subprocess.Popen(
+                SERVERS[name](port), cwd=settings.BASE_DIR, env=dict(os.environ, DJANGO_DEBUG='False'),
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                url = f'http://127.0.0.1:{port}/'
+                self._wait_ready(url, process)
+                self._report(name, self._load(url, paths, options))
+            finally:
+                process.terminate()
+                process.wait(30)
+
+    def _wait_ready(self, url, process, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f'Server exited with status {process.returncode}')
+            try:
+                if self._get(HTTPConnection(*self._address(url), timeout=5), url, 'api/ready/')[0] == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        raise CommandError(f'{url} was not ready after {timeout} seconds')
+
+    @staticmethod
+    def _address(url):
+        parts = urlsplit(url)
+        return parts.hostname, parts.port or 80
+
+    @staticmethod
+    def _get(connection, url, path):
+        connection.request('GET', urlsplit(url).path.rstrip('/') + '/' + path)
+        response = connection.getresponse()
+        response.read()
+        return response.status, response.will_close
+
+    def _load(self, url, paths, options):
+        """(latencies in ms, errors, elapsed seconds) of options['clients'] clients requesting paths in turn"""
+        latencies, errors = [], []
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['seconds']
+
+        def client(offset):
+            connection = HTTPConnection(*self._address(url), timeout=30)
+            mine, failed, i = [], 0, offset
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    status, will_close = self._get(connection, url, paths[i % len(paths)])
+                    if status != 200:
+                        failed += 1
+                    if will_close:
+                        connection.close()
+                except OSError:
+                    failed += 1
+                    connection.close()
+                mine.append((time.perf_counter() - start) * 1000)
+                i += 1
+            connection.close()
+            with lock:
+                latencies.extend(mine)
+                errors.append(failed)
+
+        start = time.monotonic()
+        threads = [threading.Thread(target=client, args=(n,)) for n in range(options['clients'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies, sum(errors), time.monotonic() - start
+
+    def _report(self, label, result):
+        latencies, errors, elapsed = result
+        if not latencies:
+            raise CommandError(f'{label}: no requests completed')
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(
+            f'  {label:<10} {len(latencies) / elapsed:8.0f} req/s  p50={statistics.median(latencies):.1f}ms  '
+            f'p99={p99:.1f}ms  max={latencies[-1]:.1f}ms  errors={errors}'
+        )
@@ -0,0 +1,26 @@
+"""
+Management command to build fingerprinted, minified and precompressed frontend assets
+"""
+from django.core.management.base import BaseCommand
+from kambel_admin import assets
+
+
+class Command(BaseCommand):
+    help = 'Minify and content-hash the site CSS/JS into static/dist/ and build copies of the HTML pages using them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-minify', action='store_true', help='Only fingerprint and compress the files')
+        parser.add_argument('--clean', action='store_true', help='Remove the build, so the original pages and sources are served')
+
+    def handle(self, *args, **options):
+        if options['clean']:
+            pages = assets.clean()
+            self.stdout.write(self.style.SUCCESS(f'Removed static/{assets.DIST_DIR}/ and {len(pages)} built pages'))
+            return
+
+        report, pages = assets.build(minify=not options['no_minify'])
+        for source, target, original, built in report:
+            self.stdout.write(f'  {source} -> {target} ({original:,} -> {built:,} bytes)')
+        if assets.brotli is None:
+            self.stdout.write('  brotli is not installed; only .gz copies were written')
+        self.stdout.write(self.style.SUCCESS(f'Built {len(report)} assets, updated {len(pages)} pages'))
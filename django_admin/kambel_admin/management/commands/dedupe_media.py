@@ -0,0 +1,92 @@
+"""
+Management command to move existing uploads into content-addressed storage
+"""
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from kambel_admin import images, invalidation, static_site, storage, versioning
+from kambel_admin.models import MediaBlob
+
+
+class Command(BaseCommand):
+    help = 'Rename uploads to their content hash, merge duplicates, recount references and delete unused files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+        parser.add_argument('--keep-originals', action='store_true', help='Leave the old files in place after renaming')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        renamed = {}
+        moved = 0
+        changed = {}
+        for model, field_name in storage.file_fields():
+            rows = model._default_manager.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            for pk, name in rows.values_list('pk', field_name).iterator():
+                if storage.is_content_addressed(name):
+                    continue
+                if not default_storage.exists(name):
+                    self.stderr.write(f'  missing: {name} ({model.__name__} {pk})')
+                    continue
+                if name not in renamed:
+                    if dry_run:
+                        renamed[name] = None
+                    else:
+                        with default_storage.open(name, 'rb') as f:
+                            renamed[name] = default_storage.save(name, f)
+                moved += 1
+                if dry_run:
+                    continue
+                model._default_manager.filter(pk=pk).update(**{field_name: renamed[name]})
+                changed.setdefault(model, set()).add(pk)
+                if model in images.IMAGE_SOURCES and field_name in images.IMAGE_SOURCES[model]:
+                    images.process(model, pk, field_name)
+
+        unique = len(set(renamed.values())) if not dry_run else len(renamed)
+        self.stdout.write(f'{moved} references to {len(renamed)} legacy files -> {unique} content-addressed files')
+        if dry_run:
+            return
+
+        # update() sends no post_save, so record the changes the signal handlers would
+        for model, pks in changed.items():
+            if model in versioning.PUBLIC_MODELS:
+                versioning.bump_many(model, pks)
+                invalidation.schedule(model)
+            static_site.schedule(model)
+
+        if not options['keep_originals']:
+            for name in renamed:
+                if not storage.count_references(name):
+                    default_storage.delete(name)
+
+        # Recount every blob and create rows for files stored without one
+        referenced = set()
+        for model, field_name in storage.file_fields():
+            referenced.update(
+                name for name in model._default_manager.values_list(field_name, flat=True)
+                if storage.is_content_addressed(name)
+            )
+        for name in referenced:
+            if default_storage.exists(name):
+                MediaBlob.objects.update_or_create(name=name, defaults={
+                    'sha256': storage.digest_from_name(name),
+                    'size': default_storage.size(name),
+                    'ref_count': storage.count_references(name),
+                })
+
+        # Files under objects/ that nothing references
+        removed = 0
+        objects_root = os.path.join(settings.MEDIA_ROOT, storage.OBJECTS_DIR)
+        for root, _, files in os.walk(objects_root):
+            for filename in files:
+                if filename.endswith('.part'):
+                    continue
+                name = os.path.relpath(os.path.join(root, filename), settings.MEDIA_ROOT).replace(os.sep, '/')
+                if name not in referenced and storage.collect(name):
+                    removed += 1
+        MediaBlob.objects.exclude(name__in=referenced).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(referenced)} files referenced, {removed} unreferenced files deleted'
+        ))
@@ -0,0 +1,39 @@
+"""
+Management command to stream registrations, contact messages or subscribers to CSV/JSONL
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from kambel_admin import exports
+
+
+class Command(BaseCommand):
+    help = 'Export registrations, contact messages or newsletter subscribers as CSV or JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('export', choices=list(exports.EXPORTS), help='What to export')
+        parser.add_argument('--format', choices=list(exports.FORMATS), default='csv')
+        parser.add_argument('--since', type=date.fromisoformat, help='Only rows on or after this date (YYYY-MM-DD)')
+        parser.add_argument('--until', type=date.fromisoformat, help='Only rows on or before this date (YYYY-MM-DD)')
+        parser.add_argument('--status', help='Status filter, e.g. pending, unread or active')
+        parser.add_argument('--output', '-o', help='File to write to (defaults to stdout)')
+        parser.add_argument('--chunk-size', type=int, default=exports.DEFAULT_CHUNK_SIZE, help='Rows fetched per query')
+
+    def handle(self, *args, **options):
+        name = options['export']
+        statuses = exports.EXPORTS[name]['statuses']
+        if options['status'] and options['status'] not in statuses:
+            raise CommandError(f"Unknown status for {name}; choose from: {', '.join(statuses)}")
+
+        queryset = exports.filter_queryset(name, options['since'], options['until'], options['status'])
+        chunks = exports.stream_export(name, queryset, options['format'], chunk_size=options['chunk_size'])
+
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+
+        with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Exported {name} to {options['output']}"))
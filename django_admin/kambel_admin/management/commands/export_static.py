@@ -0,0 +1,37 @@
+"""
+Management command to export the public site as static files
+"""
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from kambel_admin import static_site
+
+
+class Command(BaseCommand):
+    help = 'Render every page and public GET API, with static files and media, into a directory a static server can host'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Export directory (default: STATIC_EXPORT_DIR)')
+        parser.add_argument('--base-url', help='Public URL of the site, used for absolute media links')
+        parser.add_argument('--model', action='append', help='Only re-render the outputs built from this model')
+        parser.add_argument('--no-files', action='store_true', help="Don't sync static files and media")
+
+    def handle(self, *args, **options):
+        output = options['output'] or static_site.export_dir()
+        if not output:
+            raise CommandError('Pass --output or set STATIC_EXPORT_DIR')
+        models = None
+        if options['model']:
+            try:
+                models = [apps.get_model('kambel_admin', name) for name in options['model']]
+            except LookupError as e:
+                raise CommandError(str(e))
+
+        with override_settings(STATIC_EXPORT_BASE_URL=options['base_url'] or static_site.base_url()):
+            try:
+                written, unchanged, synced = static_site.export(output, models=models, files=not options['no_files'])
+            except static_site.ExportError as e:
+                raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f'{written} files written, {unchanged} unchanged, {synced} static/media files synced to {output}'
+        ))
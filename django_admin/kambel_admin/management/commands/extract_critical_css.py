@@ -0,0 +1,15 @@
+"""
+Management command to inline critical CSS into the root HTML pages
+"""
+from django.core.management.base import BaseCommand
+from kambel_admin import critical
+
+
+class Command(BaseCommand):
+    help = 'Write copies of the root HTML pages with their above-the-fold CSS inlined to build/critical/'
+
+    def handle(self, *args, **options):
+        results = critical.build()
+        for page, (inlined, stylesheet) in sorted(results.items()):
+            self.stdout.write(f'  {page}: {inlined:,} of {stylesheet:,} bytes inlined')
+        self.stdout.write(self.style.SUCCESS(f'Wrote {len(results)} pages to {critical.BUILD_DIR}/'))
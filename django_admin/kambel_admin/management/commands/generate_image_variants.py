@@ -0,0 +1,35 @@
+"""
+Management command to generate responsive image variants for existing uploads
+"""
+from django.core.management.base import BaseCommand
+from kambel_admin import images
+
+
+class Command(BaseCommand):
+    help = 'Generate resized WebP/JPEG variants for uploaded images that are missing or out of date'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', action='append', dest='models', choices=[m.__name__ for m in images.IMAGE_SOURCES],
+            help='Only process the given model (can be repeated)'
+        )
+        parser.add_argument('--force', action='store_true', help='Regenerate variants even if they are current')
+
+    def handle(self, *args, **options):
+        generated = skipped = failed = 0
+        for model, field_names in images.IMAGE_SOURCES.items():
+            if options['models'] and model.__name__ not in options['models']:
+                continue
+            for pk in model.objects.values_list('pk', flat=True).iterator():
+                for field_name in field_names:
+                    try:
+                        if images.process(model, pk, field_name, force=options['force']):
+                            generated += 1
+                        else:
+                            skipped += 1
+                    except Exception as e:
+                        failed += 1
+                        self.stderr.write(f'  {model.__name__} {pk}.{field_name}: {e}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated variants for {generated} images ({skipped} up to date, {failed} failed)'
+        ))
@@ -0,0 +1,39 @@
+"""
+Management command to bulk import catalog data from CSV, JSON or JSON Lines
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from kambel_admin import importers
+
+
+class Command(BaseCommand):
+    help = 'Bulk import books, categories, gallery items, masterclasses or about page items'
+
+    def add_arguments(self, parser):
+        parser.add_argument('import_name', choices=list(importers.IMPORTS), help='What the file contains')
+        parser.add_argument('path', help='CSV, JSON or JSONL file')
+        parser.add_argument('--format', choices=importers.FORMATS, help='File format (defaults to the file extension)')
+        parser.add_argument('--chunk-size', type=int, default=importers.DEFAULT_CHUNK_SIZE, help='Rows validated and written per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only, write nothing')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or importers.guess_format(options['path'])
+        start = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as f:
+                result = importers.import_rows(
+                    options['import_name'], importers.read_rows(f, fmt),
+                    chunk_size=options['chunk_size'], dry_run=options['dry_run']
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - start
+
+        for row_number, message in result.errors:
+            self.stderr.write(f'  row {row_number}: {message}')
+        prefix = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix} {result.total} rows in {elapsed:.2f}s: '
+            f'{result.created} created, {result.updated} updated, {len(result.errors)} rejected'
+        ))
@@ -0,0 +1,34 @@
+"""
+Management command to optimize the frontend's bundled favicons and images
+"""
+from django.core.management.base import BaseCommand
+from kambel_admin import assets
+
+
+class Command(BaseCommand):
+    help = 'Report duplicate static images, build icon sets and recompressed images into static/dist/ and update the built pages'
+
+    def handle(self, *args, **options):
+        duplicates, mislabelled, unreadable = assets.find_duplicate_images()
+        for names in duplicates.values():
+            self.stdout.write(f"  identical files: {', '.join(names)}")
+        for name, actual in mislabelled:
+            self.stdout.write(f'  {name} is actually a {actual} file')
+        for name in unreadable:
+            self.stdout.write(self.style.WARNING(f'  {name} is not a readable image'))
+
+        report, pages = assets.optimize_images()
+        for source, target, original, optimized in report:
+            self.stdout.write(f'  {source} -> {target} ({original:,} -> {optimized:,} bytes)')
+
+        # Built CSS/JS embed image paths, so rebuild them to pick up the new names
+        built = [source for source in assets.SOURCES if source in assets.load_manifest()]
+        if built:
+            pages += assets.build(built)[1]
+
+        before = sum(row[2] for row in report)
+        after = sum(row[3] for row in report)
+        self.stdout.write(self.style.SUCCESS(
+            f'Optimized {len(report)} images: {before:,} -> {after:,} bytes '
+            f'({before - after:,} saved), updated {len(set(pages))} pages'
+        ))
@@ -2,6 +2,7 @@
 Management command to populate default about page data
 """
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from kambel_admin.models import (
     AboutConfig, ProfessionalJourneyItem, EducationQualification,
     Achievement, SpeakingEngagement
@@ -11,6 +12,7 @@ from kambel_admin.models import (
 class Command(BaseCommand):
     help = 'Populate default about page configuration'
 
+    @transaction.atomic
     def handle(self, *args, **options):
         # Get or create AboutConfig
         about_config, created = AboutConfig.objects.get_or_create(
@@ -77,11 +79,9 @@ class Command(BaseCommand):
             }
         ]
 
-        for item_data in journey_items:
-            ProfessionalJourneyItem.objects.create(
-                about_config=about_config,
-                **item_data
-            )
+        ProfessionalJourneyItem.objects.bulk_create(
+            [ProfessionalJourneyItem(about_config=about_config, **item_data) for item_data in journey_items]
+        )
 
         # Create Education & Qualifications
         education_items = [
@@ -115,11 +115,9 @@ class Command(BaseCommand):
             }
         ]
 
-        for item_data in education_items:
-            EducationQualification.objects.create(
-                about_config=about_config,
-                **item_data
-            )
+        EducationQualification.objects.bulk_create(
+            [EducationQualification(about_config=about_config, **item_data) for item_data in education_items]
+        )
 
         # Create Achievements & Recognition
         achievements = [
@@ -153,11 +151,9 @@ class Command(BaseCommand):
             }
         ]
 
-        for item_data in achievements:
-            Achievement.objects.create(
-                about_config=about_config,
-                **item_data
-            )
+        Achievement.objects.bulk_create(
+            [Achievement(about_config=about_config, **item_data) for item_data in achievements]
+        )
 
         # Create Speaking Engagements
         speaking_items = [
@@ -191,11 +187,9 @@ class Command(BaseCommand):
             }
         ]
 
-        for item_data in speaking_items:
-            SpeakingEngagement.objects.create(
-                about_config=about_config,
-                **item_data
-            )
+        SpeakingEngagement.objects.bulk_create(
+            [SpeakingEngagement(about_config=about_config, **item_data) for item_data in speaking_items]
+        )
 
         self.stdout.write(self.style.SUCCESS('Successfully populated about page configuration with default data!'))
         self.stdout.write(self.style.SUCCESS(f'Created AboutConfig: {about_config.profile_name}'))
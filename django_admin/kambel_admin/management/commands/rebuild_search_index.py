@@ -0,0 +1,25 @@
+"""
+Management command to rebuild the full-text search index
+"""
+from django.core.management.base import BaseCommand, CommandError
+from kambel_admin import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index from the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type', action='append', dest='types', choices=list(search.SEARCH_SOURCES),
+            help='Only rebuild the given content type (can be repeated)'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows fetched and inserted per batch')
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError('Full-text search requires the SQLite database backend')
+
+        counts = search.rebuild(options['types'], batch_size=options['batch_size'])
+        for content_type, count in counts.items():
+            self.stdout.write(f'  {content_type}: {count} documents')
+        self.stdout.write(self.style.SUCCESS(f'Indexed {sum(counts.values())} documents'))
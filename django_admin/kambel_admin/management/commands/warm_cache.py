@@ -0,0 +1,25 @@
+"""
+Management command to warm the API and page caches
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from kambel_admin import warmup
+
+
+class Command(BaseCommand):
+    help = 'Request every public API, SEO entry and page so the caches are filled before visitors arrive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Warm the instance running at this URL over HTTP instead of this process')
+        parser.add_argument('--workers', type=int, help='Concurrent requests (default: WARM_UP_WORKERS)')
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        results = warmup.warm(base_url=options['url'], max_workers=options['workers'])
+        failed = {path: result for path, result in results.items() if result != 200}
+        for path, result in failed.items():
+            self.stdout.write(self.style.WARNING(f'  /{path}: {result}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Warmed {len(results) - len(failed)} of {len(results)} URLs in {time.monotonic() - start:.2f}s'
+        ))
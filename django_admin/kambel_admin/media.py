@@ -0,0 +1,185 @@
+"""
+On-demand image resizing with a disk-backed derivative cache
+
+Derivatives are produced on first request and stored under
+IMAGE_RESIZE_CACHE_DIR, named by a hash of the source file's content plus the
+requested size and format, so a changed upload never serves a stale copy and
+identical uploads share their derivatives. Only sizes listed in
+IMAGE_RESIZE_SIZES are produced. The cache is capped at
+IMAGE_RESIZE_CACHE_MAX_BYTES and evicts the least recently used files first.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils._os import safe_join
+from PIL import Image, ImageOps
+
+from . import images, storage
+
+
+# width x height; a 0 keeps the aspect ratio along that side, otherwise the
+# image is scaled and centre-cropped to exactly that box
+RESIZE_SIZES = set(getattr(settings, 'IMAGE_RESIZE_SIZES', ['150x150', '400x300', '800x600', '1200x0', '1920x0']))
+CACHE_DIR = str(getattr(settings, 'IMAGE_RESIZE_CACHE_DIR', settings.BASE_DIR / 'cache' / 'resized'))
+CACHE_MAX_BYTES = getattr(settings, 'IMAGE_RESIZE_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+
+SOURCE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.tif', '.tiff'}
+CONTENT_TYPES = {'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+
+# Hits only refresh a file's mtime (its LRU position) once per interval
+TOUCH_INTERVAL = 3600
+# Eviction trims the cache to this fraction of the cap so it doesn't run on every write
+EVICT_TO = 0.9
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_lock = threading.Lock()
+_cache_size = None
+
+
+class ResizeError(ValueError):
+    """Raised for sizes or paths the resize endpoint refuses"""
+
+
+def is_allowed(width, height):
+    return f'{width}x{height}' in RESIZE_SIZES
+
+
+def source_path(path):
+    """Absolute path of a media file that may be resized"""
+    if os.path.splitext(path)[1].lower() not in SOURCE_EXTENSIONS:
+        raise ResizeError('Not an image')
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise ResizeError('Invalid path')
+    if not os.path.isfile(full_path):
+        raise FileNotFoundError(path)
+    return full_path
+
+
+@lru_cache(maxsize=4096)
+def _content_digest(path, mtime_ns, size):
+    # mtime and size are part of the cache key, so an overwritten file is hashed again
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_digest(path):
+    relative = os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, '/')
+    if storage.is_content_addressed(relative):
+        return storage.digest_from_name(relative)
+    stat = os.stat(path)
+    return _content_digest(path, stat.st_mtime_ns, stat.st_size)
+
+
+def cache_path(digest, width, height, fmt):
+    key = hashlib.sha256(f'{digest}:{width}x{height}'.encode()).hexdigest()
+    return os.path.join(CACHE_DIR, key[:2], f'{key}.{images.VARIANT_FORMATS[fmt][1]}')
+
+
+def render(path, width, height, fmt):
+    """Encoded bytes of the resized image"""
+    with Image.open(path) as image:
+        image.load()
+        image = ImageOps.exif_transpose(image)
+    if width and height:
+        image = ImageOps.fit(image, (width, height), Image.LANCZOS)
+    else:
+        ratio = width / image.width if width else height / image.height
+        if ratio < 1:
+            image = image.resize(
+                (max(1, round(image.width * ratio)), max(1, round(image.height * ratio))), Image.LANCZOS
+            )
+    return images.encode(image, fmt)
+
+
+def _touch(path):
+    try:
+        if time.time() - os.stat(path).st_mtime > TOUCH_INTERVAL:
+            os.utime(path)
+    except OSError:
+        pass
+
+
+def _scan():
+    """(mtime, size, path) of every cached file"""
+    entries = []
+    for root, _, files in os.walk(CACHE_DIR):
+        for name in files:
+            if name.endswith('.tmp'):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+    return entries
+
+
+def evict(max_bytes=None):
+    """Delete least recently used derivatives until the cache fits; returns bytes freed"""
+    global _cache_size
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = sorted(_scan())
+    total = sum(size for _, size, _ in entries)
+    freed = 0
+    if total > max_bytes:
+        target = max_bytes * EVICT_TO
+        for _, size, path in entries:
+            if total - freed <= target:
+                break
+            try:
+                os.remove(path)
+                freed += size
+            except OSError:
+                pass
+    with _lock:
+        _cache_size = total - freed
+    return freed
+
+
+def _store(path, data):
+    global _cache_size
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename, so concurrent requests never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    with _lock:
+        if _cache_size is not None:
+            _cache_size += len(data)
+        over = _cache_size is None or _cache_size > CACHE_MAX_BYTES
+    if over:
+        evict()
+
+
+def get_derivative(path, width, height, fmt):
+    """Return (cache file path, digest) of a derivative, creating it on a miss"""
+    if not is_allowed(width, height):
+        raise ResizeError(f'Size {width}x{height} is not allowed')
+    full_path = source_path(path)
+    digest = content_digest(full_path)
+    cached = cache_path(digest, width, height, fmt)
+    if os.path.exists(cached):
+        _touch(cached)
+    else:
+        _store(cached, render(full_path, width, height, fmt))
+    return cached, f'{digest[:16]}-{width}x{height}-{fmt}'
+
+
+def preferred_format(request):
+    """WebP for clients that accept it, JPEG otherwise"""
+    if 'image/webp' in request.headers.get('Accept', '') and 'webp' in images.output_formats():
+        return 'webp'
+    return 'jpeg'
@@ -0,0 +1,66 @@
+"""
+Middleware for Kambel Consult
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import static_site, versioning
+from .json_responses import JsonResponse
+
+
+class ContentVersionMiddleware:
+    """Send the content version with every API response
+
+    The version is read before the view runs, so the data in a response is
+    never older than its header says; at worst a client syncs a change twice.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path.startswith('/api/'):
+            return self.get_response(request)
+        request.content_version, request.content_changed_at = versioning.state()
+        response = self.get_response(request)
+        response.headers.setdefault(versioning.HEADER, str(request.content_version))
+        return response
+
+
+class ApiResponseCacheMiddleware:
+    """Serve the public GET APIs from Django's cache
+
+    Entries are keyed by content version (see versioning.state()), so a
+    change to any public content moves every API to new keys and nothing
+    stale is ever served; old entries just age out after API_CACHE_TIMEOUT
+    seconds. The host is part
+    of the key because responses hold absolute media URLs. Streamed
+    responses (?stream=1) are not cached. Must come after
+    ContentVersionMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        key = getattr(request, 'api_cache_key', None)
+        if key and response.status_code == 200 and not response.streaming:
+            cache.set(key, response.content, getattr(settings, 'API_CACHE_TIMEOUT', 3600))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method != 'GET' or 'stream' in request.GET or not hasattr(request, 'content_version'):
+            return None
+        if request.resolver_match.route not in static_site.API_OUTPUTS:
+            return None
+        url = hashlib.sha256(request.build_absolute_uri().encode()).hexdigest()
+        changed_at = request.content_changed_at.timestamp() if request.content_changed_at else 0
+        request.api_cache_key = f'api:{request.content_version}:{changed_at}:{url}'
+        content = cache.get(request.api_cache_key)
+        if content is None:
+            return None
+        request.api_cache_key = None
+        return JsonResponse(content)
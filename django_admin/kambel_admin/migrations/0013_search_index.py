@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+CREATE_SEARCH_INDEX = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS kambel_admin_search USING fts5("
+    "content_type, object_id UNINDEXED, title, body, "
+    "tokenize = 'porter unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite only; other backends run without the search index
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(CREATE_SEARCH_INDEX)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS kambel_admin_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kambel_admin', '0012_alter_masterclass_price'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+# Row ids follow kambel_admin.search: object id * 16 + content type code
+INDEX_EXISTING_ROWS = [
+    "INSERT INTO kambel_admin_search (rowid, content_type, object_id, title, body) "
+    "SELECT id * 16 + 5, 'contact', id, subject, name || ' ' || email || ' ' || message "
+    "FROM kambel_admin_contactmessage",
+    "INSERT INTO kambel_admin_search (rowid, content_type, object_id, title, body) "
+    "SELECT r.id * 16 + 6, 'registration', r.id, "
+    "CASE WHEN r.masterclass_title != '' THEN r.masterclass_title ELSE COALESCE(m.title, '') END, "
+    "r.first_name || ' ' || r.last_name || ' ' || r.email || ' ' || r.phone || ' ' || r.company || ' ' || r.motivation "
+    "FROM kambel_admin_masterclassregistration r "
+    "LEFT JOIN kambel_admin_masterclass m ON m.id = r.masterclass_id",
+]
+
+
+def index_existing_rows(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in INDEX_EXISTING_ROWS:
+            schema_editor.execute(sql)
+
+
+def unindex_rows(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DELETE FROM kambel_admin_search WHERE content_type IN ('contact', 'registration')")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kambel_admin', '0013_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_existing_rows, unindex_rows),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kambel_admin', '0014_index_contact_and_registrations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aboutconfig',
+            name='profile_picture_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized WebP/JPEG versions of profile_picture'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='cover_image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized WebP/JPEG versions of cover_image'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='cover_image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized WebP/JPEG versions of cover_image'),
+        ),
+        migrations.AddField(
+            model_name='consultancyservice',
+            name='cover_image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized WebP/JPEG versions of cover_image'),
+        ),
+        migrations.AddField(
+            model_name='galleryitem',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized WebP/JPEG versions of image'),
+        ),
+        migrations.AddField(
+            model_name='heroconfig',
+            name='profile_picture_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized WebP/JPEG versions of profile_picture'),
+        ),
+        migrations.AddField(
+            model_name='masterclass',
+            name='cover_image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized WebP/JPEG versions of cover_image'),
+        ),
+    ]
@@ -0,0 +1,118 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kambel_admin', '0015_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aboutconfig',
+            name='profile_picture_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='aboutconfig',
+            name='profile_picture_placeholder',
+            field=models.TextField(blank=True, editable=False, help_text='Tiny blurred preview of profile_picture as a data URI'),
+        ),
+        migrations.AddField(
+            model_name='aboutconfig',
+            name='profile_picture_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='cover_image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='cover_image_placeholder',
+            field=models.TextField(blank=True, editable=False, help_text='Tiny blurred preview of cover_image as a data URI'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='cover_image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='cover_image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='cover_image_placeholder',
+            field=models.TextField(blank=True, editable=False, help_text='Tiny blurred preview of cover_image as a data URI'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='cover_image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='consultancyservice',
+            name='cover_image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='consultancyservice',
+            name='cover_image_placeholder',
+            field=models.TextField(blank=True, editable=False, help_text='Tiny blurred preview of cover_image as a data URI'),
+        ),
+        migrations.AddField(
+            model_name='consultancyservice',
+            name='cover_image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='galleryitem',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='galleryitem',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False, help_text='Tiny blurred preview of image as a data URI'),
+        ),
+        migrations.AddField(
+            model_name='galleryitem',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='heroconfig',
+            name='profile_picture_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='heroconfig',
+            name='profile_picture_placeholder',
+            field=models.TextField(blank=True, editable=False, help_text='Tiny blurred preview of profile_picture as a data URI'),
+        ),
+        migrations.AddField(
+            model_name='heroconfig',
+            name='profile_picture_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='masterclass',
+            name='cover_image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='masterclass',
+            name='cover_image_placeholder',
+            field=models.TextField(blank=True, editable=False, help_text='Tiny blurred preview of cover_image as a data URI'),
+        ),
+        migrations.AddField(
+            model_name='masterclass',
+            name='cover_image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
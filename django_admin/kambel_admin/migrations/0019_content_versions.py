@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:57
+
+from django.db import migrations, models
+
+
+def create_counter(apps, schema_editor):
+    apps.get_model('kambel_admin', 'ContentVersion').objects.create(pk=1, value=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kambel_admin', '0018_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Content Version',
+                'verbose_name_plural': 'Content Version',
+            },
+        ),
+        migrations.CreateModel(
+            name='ContentChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(help_text='Model name, e.g. book', max_length=50)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('version', models.PositiveBigIntegerField(db_index=True, help_text='Content version of the change')),
+                ('deleted', models.BooleanField(default=False)),
+            ],
+            options={
+                'verbose_name': 'Content Change',
+                'verbose_name_plural': 'Content Changes',
+                'ordering': ['version'],
+                'unique_together': {('model', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_counter, migrations.RunPython.noop),
+    ]
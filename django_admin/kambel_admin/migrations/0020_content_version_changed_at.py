@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kambel_admin', '0019_content_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contentversion',
+            name='changed_at',
+            field=models.DateTimeField(blank=True, help_text='When value last changed', null=True),
+        ),
+    ]
@@ -1,10 +1,14 @@
 """
 Models for Kambel Consult Admin Panel
 """
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from .querycache import QueryCacheManager
+
 
 class Category(models.Model):
     """Publication categories"""
@@ -13,6 +17,8 @@ class Category(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = QueryCacheManager()
+    
     class Meta:
         verbose_name_plural = "Categories"
         ordering = ['name']
@@ -30,6 +36,10 @@ class Book(models.Model):
     pages = models.PositiveIntegerField(default=0)
     price = models.DecimalField(max_digits=8, decimal_places=2, default=0)
     cover_image = models.ImageField(upload_to='publications/covers/', blank=True, null=True)
+    cover_image_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized WebP/JPEG versions of cover_image")
+    cover_image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    cover_image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    cover_image_placeholder = models.TextField(blank=True, editable=False, help_text="Tiny blurred preview of cover_image as a data URI")
     purchase_link = models.URLField(blank=True, null=True, help_text="Link to external bookstore (Amazon, etc.)")
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -55,6 +65,10 @@ class ConsultancyService(models.Model):
     service_type = models.CharField(max_length=100, choices=SERVICE_TYPES)
     description = models.TextField()
     cover_image = models.ImageField(upload_to='consultancy/covers/', blank=True, null=True, help_text="Upload a cover image for this consultancy service")
+    cover_image_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized WebP/JPEG versions of cover_image")
+    cover_image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    cover_image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    cover_image_placeholder = models.TextField(blank=True, editable=False, help_text="Tiny blurred preview of cover_image as a data URI")
     icon = models.CharField(max_length=100, default='fas fa-briefcase')
     is_active = models.BooleanField(default=True)
     order = models.PositiveIntegerField(default=0)
@@ -91,6 +105,10 @@ class BlogPost(models.Model):
     excerpt = models.TextField(blank=True)
     author = models.CharField(max_length=100, default="Kambel Team")
     cover_image = models.ImageField(upload_to='blog/covers/', blank=True, null=True)
+    cover_image_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized WebP/JPEG versions of cover_image")
+    cover_image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    cover_image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    cover_image_placeholder = models.TextField(blank=True, editable=False, help_text="Tiny blurred preview of cover_image as a data URI")
     is_published = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -144,6 +162,8 @@ class SiteConfig(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = QueryCacheManager()
+    
     class Meta:
         verbose_name = "Site Configuration"
         verbose_name_plural = "Site Configuration"
@@ -161,6 +181,10 @@ class HeroConfig(models.Model):
     profile_name = models.CharField(max_length=100, default="Moses Agbesi Katamani")
     profile_title = models.CharField(max_length=100, default="Chief Executive Officer")
     profile_picture = models.ImageField(upload_to='hero/', blank=True, null=True, help_text="CEO Profile Picture")
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized WebP/JPEG versions of profile_picture")
+    profile_picture_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    profile_picture_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    profile_picture_placeholder = models.TextField(blank=True, editable=False, help_text="Tiny blurred preview of profile_picture as a data URI")
     
     # Credentials/Stats
     years_experience = models.CharField(max_length=50, default="15+", help_text="e.g., '15+' or '15 Years'")
@@ -179,6 +203,8 @@ class HeroConfig(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = QueryCacheManager()
+    
     class Meta:
         verbose_name = "Hero Configuration"
         verbose_name_plural = "Hero Configuration"
@@ -199,6 +225,10 @@ class AboutConfig(models.Model):
     profile_name = models.CharField(max_length=100, default="Moses Agbesi Katamani")
     profile_title = models.CharField(max_length=100, default="Founder & CEO, Kambel Consult")
     profile_picture = models.ImageField(upload_to='about/', blank=True, null=True, help_text="Profile picture for about page")
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized WebP/JPEG versions of profile_picture")
+    profile_picture_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    profile_picture_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    profile_picture_placeholder = models.TextField(blank=True, editable=False, help_text="Tiny blurred preview of profile_picture as a data URI")
     bio_summary = models.TextField(default="A visionary leader and expert consultant with over 15 years of experience in education, career development, and business advisory services. Moses is dedicated to empowering individuals and organizations to achieve their full potential through strategic guidance and innovative solutions.")
     
     # Tags/Badges
@@ -215,6 +245,8 @@ class AboutConfig(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = QueryCacheManager()
+    
     class Meta:
         verbose_name = "About Page Configuration"
         verbose_name_plural = "About Page Configuration"
@@ -314,6 +346,8 @@ class PrivacyPolicy(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = QueryCacheManager()
+    
     class Meta:
         verbose_name = "Privacy Policy"
         verbose_name_plural = "Privacy Policy"
@@ -341,6 +375,8 @@ class TermsConditions(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = QueryCacheManager()
+    
     class Meta:
         verbose_name = "Terms & Conditions"
         verbose_name_plural = "Terms & Conditions"
@@ -369,12 +405,18 @@ class Masterclass(models.Model):
     total_seats = models.PositiveIntegerField(default=30)
     seats_available = models.PositiveIntegerField(default=30)
     cover_image = models.ImageField(upload_to='masterclasses/covers/', blank=True, null=True, help_text="Upload a cover image for this masterclass")
+    cover_image_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized WebP/JPEG versions of cover_image")
+    cover_image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    cover_image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    cover_image_placeholder = models.TextField(blank=True, editable=False, help_text="Tiny blurred preview of cover_image as a data URI")
     video_url = models.URLField(blank=True, null=True, help_text="YouTube or video URL")
     is_upcoming = models.BooleanField(default=True, help_text="Mark as upcoming masterclass")
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = QueryCacheManager()
+    
     class Meta:
         ordering = ['-date', 'title']
         verbose_name_plural = "Masterclasses"
@@ -402,6 +444,8 @@ class SocialMediaLink(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = QueryCacheManager()
+    
     class Meta:
         ordering = ['order', 'platform']
         verbose_name = "Social Media Link"
@@ -438,6 +482,10 @@ class GalleryItem(models.Model):
     description = models.TextField(blank=True, help_text="Detailed description or additional information")
     media_type = models.CharField(max_length=10, choices=MEDIA_TYPE_CHOICES, default='image')
     image = models.ImageField(upload_to='gallery/images/', blank=True, null=True, help_text="Upload image for image type")
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized WebP/JPEG versions of image")
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_placeholder = models.TextField(blank=True, editable=False, help_text="Tiny blurred preview of image as a data URI")
     video_url = models.URLField(blank=True, help_text="Video URL (YouTube, Vimeo, etc.) for video type")
     video_file = models.FileField(upload_to='gallery/videos/', blank=True, null=True, help_text="Or upload video file")
     thumbnail = models.ImageField(upload_to='gallery/thumbnails/', blank=True, null=True, help_text="Custom thumbnail (optional)")
@@ -504,3 +552,72 @@ class MasterclassRegistration(models.Model):
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
+
+
+class MediaBlob(models.Model):
+    """A content-addressed media file and the number of rows that use it"""
+    name = models.CharField(max_length=255, unique=True, help_text="Storage path, e.g. objects/ab/cd/<sha256>.jpg")
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0, help_text="Rows referencing this file")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Media File"
+        verbose_name_plural = "Media Files"
+    
+    def __str__(self):
+        return self.name
+
+
+class UploadSession(models.Model):
+    """A resumable chunked upload; chunks are written straight into a file on disk"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    target = models.CharField(max_length=50, help_text="Field the file is uploaded for, e.g. gallery.video_file")
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True, help_text="Expected digest of the whole file, if the client sent one")
+    stored_name = models.CharField(max_length=255, blank=True, help_text="Storage name once the upload is complete")
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Upload Session"
+        verbose_name_plural = "Upload Sessions"
+    
+    def __str__(self):
+        return f"{self.filename} ({self.id})"
+
+
+class ContentVersion(models.Model):
+    """Single row counting every change to public content; see versioning.py"""
+    value = models.PositiveBigIntegerField(default=0)
+    changed_at = models.DateTimeField(null=True, blank=True, help_text="When value last changed")
+    
+    class Meta:
+        verbose_name = "Content Version"
+        verbose_name_plural = "Content Version"
+    
+    def __str__(self):
+        return str(self.value)
+
+
+class ContentChange(models.Model):
+    """The latest change to a public object, kept after deletes so clients can sync deltas"""
+    model = models.CharField(max_length=50, help_text="Model name, e.g. book")
+    object_id = models.PositiveBigIntegerField()
+    version = models.PositiveBigIntegerField(db_index=True, help_text="Content version of the change")
+    deleted = models.BooleanField(default=False)
+    
+    class Meta:
+        ordering = ['version']
+        unique_together = ['model', 'object_id']
+        verbose_name = "Content Change"
+        verbose_name_plural = "Content Changes"
+    
+    def __str__(self):
+        return f"{self.model} {self.object_id} @ {self.version}"
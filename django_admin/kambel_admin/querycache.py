@@ -0,0 +1,212 @@
+"""
+Query result cache
+
+Models opt in by using QueryCacheManager as their manager. Their querysets
+then keep the results of evaluation, exists() and count() in a per-process
+LRU keyed by the compiled SQL, its parameters and the generation of every
+table the SQL reads, so repeated lookups such as
+Masterclass.objects.filter(is_upcoming=True, is_active=True) or the admin's
+singleton checks don't run the same query again.
+
+Every write statement bumps the generation of the table it writes to, which
+retires the cached results of every query reading that table, whatever model
+or manager made the write: save(), delete(), update(), bulk operations and
+raw SQL alike. Generations are kept in the default cache, so a write in one
+worker process retires the results cached by all of them. Inside an atomic
+block writes bump on commit and nothing is cached or served from the cache,
+since the block may see rows others don't, or roll back; a rollback leaves
+the generations alone as nothing changed.
+
+Results are stored pickled, so callers get their own copies to modify, and
+the LRU is bounded to QUERY_CACHE_MAX_BYTES (0 turns caching off). stats()
+reports this process's hits and misses.
+"""
+import pickle
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, models, transaction
+from django.db.models.query import FlatValuesListIterable, ModelIterable, NamedValuesListIterable, ValuesIterable, ValuesListIterable
+
+
+CACHEABLE_ITERABLES = (ModelIterable, ValuesIterable, ValuesListIterable, FlatValuesListIterable, NamedValuesListIterable)
+
+READ_TABLES = re.compile(r'\b(?:FROM|JOIN)\s+["`]?(\w+)', re.IGNORECASE)
+WRITE_TABLE = re.compile(
+    r'^\s*(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM|'
+    r'(?:ALTER|DROP)\s+TABLE(?:\s+IF\s+EXISTS)?|TRUNCATE(?:\s+TABLE)?)\s+["`]?(\w+)',
+    re.IGNORECASE
+)
+
+_MISSING = object()
+
+
+def max_bytes():
+    return getattr(settings, 'QUERY_CACHE_MAX_BYTES', 16 * 1024 * 1024)
+
+
+def _generation_key(alias, table):
+    return f'querycache:{alias}:{table}'
+
+
+def generations(alias, tables):
+    """Current generation of each table, in the order given"""
+    keys = [_generation_key(alias, table) for table in tables]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # Start from the clock rather than 0, so a cleared cache can't bring back old generations
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+    return tuple(found[key] for key in keys)
+
+
+def bump(alias, tables):
+    """Retire the cached results of every query reading tables"""
+    for table in tables:
+        key = _generation_key(alias, table)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+    _results.count('invalidations', len(tables))
+
+
+def track_writes(execute, sql, params, many, context):
+    """Execute wrapper bumping the tables a statement writes to"""
+    result = execute(sql, params, many, context)
+    match = WRITE_TABLE.match(sql)
+    if match:
+        connection = context['connection']
+        tables = (match.group(1),)
+        if not connection.in_atomic_block:
+            bump(connection.alias, tables)
+        elif not any(getattr(func, 'query_cache_tables', None) == tables for _, func, _ in connection.run_on_commit):
+            on_commit = partial(bump, connection.alias, tables)
+            on_commit.query_cache_tables = tables
+            transaction.on_commit(on_commit, using=connection.alias)
+    return result
+
+
+def install(connection, **kwargs):
+    """connection_created handler wrapping every statement in track_writes"""
+    if track_writes not in connection.execute_wrappers:
+        connection.execute_wrappers.append(track_writes)
+
+
+class ResultCache:
+    """Byte-bounded LRU of pickled results, with hit and miss counts"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._stats = {'hits': 0, 'misses': 0, 'bypassed': 0, 'evictions': 0, 'invalidations': 0}
+        self._lock = threading.Lock()
+
+    def count(self, stat, n=1):
+        with self._lock:
+            self._stats[stat] += n
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self._stats['misses'] += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+        return pickle.loads(data)
+
+    def set(self, key, value, limit):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(data) > limit:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            self._bytes += len(data) - (len(old) if old is not None else 0)
+            self._entries[key] = data
+            while self._bytes > limit:
+                _, dropped = self._entries.popitem(last=False)
+                self._bytes -= len(dropped)
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._entries), bytes=self._bytes)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else None
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = dict.fromkeys(self._stats, 0)
+
+
+_results = ResultCache()
+
+
+def stats():
+    """{'hits', 'misses', 'bypassed', 'evictions', 'invalidations', 'entries', 'bytes', 'hit_rate'} in this process"""
+    return _results.stats()
+
+
+def clear():
+    _results.clear()
+    _results.reset_stats()
+
+
+class CachingQuerySet(models.QuerySet):
+    def _cache_key(self, kind):
+        """Key of this queryset's kind of result, or None when it mustn't be cached"""
+        connection = connections[self.db]
+        if (not max_bytes() or connection.in_atomic_block or self.query.select_for_update
+                or self._known_related_objects or not issubclass(self._iterable_class, CACHEABLE_ITERABLES)):
+            _results.count('bypassed')
+            return None
+        try:
+            sql, params = self.query.get_compiler(self.db).as_sql()
+        except Exception:
+            # Queries that can't match anything or can't be compiled; evaluation deals with them
+            _results.count('bypassed')
+            return None
+        tables = sorted(set(READ_TABLES.findall(sql)))
+        return (kind, self.db, self._iterable_class.__name__, sql, tuple(params), generations(self.db, tables))
+
+    def _cached(self, kind, compute):
+        key = self._cache_key(kind)
+        if key is None:
+            return compute()
+        result = _results.get(key)
+        if result is _MISSING:
+            result = compute()
+            _results.set(key, result, max_bytes())
+        return result
+
+    def _fetch_all(self):
+        if self._result_cache is None:
+            self._result_cache = self._cached('rows', lambda: list(self._iterable_class(self)))
+        super()._fetch_all()
+
+    def exists(self):
+        if self._result_cache is not None:
+            return bool(self._result_cache)
+        return self._cached('exists', super().exists)
+
+    def count(self):
+        if self._result_cache is not None:
+            return len(self._result_cache)
+        return self._cached('count', super().count)
+
+
+class QueryCacheManager(models.Manager.from_queryset(CachingQuerySet)):
+    """Manager whose querysets cache their results; using it opts a model in"""
@@ -0,0 +1,231 @@
+"""
+Full-text search index for Kambel Consult content
+
+Documents live in an SQLite FTS5 virtual table. Rows are kept in sync by the
+model signals in signals.py and can be rebuilt in bulk with the
+rebuild_search_index management command.
+"""
+import html
+import re
+
+from django.db import connection, transaction
+from django.utils.html import strip_tags
+
+from .models import Book, BlogPost, ConsultancyService, ContactMessage, Masterclass, MasterclassRegistration
+
+
+SEARCH_TABLE = 'kambel_admin_search'
+
+# Row ids are derived from (object id, content type code) so a single document
+# can be replaced or removed through the rowid index instead of a table scan.
+ROWID_STRIDE = 16
+
+SNIPPET_START = '\x02'
+SNIPPET_END = '\x03'
+
+
+def _book_document(book):
+    category = book.category.name if book.category else ''
+    return book.title, ' '.join([book.author, category, book.description])
+
+
+def _blog_document(post):
+    return post.title, ' '.join([post.author, post.excerpt, strip_tags(post.content)])
+
+
+def _masterclass_document(mc):
+    return mc.title, ' '.join([mc.instructor, mc.duration, mc.description])
+
+
+def _consultancy_document(service):
+    features = ' '.join(
+        f'{feature.title} {feature.description}' for feature in service.features.all() if feature.is_active
+    )
+    return service.name, ' '.join([service.get_service_type_display(), service.description, features])
+
+
+def _contact_document(message):
+    return message.subject, ' '.join([message.name, message.email, message.message])
+
+
+def _registration_document(registration):
+    masterclass_title = registration.masterclass_title or (
+        registration.masterclass.title if registration.masterclass else ''
+    )
+    return masterclass_title, ' '.join([
+        registration.first_name, registration.last_name, registration.email, registration.phone,
+        registration.company, registration.motivation
+    ])
+
+
+SEARCH_SOURCES = {
+    'book': {
+        'code': 1,
+        'model': Book,
+        'queryset': lambda: Book.objects.filter(is_active=True).select_related('category'),
+        'document': _book_document,
+    },
+    'blog': {
+        'code': 2,
+        'model': BlogPost,
+        'queryset': lambda: BlogPost.objects.filter(is_published=True),
+        'document': _blog_document,
+    },
+    'masterclass': {
+        'code': 3,
+        'model': Masterclass,
+        'queryset': lambda: Masterclass.objects.filter(is_active=True),
+        'document': _masterclass_document,
+    },
+    'consultancy': {
+        'code': 4,
+        'model': ConsultancyService,
+        'queryset': lambda: ConsultancyService.objects.filter(is_active=True).prefetch_related('features'),
+        'document': _consultancy_document,
+    },
+    # Admin-only sources, never exposed through the public search API
+    'contact': {
+        'code': 5,
+        'model': ContactMessage,
+        'queryset': lambda: ContactMessage.objects.all(),
+        'document': _contact_document,
+    },
+    'registration': {
+        'code': 6,
+        'model': MasterclassRegistration,
+        'queryset': lambda: MasterclassRegistration.objects.select_related('masterclass'),
+        'document': _registration_document,
+    },
+}
+
+PUBLIC_TYPES = ['book', 'blog', 'masterclass', 'consultancy']
+
+
+def is_available():
+    """Full-text search needs SQLite with the FTS5 extension"""
+    return connection.vendor == 'sqlite'
+
+
+def source_for_model(model):
+    """Return (content_type, source) for a model class, or (None, None)"""
+    for content_type, source in SEARCH_SOURCES.items():
+        if source['model'] is model:
+            return content_type, source
+    return None, None
+
+
+def make_rowid(content_type, object_id):
+    return object_id * ROWID_STRIDE + SEARCH_SOURCES[content_type]['code']
+
+
+def _document_row(content_type, obj):
+    title, body = SEARCH_SOURCES[content_type]['document'](obj)
+    return (make_rowid(content_type, obj.pk), content_type, obj.pk, title, body)
+
+
+def index_object(content_type, object_id):
+    """Add, refresh or drop a single document depending on its visibility"""
+    source = SEARCH_SOURCES[content_type]
+    obj = source['queryset']().filter(pk=object_id).first()
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [make_rowid(content_type, object_id)])
+        if obj is not None:
+            cursor.execute(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, content_type, object_id, title, body) VALUES (%s, %s, %s, %s, %s)',
+                _document_row(content_type, obj)
+            )
+
+
+def remove_object(content_type, object_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [make_rowid(content_type, object_id)])
+
+
+def insert_rows(cursor, rows):
+    """Bulk insert (rowid, content_type, object_id, title, body) tuples"""
+    cursor.executemany(
+        f'INSERT INTO {SEARCH_TABLE} (rowid, content_type, object_id, title, body) VALUES (%s, %s, %s, %s, %s)',
+        rows
+    )
+
+
+def rebuild(content_types=None, batch_size=1000):
+    """Rebuild the index from scratch and return the number of documents per type"""
+    content_types = content_types or list(SEARCH_SOURCES)
+    counts = {}
+    with transaction.atomic(), connection.cursor() as cursor:
+        for content_type in content_types:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE content_type = %s', [content_type])
+            batch = []
+            counts[content_type] = 0
+            for obj in SEARCH_SOURCES[content_type]['queryset']().iterator(chunk_size=batch_size):
+                batch.append(_document_row(content_type, obj))
+                if len(batch) >= batch_size:
+                    insert_rows(cursor, batch)
+                    counts[content_type] += len(batch)
+                    batch = []
+            if batch:
+                insert_rows(cursor, batch)
+                counts[content_type] += len(batch)
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+    return counts
+
+
+def build_match_query(query, content_types=None, prefix=True):
+    """Turn free text into an FTS5 MATCH expression of quoted (prefix) terms
+
+    User terms only match the title and body columns; the content type filter
+    goes through the index on the content_type column.
+    """
+    terms = re.findall(r'\w+', query.lower())
+    if not terms:
+        return ''
+    suffix = '*' if prefix else ''
+    match = '{title body} : (' + ' '.join(f'"{term}"{suffix}' for term in terms) + ')'
+    if content_types:
+        match += ' AND content_type : (' + ' OR '.join(f'"{t}"' for t in content_types) + ')'
+    return match
+
+
+def matching_ids_sql(query, content_type):
+    """(sql, params) selecting object ids that match query, for use in pk__in filters"""
+    match = build_match_query(query, [content_type])
+    if not match:
+        return None
+    return f'SELECT object_id FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s', [match]
+
+
+def _format_snippet(snippet):
+    # Escape the indexed text first, then turn the markers into <mark> tags
+    return html.escape(snippet).replace(SNIPPET_START, '<mark>').replace(SNIPPET_END, '</mark>')
+
+
+def search(query, content_types=None, limit=20, offset=0, prefix=True):
+    """Ranked search returning {'count': int, 'results': [...]}"""
+    match = build_match_query(query, content_types, prefix=prefix)
+    if not match:
+        return {'count': 0, 'results': []}
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT count(*) FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s', [match])
+        count = cursor.fetchone()[0]
+        cursor.execute(
+            f"SELECT content_type, object_id, title, "
+            f"snippet({SEARCH_TABLE}, -1, '{SNIPPET_START}', '{SNIPPET_END}', '...', 16), "
+            f"bm25({SEARCH_TABLE}, 0.0, 0.0, 10.0, 1.0) AS rank "
+            f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s ORDER BY rank LIMIT %s OFFSET %s",
+            [match, limit, offset]
+        )
+        rows = cursor.fetchall()
+
+    results = [
+        {
+            'type': content_type,
+            'id': object_id,
+            'title': title,
+            'snippet': _format_snippet(snippet),
+            'score': round(-rank, 4),
+        }
+        for content_type, object_id, title, snippet, rank in rows
+    ]
+    return {'count': count, 'results': results}
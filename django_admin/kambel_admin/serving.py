@@ -0,0 +1,241 @@
+"""
+File responses with HTTP range support
+
+Single ranges are returned as a FileResponse over a window of the file, so a
+WSGI server with a file_wrapper (gunicorn, uWSGI) can send them with
+os.sendfile without the bytes passing through Python. Multiple ranges are
+streamed as multipart/byteranges. Large responses count against a per-client
+limit on concurrent streams so one visitor scrubbing through several videos
+can't hold every worker.
+"""
+import os
+import re
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.crypto import get_random_string
+from django.utils.http import http_date
+
+
+BLOCK_SIZE = 64 * 1024
+# More ranges than this in one request are treated as abuse and answered with the whole file
+MAX_RANGES = 16
+MAX_STREAMS_PER_CLIENT = getattr(settings, 'MEDIA_MAX_STREAMS_PER_CLIENT', 4)
+# Only responses at least this large count as streams
+STREAM_MIN_BYTES = getattr(settings, 'MEDIA_STREAM_MIN_BYTES', 1024 * 1024)
+
+RANGE_RE = re.compile(r'^\s*(\d*)\s*-\s*(\d*)\s*$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """Sorted, merged [(start, end)] inclusive byte ranges, or None to send the whole file
+
+    Raises RangeNotSatisfiable when the header is valid but no range
+    overlaps the file.
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    specs = header[len('bytes='):].split(',')
+    if len(specs) > MAX_RANGES:
+        return None
+    ranges = []
+    for spec in specs:
+        match = RANGE_RE.match(spec)
+        if not match or match.groups() == ('', ''):
+            return None
+        first, last = match.groups()
+        if first == '':
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length == 0:
+                continue
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+            if last and int(last) < start:
+                return None
+            if start >= size:
+                continue
+        ranges.append((start, end))
+    if not ranges:
+        raise RangeNotSatisfiable
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        if start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class StreamLimiter:
+    """Counts open streams per client"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.counts = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def acquire(self, client):
+        with self.lock:
+            if self.counts[client] >= self.limit:
+                return False
+            self.counts[client] += 1
+            return True
+
+    def release(self, client):
+        with self.lock:
+            self.counts[client] -= 1
+            if self.counts[client] <= 0:
+                del self.counts[client]
+
+
+limiter = StreamLimiter(MAX_STREAMS_PER_CLIENT)
+
+
+class FileWindow:
+    """Read-only view of bytes [start, start + length) of an open file
+
+    The underlying file is positioned at start, and fileno() is exposed, so
+    sendfile-based file wrappers send exactly Content-Length bytes from there.
+    """
+
+    def __init__(self, file, start, length, on_close=None):
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+        self.on_close = on_close
+        file.seek(start)
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+        if self.on_close:
+            on_close, self.on_close = self.on_close, None
+            on_close()
+
+
+def _multipart(file, ranges, size, content_type, boundary, on_close):
+    try:
+        for start, end in ranges:
+            yield (
+                f'\r\n--{boundary}\r\nContent-Type: {content_type}\r\n'
+                f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n'
+            ).encode()
+            file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                data = file.read(min(BLOCK_SIZE, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
+        yield f'\r\n--{boundary}--\r\n'.encode()
+    finally:
+        file.close()
+        if on_close:
+            on_close()
+
+
+def _multipart_length(ranges, size, content_type, boundary):
+    length = len(f'\r\n--{boundary}--\r\n')
+    for start, end in ranges:
+        length += len(
+            f'\r\n--{boundary}\r\nContent-Type: {content_type}\r\n'
+            f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n'
+        ) + end - start + 1
+    return length
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        # Only a strong, exact match allows a partial response
+        return if_range == etag
+    return if_range == last_modified
+
+
+def client_key(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def file_response(request, path, content_type, etag, cache_control=None):
+    """GET response for a file on disk, honouring If-None-Match, Range and If-Range"""
+    stat = os.stat(path)
+    size = stat.st_size
+    last_modified = http_date(stat.st_mtime)
+
+    def finish(response):
+        response['ETag'] = etag
+        response['Accept-Ranges'] = 'bytes'
+        if cache_control:
+            response['Cache-Control'] = cache_control
+        return response
+
+    if etag in request.headers.get('If-None-Match', ''):
+        return finish(HttpResponseNotModified())
+
+    ranges = None
+    if _if_range_matches(request, etag, last_modified):
+        try:
+            ranges = parse_range(request.headers.get('Range'), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return finish(response)
+
+    body_length = size if ranges is None else sum(end - start + 1 for start, end in ranges)
+    on_close = None
+    if body_length >= STREAM_MIN_BYTES:
+        client = client_key(request)
+        if not limiter.acquire(client):
+            response = HttpResponse('Too many concurrent downloads', status=429, content_type='text/plain')
+            response['Retry-After'] = '1'
+            return response
+        on_close = lambda: limiter.release(client)  # noqa: E731
+
+    try:
+        file = open(path, 'rb')
+    except OSError:
+        if on_close:
+            on_close()
+        raise
+
+    if ranges is not None and len(ranges) > 1:
+        boundary = get_random_string(24)
+        response = StreamingHttpResponse(
+            _multipart(file, ranges, size, content_type, boundary, on_close),
+            status=206,
+            content_type=f'multipart/byteranges; boundary={boundary}',
+        )
+        response['Content-Length'] = _multipart_length(ranges, size, content_type, boundary)
+    else:
+        start, end = ranges[0] if ranges else (0, size - 1)
+        response = FileResponse(FileWindow(file, start, end - start + 1, on_close), content_type=content_type)
+        response.block_size = BLOCK_SIZE
+        response['Content-Length'] = end - start + 1
+        if ranges:
+            response.status_code = 206
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Last-Modified'] = last_modified
+    return finish(response)
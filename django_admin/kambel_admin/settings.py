@@ -12,7 +12,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-kambel-consult-admin-2024-secret-key'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('DJANGO_DEBUG', 'True') == 'True'
 
 ALLOWED_HOSTS = ['localhost', '127.0.0.1', '0.0.0.0']
 
@@ -31,6 +31,8 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'kambel_admin.middleware.ContentVersionMiddleware',
+    'kambel_admin.middleware.ApiResponseCacheMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -91,15 +93,24 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Repository root holding the frontend HTML pages and their static/ directory
+FRONTEND_DIR = BASE_DIR.parent
+
 # Static files from root directory (for frontend assets)
 STATICFILES_DIRS = [
-    BASE_DIR.parent.parent / 'static',  # Root static directory
+    FRONTEND_DIR / 'static',  # Root static directory
 ]
 
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads are stored under their content hash (see kambel_admin/storage.py)
+STORAGES = {
+    'default': {'BACKEND': 'kambel_admin.storage.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -107,3 +118,73 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 ADMIN_SITE_HEADER = "Kambel Consult Admin"
 ADMIN_SITE_TITLE = "Kambel Consult Admin Panel"
 ADMIN_INDEX_TITLE = "Welcome to Kambel Consult Administration"
+
+# Typeahead suggestions: cap on in-memory prefix entries per process and the
+# age (seconds) after which the index is rebuilt in the background
+SUGGEST_MAX_ENTRIES = 100000
+SUGGEST_MAX_AGE = 300
+
+# Seconds that admin changelist row counts are cached for
+ADMIN_COUNT_CACHE_TIMEOUT = 60
+
+# Responsive image variants: widths (px) generated for each uploaded image and
+# the number of background threads that generate them
+IMAGE_VARIANT_WIDTHS = [320, 640, 1024, 1600]
+IMAGE_VARIANT_WORKERS = 2
+
+# On-demand resizing (/media/resize/<w>x<h>/<path>): allowed sizes (0 keeps
+# the aspect ratio along that side), where derivatives are cached, and the
+# cache size above which the least recently used derivatives are evicted
+IMAGE_RESIZE_SIZES = ['150x150', '300x300', '400x300', '600x400', '800x600', '1200x0', '1920x0']
+IMAGE_RESIZE_CACHE_DIR = BASE_DIR / 'cache' / 'resized'
+IMAGE_RESIZE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Media responses of at least MEDIA_STREAM_MIN_BYTES count as streams; each
+# client may hold this many open at once per worker process
+MEDIA_MAX_STREAMS_PER_CLIENT = 4
+MEDIA_STREAM_MIN_BYTES = 1024 * 1024
+
+# Resumable chunked uploads (/api/uploads/): where partial uploads are kept,
+# the largest accepted file, and seconds after which idle sessions are purged
+CHUNKED_UPLOAD_DIR = BASE_DIR / 'cache' / 'uploads'
+CHUNKED_UPLOAD_MAX_BYTES = 2 * 1024 * 1024 * 1024
+CHUNKED_UPLOAD_EXPIRY = 24 * 3600
+
+# Static export (manage.py export_static): where the site is exported to and
+# its public URL. With a directory set, saves in the admin re-render the
+# affected API files in the background.
+STATIC_EXPORT_DIR = None
+STATIC_EXPORT_BASE_URL = 'http://localhost:8000'
+
+# Cache invalidation push (see invalidation.py): URLs that get an event after
+# every change to public content, e.g. the Flask proxy's
+# 'http://localhost:5001/internal/cache/invalidate', and the token sent with
+# them. Unless the token is set here (to the proxy's CACHE_INVALIDATION_TOKEN),
+# it is read from the file the proxy reads it from
+CACHE_INVALIDATION_URLS = []
+CACHE_INVALIDATION_TOKEN = ''
+CACHE_INVALIDATION_TOKEN_FILE = BASE_DIR.parent / 'cache' / 'invalidation.token'
+
+# Public GET API responses are cached in the default cache for this many
+# seconds; keys carry the content version, so changes show up immediately
+API_CACHE_TIMEOUT = 3600
+
+# Cache warm-up (manage.py warm_cache, see warmup.py): whether each worker
+# warms up when it starts (and reports not ready at /api/ready/ until done),
+# and how many requests it makes at once
+WARM_UP_ON_BOOT = False
+WARM_UP_WORKERS = 8
+
+# Default cache: a SQLite file shared by every worker process on this
+# machine (see sqlite_cache.py), bounded to MAX_BYTES of values
+CACHES = {
+    'default': {
+        'BACKEND': 'kambel_admin.cache_backends.SQLiteCache',
+        'LOCATION': BASE_DIR / 'cache' / 'default.sqlite3',
+        'OPTIONS': {'MAX_BYTES': 256 * 1024 * 1024},
+    }
+}
+
+# Query result cache for models using querycache.QueryCacheManager: bytes of
+# pickled results each process keeps (0 turns it off)
+QUERY_CACHE_MAX_BYTES = 16 * 1024 * 1024
@@ -0,0 +1,38 @@
+"""
+Secrets shared by the Django admin and the Flask proxy
+
+A secret both sides need, such as the cache invalidation token, is generated
+by whichever side asks for it first and written to a file only its owner can
+read; the other side reads the same file. Where the two run on different
+machines, set the secret in both configurations instead. Nothing here needs
+Django, so the Flask proxy imports it too.
+"""
+import os
+import secrets
+
+
+def load_or_create(path):
+    """The secret stored at path, generated and stored first if there is none"""
+    try:
+        with open(path) as f:
+            secret = f.read().strip()
+        if secret:
+            return secret
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Written in full under a temporary name and linked into place, so the
+    # other side never reads a partial file and the first secret linked wins
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(secrets.token_urlsafe(32))
+        try:
+            os.link(tmp_path, path)
+        except FileExistsError:
+            pass
+    finally:
+        os.remove(tmp_path)
+    with open(path) as f:
+        return f.read().strip()
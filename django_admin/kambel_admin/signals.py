@@ -0,0 +1,164 @@
+"""
+Signal handlers for Kambel Consult models
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import FileField
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_init, post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import images, invalidation, querycache, search, static_site, storage, suggest, versioning
+from .models import ServiceFeature
+
+
+logger = logging.getLogger(__name__)
+
+
+def update_search_index(sender, instance, **kwargs):
+    """Keep the full-text index in sync with saved objects"""
+    if not search.is_available():
+        return
+    content_type, _ = search.source_for_model(sender)
+    search.index_object(content_type, instance.pk)
+
+
+def remove_from_search_index(sender, instance, **kwargs):
+    """Drop deleted objects from the full-text index"""
+    if not search.is_available():
+        return
+    content_type, _ = search.source_for_model(sender)
+    search.remove_object(content_type, instance.pk)
+
+
+for _source in search.SEARCH_SOURCES.values():
+    post_save.connect(update_search_index, sender=_source['model'], dispatch_uid=f"search_save_{_source['code']}")
+    post_delete.connect(remove_from_search_index, sender=_source['model'], dispatch_uid=f"search_delete_{_source['code']}")
+
+
+@receiver(post_save, sender=ServiceFeature)
+@receiver(post_delete, sender=ServiceFeature)
+def update_service_search_index(sender, instance, **kwargs):
+    """Service features are part of their consultancy service's document"""
+    if not search.is_available():
+        return
+    search.index_object('consultancy', instance.service_id)
+
+
+def update_suggestions(sender, instance, **kwargs):
+    """Refresh typeahead titles once the write is committed"""
+    content_type = suggest.source_for_model(sender)
+    object_id = instance.pk
+    title = suggest.indexed_title(content_type, instance, deleted=kwargs.get('signal') is post_delete)
+    transaction.on_commit(lambda: suggest.index.update(content_type, object_id, title))
+
+
+for _content_type, _source in suggest.SUGGEST_SOURCES.items():
+    post_save.connect(update_suggestions, sender=_source['model'], dispatch_uid=f'suggest_save_{_content_type}')
+    post_delete.connect(update_suggestions, sender=_source['model'], dispatch_uid=f'suggest_delete_{_content_type}')
+
+
+def update_image_placeholders(sender, instance, **kwargs):
+    """Record the size and placeholder of new uploads before they are saved"""
+    for field_name in images.IMAGE_SOURCES[sender]:
+        field_file = getattr(instance, field_name)
+        # Uncommitted files are fresh uploads; committed ones were measured when uploaded
+        if field_file and field_file._committed:
+            continue
+        try:
+            values = images.placeholder_values(field_name, field_file.file if field_file else None)
+        except Exception:
+            logger.exception('Could not read %s of %s %s', field_name, sender.__name__, instance.pk)
+            continue
+        for attname, value in values.items():
+            setattr(instance, attname, value)
+
+
+def update_image_variants(sender, instance, **kwargs):
+    """Queue variant generation for image fields whose file changed"""
+    for field_name in images.IMAGE_SOURCES[sender]:
+        if images.needs_processing(instance, field_name):
+            images.schedule(sender, instance.pk, field_name)
+
+
+def remove_image_variants(sender, instance, **kwargs):
+    """Delete the variant files of a deleted object once the delete is committed"""
+    # Variants are recorded by a background update, so the instance may hold a stale copy
+    fields = [images.variants_field(f) for f in images.IMAGE_SOURCES[sender]]
+    records = sender.objects.filter(pk=instance.pk).values_list(*fields).first() or ()
+    transaction.on_commit(lambda: [images.delete_variants(record) for record in records])
+
+
+for _model in images.IMAGE_SOURCES:
+    pre_save.connect(update_image_placeholders, sender=_model, dispatch_uid=f'image_placeholders_{_model.__name__}')
+    post_save.connect(update_image_variants, sender=_model, dispatch_uid=f'image_variants_save_{_model.__name__}')
+    pre_delete.connect(remove_image_variants, sender=_model, dispatch_uid=f'image_variants_delete_{_model.__name__}')
+
+
+def _file_names(instance):
+    names = {}
+    for field in instance._meta.fields:
+        if isinstance(field, FileField) and field.attname in instance.__dict__:
+            value = instance.__dict__[field.attname]
+            names[field.attname] = getattr(value, 'name', value) or ''
+    return names
+
+
+def remember_media_files(sender, instance, **kwargs):
+    """Keep the loaded file names so a save can release the ones it replaced"""
+    instance._media_files = _file_names(instance)
+
+
+def update_media_references(sender, instance, **kwargs):
+    """Recount references of files a saved or deleted row used or now uses"""
+    previous = getattr(instance, '_media_files', {})
+    current = _file_names(instance)
+    if kwargs.get('signal') is post_delete:
+        changed = set(current.values()) | set(previous.values())
+    else:
+        changed = {name for attname, name in current.items() if previous.get(attname) != name}
+        changed |= {name for attname, name in previous.items() if current.get(attname) != name}
+        instance._media_files = current
+    if changed - {''}:
+        storage.refresh_references(changed - {''})
+
+
+for _model in {model for model, _ in storage.file_fields()}:
+    post_init.connect(remember_media_files, sender=_model, dispatch_uid=f'media_files_init_{_model.__name__}')
+    post_save.connect(update_media_references, sender=_model, dispatch_uid=f'media_files_save_{_model.__name__}')
+    post_delete.connect(update_media_references, sender=_model, dispatch_uid=f'media_files_delete_{_model.__name__}')
+
+
+def update_static_export(sender, **kwargs):
+    """Re-render the exported outputs built from the changed model"""
+    static_site.schedule(sender)
+
+
+for _model in {model for models in static_site.API_OUTPUTS.values() for model in models}:
+    post_save.connect(update_static_export, sender=_model, dispatch_uid=f'static_export_save_{_model.__name__}')
+    post_delete.connect(update_static_export, sender=_model, dispatch_uid=f'static_export_delete_{_model.__name__}')
+
+
+def record_content_change(sender, instance, **kwargs):
+    """Bump the content version and log the change for the changes feed"""
+    versioning.bump(sender, instance.pk, deleted=kwargs.get('signal') is post_delete)
+
+
+for _model in versioning.PUBLIC_MODELS:
+    post_save.connect(record_content_change, sender=_model, dispatch_uid=f'content_version_save_{_model.__name__}')
+    post_delete.connect(record_content_change, sender=_model, dispatch_uid=f'content_version_delete_{_model.__name__}')
+
+
+def publish_cache_invalidation(sender, **kwargs):
+    """Tell the Flask proxy which cached endpoints the change affects"""
+    invalidation.schedule(sender)
+
+
+for _model in versioning.PUBLIC_MODELS:
+    post_save.connect(publish_cache_invalidation, sender=_model, dispatch_uid=f'cache_invalidation_save_{_model.__name__}')
+    post_delete.connect(publish_cache_invalidation, sender=_model, dispatch_uid=f'cache_invalidation_delete_{_model.__name__}')
+
+
+# Every write bumps the generations of the query cache
+connection_created.connect(querycache.install, dispatch_uid='query_cache_track_writes')
@@ -0,0 +1,197 @@
+"""
+Shared cache in a local SQLite file
+
+Every process that opens the same file sees the same entries, so WSGI
+workers share what any of them cached without a cache server to run. The
+file is in WAL mode: reads don't wait for writes or each other, and a read
+is one primary-key lookup. Every operation is a single statement and so
+atomic; add() only replaces an entry that has expired, and incr() adds in
+place.
+
+Entries expire after their timeout, and the file is bounded by max_bytes of
+values: once past it, expired entries go first, then the least recently
+written ones, down to 90% of the limit. Each process checks the size every
+CULL_EVERY writes rather than on every write.
+
+Each process opens one connection and its threads take turns on it. A
+statement takes microseconds, so they hardly wait, and under gevent, where
+a thread-local would be per greenlet, requests don't each open a connection
+and run the setup statements.
+
+Nothing here needs Django, so the Flask proxy opens a SharedCache directly
+in an environment without it; cache_backends.SQLiteCache plugs it into
+Django's cache framework.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+CULL_EVERY = 100
+
+# How values are stored in the value column
+RAW, PICKLED, INTEGER = 0, 1, 2
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS cache ('
+    ' key TEXT PRIMARY KEY, value BLOB NOT NULL, kind INTEGER NOT NULL, expires REAL, written REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS cache_written ON cache (written)',
+]
+NOT_EXPIRED = '(expires IS NULL OR expires > ?)'
+
+
+def _encode(value):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value), RAW
+    if type(value) is int:
+        return value, INTEGER
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL), PICKLED
+
+
+def _decode(value, kind):
+    return pickle.loads(value) if kind == PICKLED else value
+
+
+class SharedCache:
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self._open_lock = threading.Lock()
+        self._db = self._pid = self._lock = None
+        self._writes = 0
+
+    def _open(self):
+        pid = os.getpid()
+        with self._open_lock:
+            if self._pid == pid:
+                return
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                db.execute(statement)
+            self._db, self._lock = db, threading.RLock()
+            self._pid = pid
+
+    @contextmanager
+    def _connection(self):
+        """This process's connection, held by the caller for the block; forked
+        children open their own rather than share the parent's"""
+        if self._pid != os.getpid():
+            self._open()
+        with self._lock:
+            yield self._db
+
+    @staticmethod
+    def _expires(timeout):
+        return None if timeout is None else time.time() + timeout
+
+    def get(self, key, default=None):
+        with self._connection() as db:
+            row = db.execute(
+                f'SELECT value, kind FROM cache WHERE key = ? AND {NOT_EXPIRED}', (key, time.time())
+            ).fetchone()
+        return default if row is None else _decode(*row)
+
+    def set(self, key, value, timeout=None):
+        """Store value for timeout seconds, or for good with None; a timeout of 0 or less deletes it"""
+        if timeout is not None and timeout <= 0:
+            self.delete(key)
+            return
+        value, kind = _encode(value)
+        with self._connection() as db:
+            db.execute(
+                'INSERT OR REPLACE INTO cache (key, value, kind, expires, written) VALUES (?, ?, ?, ?, ?)',
+                (key, value, kind, self._expires(timeout), time.time())
+            )
+        self._wrote()
+
+    def add(self, key, value, timeout=None):
+        """Store value unless the key holds one that hasn't expired; returns True if stored"""
+        if timeout is not None and timeout <= 0:
+            return False
+        value, kind = _encode(value)
+        now = time.time()
+        with self._connection() as db:
+            stored = db.execute(
+                'INSERT INTO cache (key, value, kind, expires, written) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET value = excluded.value, kind = excluded.kind, '
+                'expires = excluded.expires, written = excluded.written WHERE NOT (cache.expires IS NULL OR cache.expires > ?)',
+                (key, value, kind, self._expires(timeout), now, now)
+            ).rowcount == 1
+        if stored:
+            self._wrote()
+        return stored
+
+    def incr(self, key, delta=1):
+        """Add delta to an integer value in place; returns the result, or None if there's no such value"""
+        with self._connection() as db:
+            row = db.execute(
+                f'UPDATE cache SET value = value + ? WHERE key = ? AND kind = {INTEGER} AND {NOT_EXPIRED} RETURNING value',
+                (delta, key, time.time())
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def touch(self, key, timeout=None):
+        with self._connection() as db:
+            return db.execute(
+                f'UPDATE cache SET expires = ? WHERE key = ? AND {NOT_EXPIRED}', (self._expires(timeout), key, time.time())
+            ).rowcount == 1
+
+    def delete(self, key):
+        with self._connection() as db:
+            return db.execute('DELETE FROM cache WHERE key = ?', (key,)).rowcount == 1
+
+    def delete_many(self, keys):
+        with self._connection() as db:
+            db.executemany('DELETE FROM cache WHERE key = ?', [(key,) for key in keys])
+
+    def keys(self, prefix=''):
+        """Keys of the live entries that start with prefix"""
+        with self._connection() as db:
+            rows = db.execute(
+                f'SELECT key FROM cache WHERE key >= ? AND key < ? AND {NOT_EXPIRED}', (prefix, prefix + '\U0010ffff', time.time())
+            ).fetchall()
+        return [key for key, in rows]
+
+    def clear(self):
+        with self._connection() as db:
+            db.execute('DELETE FROM cache')
+
+    def size(self):
+        """Bytes of values stored"""
+        with self._connection() as db:
+            return db.execute('SELECT COALESCE(SUM(LENGTH(value)), 0) FROM cache').fetchone()[0]
+
+    def _wrote(self):
+        self._writes += 1
+        if self._writes % CULL_EVERY == 0:
+            self.cull()
+
+    def cull(self):
+        """Drop expired entries, then the oldest ones while over max_bytes; returns the entries dropped"""
+        with self._connection() as db:
+            dropped = db.execute('DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?', (time.time(),)).rowcount
+            total = self.size()
+            if total <= self.max_bytes:
+                return dropped
+            excess = total - int(self.max_bytes * 0.9)
+            oldest = []
+            for key, size in db.execute('SELECT key, LENGTH(value) FROM cache ORDER BY written'):
+                oldest.append(key)
+                excess -= size
+                if excess <= 0:
+                    break
+            self.delete_many(oldest)
+        return dropped + len(oldest)
+
+    def close(self):
+        with self._open_lock:
+            if self._db is not None and self._pid == os.getpid():
+                self._db.close()
+            self._db = self._pid = self._lock = None
@@ -0,0 +1,230 @@
+"""
+Static export of the public site
+
+export() renders every frontend page and every public GET API listed in
+urls.py into a directory that any static file server can host, together with
+the frontend's static files and the uploaded media. Pages are written as
+`<name>.html` and API responses as `<path>/index.json`, so a server that
+tries `$uri`, `$uri.html` and `$uri/index.json` answers every URL the live
+site does.
+
+API_OUTPUTS lists the models each API is built from. With
+STATIC_EXPORT_DIR set, saving or deleting one of those models re-renders
+just the outputs that depend on it, after the transaction commits, on a
+background thread. Files are only rewritten when their content changed,
+so syncing the export to a CDN moves only what's new.
+"""
+import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.urls import URLPattern, get_resolver
+
+from .models import (
+    AboutConfig, Achievement, BlogPost, Book, Category, ConsultancyService, EducationQualification, GalleryItem,
+    HeroConfig, Masterclass, PrivacyPolicy, ProfessionalJourneyItem, ServiceFeature, SiteConfig,
+    SocialMediaLink, SpeakingEngagement, TermsConditions
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Public GET APIs and the models their responses are built from
+API_OUTPUTS = {
+    'api/publications/': [Book, Category],
+    'api/categories/': [Category],
+    'api/consultancy/': [ConsultancyService, ServiceFeature],
+    'api/blog/': [BlogPost],
+    'api/site/config/': [SiteConfig],
+    'api/site/hero/': [HeroConfig],
+    'api/site/about/': [AboutConfig, ProfessionalJourneyItem, EducationQualification, Achievement, SpeakingEngagement],
+    'api/site/contact-info/': [SiteConfig],
+    'api/site/social-media/': [SocialMediaLink],
+    'api/masterclasses/': [Masterclass],
+    'api/kict/courses/': [],
+    'api/site/seo/<str:page>/': [],
+    'api/site/privacy-policy/': [PrivacyPolicy],
+    'api/site/terms-conditions/': [TermsConditions],
+    'api/gallery/': [GalleryItem],
+}
+# GET APIs that answer per-request queries and can't be exported
+DYNAMIC_APIS = {'api/search/', 'api/suggest/', 'api/uploads/<uuid:session_id>/', 'api/version/', 'api/changes/',
+                'api/ready/'}
+# Prefixes of routes that aren't frontend pages
+NON_PAGE_PREFIXES = ('api/', 'admin/', 'media/', 'static/')
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='static-export')
+
+
+class ExportError(Exception):
+    pass
+
+
+def export_dir():
+    return getattr(settings, 'STATIC_EXPORT_DIR', None)
+
+
+def base_url():
+    return getattr(settings, 'STATIC_EXPORT_BASE_URL', 'http://localhost:8000')
+
+
+def _routes():
+    for pattern in get_resolver().url_patterns:
+        if isinstance(pattern, URLPattern):
+            yield str(pattern.pattern), pattern
+
+
+def page_outputs():
+    """{url path: output file} of the frontend pages"""
+    routes = [route for route, _ in _routes() if not route.startswith(NON_PAGE_PREFIXES) and '<' not in route]
+    outputs = {}
+    for route in routes:
+        if not route:
+            outputs[''] = 'index.html'
+        elif route.endswith('.html'):
+            outputs[route] = route
+        elif f'{route}.html' not in routes:
+            # Extensionless URLs are served from <name>.html
+            outputs[route] = f'{route}.html'
+    return outputs
+
+
+def api_routes():
+    """Routes of the public GET APIs, checked against API_OUTPUTS"""
+    routes = []
+    for route, pattern in _routes():
+        view_class = getattr(pattern.callback, 'view_class', None)
+        if not route.startswith('api/') or route in DYNAMIC_APIS or not hasattr(view_class, 'get'):
+            continue
+        if route not in API_OUTPUTS:
+            raise ExportError(f'{route} is not listed in API_OUTPUTS or DYNAMIC_APIS')
+        routes.append(route)
+    return routes
+
+
+def expand(route):
+    """URL paths of a route; parameters are filled in with every page name"""
+    if '<str:page>' not in route:
+        return [route]
+    pages = sorted({(path[:-len('.html')] if path.endswith('.html') else path) or 'index' for path in page_outputs()})
+    return [route.replace('<str:page>', page) for page in pages]
+
+
+def api_outputs(models=None):
+    """{url path: output file} of the APIs, limited to those built from any of models"""
+    outputs = {}
+    for route in api_routes():
+        if models is not None and not set(API_OUTPUTS[route]) & set(models):
+            continue
+        for path in expand(route):
+            outputs[path] = f'{path.rstrip("/")}/index.json'
+    return outputs
+
+
+def render(path):
+    """Body of a GET for path, rendered without going through the network"""
+    url = urlsplit(base_url())
+    request = RequestFactory().get(f'/{path}', secure=url.scheme == 'https', HTTP_HOST=url.netloc)
+    request.user = AnonymousUser()
+    match = get_resolver().resolve(f'/{path}')
+    response = match.func(request, *match.args, **match.kwargs)
+    if response.status_code != 200:
+        raise ExportError(f'/{path} returned HTTP {response.status_code}')
+    return b''.join(response.streaming_content) if response.streaming else response.content
+
+
+def write_if_changed(path, content):
+    """Write content unless the file already holds it; returns True if written"""
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return True
+
+
+def sync_tree(source, target):
+    """Mirror a directory with hard links (copies across filesystems); returns the files added"""
+    added = 0
+    seen = set()
+    for root, _, files in os.walk(source):
+        for filename in files:
+            if filename.endswith('.part'):
+                continue
+            src = os.path.join(root, filename)
+            dst = os.path.join(target, os.path.relpath(src, source))
+            seen.add(dst)
+            src_stat = os.stat(src)
+            try:
+                dst_stat = os.stat(dst)
+                if (dst_stat.st_size, dst_stat.st_mtime_ns) == (src_stat.st_size, src_stat.st_mtime_ns):
+                    continue
+                os.remove(dst)
+            except FileNotFoundError:
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+            added += 1
+    for root, _, files in os.walk(target):
+        for filename in files:
+            path = os.path.join(root, filename)
+            if path not in seen:
+                os.remove(path)
+    return added
+
+
+def export(output_dir=None, models=None, pages=True, files=True):
+    """Render the site into output_dir; returns (files written, files unchanged, files synced)
+
+    With models, only the APIs built from them are rendered, plus uploaded
+    media since a save may have added a file.
+    """
+    output_dir = str(output_dir or export_dir())
+    outputs = api_outputs(models)
+    if pages and models is None:
+        outputs.update(page_outputs())
+    written = unchanged = 0
+    for path, output in outputs.items():
+        if write_if_changed(os.path.join(output_dir, output), render(path)):
+            written += 1
+        else:
+            unchanged += 1
+
+    synced = 0
+    if files:
+        synced += sync_tree(str(settings.MEDIA_ROOT), os.path.join(output_dir, settings.MEDIA_URL.strip('/')))
+        if models is None:
+            synced += sync_tree(
+                os.path.join(str(settings.FRONTEND_DIR), 'static'),
+                os.path.join(output_dir, settings.STATIC_URL.strip('/'))
+            )
+    return written, unchanged, synced
+
+
+def _run(models):
+    try:
+        export(models=models)
+    except Exception:
+        logger.exception('Static export failed for %s', ', '.join(m.__name__ for m in models))
+    finally:
+        connection.close()
+
+
+def schedule(model):
+    """Re-export the outputs built from model once the current transaction commits"""
+    if not export_dir() or not any(model in deps for deps in API_OUTPUTS.values()):
+        return
+    transaction.on_commit(lambda: _executor.submit(_run, [model]))
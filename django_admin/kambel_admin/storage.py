@@ -0,0 +1,128 @@
+"""
+Content-addressed media storage
+
+Uploads are stored as objects/<ab>/<cd>/<sha256><ext> whatever their original
+name or upload_to folder, so identical files are written once and a name
+never changes meaning, which lets browsers cache media forever. Each stored
+file has a MediaBlob row counting the model rows that reference it; the file
+is only deleted once its last reference is gone.
+"""
+import hashlib
+import os
+import tempfile
+from functools import lru_cache
+
+from django.apps import apps
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import transaction
+from django.db.models import FileField
+
+
+OBJECTS_DIR = 'objects'
+
+
+def content_name(digest, extension):
+    return f'{OBJECTS_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+def is_content_addressed(name):
+    return bool(name) and name.startswith(f'{OBJECTS_DIR}/')
+
+
+def digest_from_name(name):
+    """The sha256 encoded in a content-addressed name"""
+    return os.path.splitext(os.path.basename(name))[0]
+
+
+def hash_content(content):
+    """(sha256 hex digest, size) of a Django File, read in chunks"""
+    digest = hashlib.sha256()
+    size = 0
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+@lru_cache(maxsize=None)
+def file_fields():
+    """(model, field name) of every file and image field in the app"""
+    return tuple(
+        (model, field.name)
+        for model in apps.get_app_config('kambel_admin').get_models()
+        for field in model._meta.fields
+        if isinstance(field, FileField)
+    )
+
+
+def count_references(name):
+    return sum(model._default_manager.filter(**{field_name: name}).count() for model, field_name in file_fields())
+
+
+def refresh_references(names):
+    """Recount references of the given files and collect the unused ones after commit"""
+    MediaBlob = apps.get_model('kambel_admin', 'MediaBlob')
+    for name in set(names):
+        if not is_content_addressed(name):
+            continue
+        count = count_references(name)
+        MediaBlob.objects.filter(name=name).update(ref_count=count)
+        if count == 0:
+            transaction.on_commit(lambda name=name: collect(name))
+
+
+def collect(name):
+    """Delete a file that nothing references any more; returns True if it was deleted"""
+    # Checked again here: another row may have picked the file up since it was released
+    if count_references(name):
+        return False
+    default_storage.delete(name)
+    return True
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that names files by the sha256 of their content"""
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is chosen from the content in _save, and never needs a suffix
+        return name
+
+    def _save(self, name, content):
+        digest, size = hash_content(content)
+        name = content_name(digest, os.path.splitext(name)[1].lower())
+        full_path = self.path(name)
+        if not os.path.exists(full_path) and hasattr(content, 'temporary_file_path'):
+            # Large uploads already on disk are moved into place rather than copied
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            file_move_safe(content.temporary_file_path(), full_path)
+            os.chmod(full_path, self.file_permissions_mode or 0o644)
+        elif not os.path.exists(full_path):
+            directory = os.path.dirname(full_path)
+            os.makedirs(directory, exist_ok=True)
+            # Written under a temporary name and renamed, so a concurrent
+            # upload of the same content never sees a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in content.chunks():
+                        f.write(chunk)
+                os.chmod(tmp_path, self.file_permissions_mode or 0o644)
+                os.replace(tmp_path, full_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        apps.get_model('kambel_admin', 'MediaBlob').objects.get_or_create(
+            name=name, defaults={'sha256': digest, 'size': size}
+        )
+        return name
+
+    def delete(self, name):
+        """Shared files are only removed once no row references them"""
+        if is_content_addressed(name) and count_references(name):
+            return
+        apps.get_model('kambel_admin', 'MediaBlob').objects.filter(name=name).delete()
+        super().delete(name)
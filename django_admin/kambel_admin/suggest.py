@@ -0,0 +1,210 @@
+"""
+In-memory typeahead index for title suggestions
+
+Titles of active books, masterclasses and blog posts are normalized and kept
+in a sorted array so a prefix lookup is a binary search plus a short scan,
+without touching the database. Every word start of a title is indexed, so
+"dev" finds "Career Development". The index is refreshed incrementally by
+model signals and rebuilt in the background once it is older than
+SUGGEST_MAX_AGE seconds, which bounds staleness across worker processes.
+"""
+import bisect
+import logging
+import re
+import threading
+import time
+import unicodedata
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Book, BlogPost, Masterclass
+
+
+logger = logging.getLogger(__name__)
+
+SUGGEST_SOURCES = {
+    'book': {
+        'model': Book,
+        'queryset': lambda: Book.objects.filter(is_active=True),
+        'is_visible': lambda obj: obj.is_active,
+    },
+    'masterclass': {
+        'model': Masterclass,
+        'queryset': lambda: Masterclass.objects.filter(is_active=True),
+        'is_visible': lambda obj: obj.is_active,
+    },
+    'blog': {
+        'model': BlogPost,
+        'queryset': lambda: BlogPost.objects.filter(is_published=True),
+        'is_visible': lambda obj: obj.is_published,
+    },
+}
+
+# Only the first few words of a title get their own entry
+MAX_WORDS_PER_TITLE = 8
+MAX_KEY_LENGTH = 80
+# Candidates scanned per lookup before ranking
+MAX_SCAN = 200
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse punctuation to single spaces"""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(re.findall(r'\w+', text.casefold()))
+
+
+def _keys_for_title(title):
+    """One key per word start, e.g. 'career development' -> ['career development', 'development']"""
+    normalized = normalize(title)
+    keys = []
+    start = 0
+    for _ in range(MAX_WORDS_PER_TITLE):
+        keys.append(normalized[start:start + MAX_KEY_LENGTH])
+        start = normalized.find(' ', start) + 1
+        if start == 0:
+            break
+    return [key for key in keys if key]
+
+
+def source_for_model(model):
+    """Return the suggestion content type for a model class, or None"""
+    for content_type, source in SUGGEST_SOURCES.items():
+        if source['model'] is model:
+            return content_type
+    return None
+
+
+def _visible_titles():
+    """(content_type, object_id, title) of every visible document, source by source"""
+    for content_type, source in SUGGEST_SOURCES.items():
+        for object_id, title in source['queryset']().values_list('id', 'title').iterator():
+            yield content_type, object_id, title
+
+
+class PrefixIndex:
+    """Sorted array of (key, content_type, object_id) with a title lookup table"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = []
+        self.titles = {}
+        self.doc_keys = {}
+        self.built_at = None
+        self.lock = threading.RLock()
+        self._rebuilding = False
+
+    def build(self):
+        """Load all visible titles from the database"""
+        entries = []
+        titles = {}
+        doc_keys = {}
+        for content_type, object_id, title in _visible_titles():
+            keys = _keys_for_title(title)
+            if len(entries) + len(keys) > self.max_entries:
+                logger.warning('Suggestion index is full (%s entries); skipping remaining titles', self.max_entries)
+                break
+            doc = (content_type, object_id)
+            titles[doc] = title
+            doc_keys[doc] = keys
+            entries.extend((key, content_type, object_id) for key in keys)
+        entries.sort()
+        with self.lock:
+            self.entries = entries
+            self.titles = titles
+            self.doc_keys = doc_keys
+            self.built_at = time.monotonic()
+
+    def _remove(self, doc):
+        for key in self.doc_keys.pop(doc, []):
+            entry = (key, doc[0], doc[1])
+            i = bisect.bisect_left(self.entries, entry)
+            if i < len(self.entries) and self.entries[i] == entry:
+                del self.entries[i]
+        self.titles.pop(doc, None)
+
+    def update(self, content_type, object_id, title=None):
+        """Replace the entries of one document; a None title removes it"""
+        doc = (content_type, object_id)
+        with self.lock:
+            if self.built_at is None:
+                return
+            self._remove(doc)
+            if title is None:
+                return
+            keys = _keys_for_title(title)
+            if len(self.entries) + len(keys) > self.max_entries:
+                logger.warning('Suggestion index is full; %s %s not indexed', content_type, object_id)
+                return
+            for key in keys:
+                bisect.insort(self.entries, (key, content_type, object_id))
+            self.titles[doc] = title
+            self.doc_keys[doc] = keys
+
+    def lookup(self, prefix, limit=8, content_types=None):
+        """Titles with a word starting with prefix; title-start matches rank first"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self.lock:
+            entries = self.entries
+            i = bisect.bisect_left(entries, (prefix,))
+            candidates = {}
+            for key, content_type, object_id in entries[i:i + MAX_SCAN]:
+                if not key.startswith(prefix):
+                    break
+                if content_types and content_type not in content_types:
+                    continue
+                doc = (content_type, object_id)
+                title = self.titles[doc]
+                at_start = key == self.doc_keys[doc][0]
+                if doc not in candidates or at_start:
+                    candidates[doc] = (not at_start, len(title), title)
+        ranked = sorted(candidates.items(), key=lambda item: item[1])[:limit]
+        return [
+            {'type': content_type, 'id': object_id, 'title': rank[2]}
+            for (content_type, object_id), rank in ranked
+        ]
+
+    def is_stale(self, max_age):
+        return self.built_at is None or time.monotonic() - self.built_at > max_age
+
+    def rebuild_in_background(self):
+        """Refresh the index on a worker thread while the old one keeps serving"""
+        with self.lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+
+        def run():
+            try:
+                self.build()
+            except Exception:
+                logger.exception('Failed to rebuild suggestion index')
+            finally:
+                self._rebuilding = False
+                connection.close()
+
+        threading.Thread(target=run, name='suggest-index-rebuild', daemon=True).start()
+
+
+index = PrefixIndex(max_entries=getattr(settings, 'SUGGEST_MAX_ENTRIES', 100000))
+
+
+def suggest(prefix, limit=8, content_types=None):
+    """Look up title suggestions, building the index on first use"""
+    if index.built_at is None:
+        with index.lock:
+            if index.built_at is None:
+                index.build()
+    elif index.is_stale(getattr(settings, 'SUGGEST_MAX_AGE', 300)):
+        index.rebuild_in_background()
+    return index.lookup(prefix, limit=limit, content_types=content_types)
+
+
+def indexed_title(content_type, obj, deleted=False):
+    """Title to index for a saved or deleted object, None if it should be removed"""
+    if deleted or not SUGGEST_SOURCES[content_type]['is_visible'](obj):
+        return None
+    return obj.title
@@ -0,0 +1,1323 @@
+"""
+Tests for Kambel Consult admin app
+"""
+import asyncio
+import csv
+import gzip
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import runpy
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.translation import gettext_lazy
+
+from . import (
+    assets, cache_backends, exports, fastjson, images, importers, invalidation, json_responses, media, querycache, search,
+    serving, shared_secrets, sqlite_cache, static_site, storage, suggest, uploads, versioning, views, warmup
+)
+from PIL import Image
+
+from .models import (
+    AboutConfig, Book, BlogPost, Category, ConsultancyService, ContactMessage, GalleryItem, Masterclass, MasterclassRegistration,
+    MediaBlob, ServiceFeature, UploadSession
+)
+
+
+class SearchIndexTests(TestCase):
+    """Full-text search index and API"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Guidance Books')
+        self.book = Book.objects.create(
+            title='Career Development Mastery',
+            description='Unlock your career potential with proven strategies.',
+            category=self.category
+        )
+        self.post = BlogPost.objects.create(
+            title='Planning your next move',
+            content='<p>Strategic <b>career</b> planning & goals</p>',
+            is_published=True
+        )
+
+    def test_ranked_results_with_snippets(self):
+        results = search.search('career')
+        self.assertEqual(results['count'], 2)
+        # Title matches are weighted above body matches
+        self.assertEqual(results['results'][0]['id'], self.book.id)
+        self.assertIn('<mark>', results['results'][1]['snippet'])
+        self.assertIn('&amp;', results['results'][1]['snippet'])
+
+    def test_prefix_matching(self):
+        self.assertEqual(search.search('master')['count'], 1)
+        self.assertEqual(search.search('master', prefix=False)['count'], 0)
+
+    def test_content_type_filter(self):
+        results = search.search('career', content_types=['blog'])
+        self.assertEqual([r['type'] for r in results['results']], ['blog'])
+
+    def test_signals_keep_index_in_sync(self):
+        self.book.is_active = False
+        self.book.save()
+        self.assertEqual(search.search('mastery')['count'], 0)
+
+        self.post.delete()
+        self.assertEqual(search.search('planning')['count'], 0)
+
+        service = ConsultancyService.objects.create(name='Coaching', service_type='career', description='One to one')
+        ServiceFeature.objects.create(service=service, title='Interview preparation', description='Mock interviews')
+        self.assertEqual(search.search('interview')['results'][0]['type'], 'consultancy')
+
+    def test_rebuild(self):
+        Book.objects.filter(pk=self.book.pk).update(title='Leadership Essentials')
+        counts = search.rebuild()
+        self.assertEqual(counts['book'], 1)
+        self.assertEqual(search.search('leadership')['count'], 1)
+
+    def test_search_api(self):
+        response = self.client.get('/api/search/', {'q': 'career', 'type': 'book'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
+        self.assertEqual(self.client.get('/api/search/', {'q': 'x', 'type': 'user'}).status_code, 400)
+
+
+class SuggestIndexTests(TestCase):
+    """Typeahead prefix index"""
+
+    def setUp(self):
+        suggest.index.built_at = None
+        Book.objects.create(title='Career Development Mastery')
+        Book.objects.create(title='The Success Mindset')
+        Masterclass.objects.create(title='Développement Personnel', date=date(2030, 1, 1), duration='1 Day', description='')
+
+    def test_prefix_and_word_start_matches(self):
+        titles = [s['title'] for s in suggest.suggest('dev')]
+        self.assertEqual(titles, ['Développement Personnel', 'Career Development Mastery'])
+        self.assertEqual(suggest.suggest('success')[0]['title'], 'The Success Mindset')
+        self.assertEqual(suggest.suggest('dev', content_types=['book'])[0]['type'], 'book')
+
+    def test_incremental_refresh_without_queries(self):
+        suggest.suggest('x')
+        with self.captureOnCommitCallbacks(execute=True):
+            book = Book.objects.create(title='Leadership Essentials')
+        with self.assertNumQueries(0):
+            self.assertEqual(suggest.suggest('lead')[0]['id'], book.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            book.is_active = False
+            book.save()
+        self.assertEqual(suggest.suggest('lead'), [])
+
+    def test_memory_bound(self):
+        index = suggest.PrefixIndex(max_entries=3)
+        index.build()
+        self.assertLessEqual(len(index.entries), 3)
+
+    def test_full_index_skips_later_sources(self):
+        # The second book doesn't fit; the masterclass after it would, but
+        # titles are taken in order, so nothing more is added
+        index = suggest.PrefixIndex(max_entries=5)
+        with self.assertLogs('kambel_admin.suggest', 'WARNING') as logs:
+            index.build()
+        self.assertEqual(len(logs.output), 1)
+        self.assertEqual({doc[0] for doc in index.titles}, {'book'})
+        self.assertEqual(len(index.entries), 3)
+
+    def test_suggest_api(self):
+        response = self.client.get('/api/suggest/', {'q': 'car'})
+        self.assertEqual(response.json()['suggestions'][0]['title'], 'Career Development Mastery')
+
+
+class AdminSearchTests(TestCase):
+    """Indexed changelist search for inbox models"""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pass'))
+        masterclass = Masterclass.objects.create(title='Leadership Lab', date=date(2030, 1, 1), duration='1 Day', description='')
+        for i in range(3):
+            MasterclassRegistration.objects.create(
+                masterclass=masterclass, first_name=f'Ama{i}', last_name='Mensah',
+                email=f'ama{i}@example.com', phone='024000000'
+            )
+        ContactMessage.objects.create(name='Kofi', email='kofi@example.com', subject='Books', message='Bulk order enquiry')
+
+    def test_registration_search_uses_index(self):
+        response = self.client.get('/admin/kambel_admin/masterclassregistration/', {'q': 'ama1@example'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['cl'].result_list.values_list('first_name', flat=True)), ['Ama1'])
+
+    def test_contact_search_matches_message_body(self):
+        response = self.client.get('/admin/kambel_admin/contactmessage/', {'q': 'enquiry'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+    def test_changelist_avoids_n_plus_one_and_repeated_counts(self):
+        url = '/admin/kambel_admin/masterclassregistration/'
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        sql = [q['sql'] for q in queries.captured_queries]
+        self.assertFalse([q for q in sql if 'COUNT(' in q])
+        self.assertFalse([q for q in sql if q.startswith('SELECT "kambel_admin_masterclass"."id"')])
+
+
+class ExportTests(TestCase):
+    """Streaming CSV/JSONL exports"""
+
+    def setUp(self):
+        for i, status in enumerate(['pending', 'confirmed', 'pending']):
+            MasterclassRegistration.objects.create(
+                masterclass_title='Leadership Lab', first_name=f'Ama{i}', last_name='Mensah',
+                email=f'ama{i}@example.com', phone='024000000', status=status
+            )
+
+    def test_jsonl_export_filters_by_status(self):
+        queryset = exports.filter_queryset('registrations', status='pending', since=date.today())
+        lines = ''.join(exports.stream_export('registrations', queryset, 'jsonl', chunk_size=1)).splitlines()
+        self.assertEqual([json.loads(line)['first_name'] for line in lines], ['Ama0', 'Ama2'])
+
+    def test_admin_action_streams_csv(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pass'))
+        response = self.client.post('/admin/kambel_admin/masterclassregistration/', {
+            'action': 'export_selected_csv',
+            '_selected_action': list(MasterclassRegistration.objects.values_list('pk', flat=True)),
+        })
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], exports.EXPORTS['registrations']['fields'])
+        self.assertEqual(len(rows), 4)
+
+
+class BulkImportTests(TestCase):
+    """Bulk catalog importer"""
+
+    def test_csv_import_creates_updates_and_reports_errors(self):
+        Category.objects.create(name='Guidance Books')
+        Book.objects.create(title='The Success Mindset', price=10)
+        data = (
+            'title,category,price,pages,is_active\n'
+            'The Success Mindset,Guidance Books,19.99,200,yes\n'
+            'Career Development Mastery,Guidance Books,24.99,180,true\n'
+            'Broken Price,,abc,10,true\n'
+            'Unknown Category,Poetry,5,10,true\n'
+        )
+        result = importers.import_rows('books', importers.read_rows(io.BytesIO(data.encode()), 'csv'), chunk_size=2)
+        self.assertEqual((result.created, result.updated), (1, 1))
+        self.assertEqual([row for row, _ in result.errors], [3, 4])
+        self.assertEqual(str(Book.objects.get(title='The Success Mindset').price), '19.99')
+        # Bulk writes skip signals, so the importer refreshes the search index itself
+        self.assertEqual(search.search('mastery')['count'], 1)
+
+    @override_settings(CACHE_INVALIDATION_URLS=['http://proxy.test/internal/cache/invalidate'])
+    def test_import_moves_the_content_version(self):
+        book = Book.objects.create(title='The Success Mindset', price=10)
+        start = versioning.current()
+        rows = [{'title': 'The Success Mindset', 'price': '12'}, {'title': 'Career Development Mastery', 'price': '20'}]
+        with mock.patch.object(invalidation, '_executor') as executor, self.captureOnCommitCallbacks(execute=True):
+            importers.import_rows('books', rows)
+        created = Book.objects.get(title='Career Development Mastery')
+        self.assertEqual(versioning.current(), start + 2)
+        changes = self.client.get(f'/api/changes/?since={start}').json()['changes']
+        self.assertEqual(list(changes), ['book'])
+        self.assertCountEqual(changes['book']['upserted'], [book.pk, created.pk])
+        self.assertEqual(executor.submit.call_count, 1)
+        self.assertEqual(invalidation._pending, {'publications/'})
+        invalidation._pending.clear()
+
+    def test_about_items_attach_to_active_config(self):
+        about = AboutConfig.objects.create()
+        rows = [
+            {'title': 'Founder', 'organization': 'Kambel Consult', 'period': '2010 - Present', 'description': 'x'},
+            {'title': 'Founder', 'organization': 'Kambel Consult', 'period': '2011 - Present', 'description': 'x'},
+            {'title': 'Advisor', 'organization': 'Various', 'description': 'missing period'},
+        ]
+        result = importers.import_rows('journey', rows)
+        self.assertEqual(result.created, 1)
+        self.assertEqual(len(result.errors), 1)
+        self.assertEqual(about.journey_items.get().period, '2011 - Present')
+
+    def test_admin_upload(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pass'))
+        upload = SimpleUploadedFile('categories.json', json.dumps([{'name': 'Literature'}]).encode())
+        response = self.client.post('/admin/kambel_admin/category/import/', {'import_name': 'categories', 'file': upload})
+        self.assertEqual(response.context['result'].created, 1)
+        self.assertTrue(Category.objects.filter(name='Literature').exists())
+
+
+def make_jpeg(width, height, exif=True):
+    image = Image.new('RGB', (width, height), (200, 30, 30))
+    buffer = io.BytesIO()
+    exif_data = Image.Exif()
+    exif_data[0x010F] = 'Test Camera'
+    image.save(buffer, 'JPEG', **({'exif': exif_data.tobytes()} if exif else {}))
+    return buffer.getvalue()
+
+
+class ImageVariantTests(TestCase):
+    """Responsive image variant generation"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def create_book(self, width=2000, height=1000):
+        upload = SimpleUploadedFile('cover.jpg', make_jpeg(width, height), content_type='image/jpeg')
+        with mock.patch.object(images, '_executor') as executor, self.captureOnCommitCallbacks(execute=True):
+            book = Book.objects.create(title='Career Development Mastery', cover_image=upload)
+        self.assertEqual(executor.submit.call_count, 1)
+        return book
+
+    def test_variants_are_resized_and_stripped(self):
+        book = self.create_book()
+        self.assertTrue(images.process(Book, book.pk, 'cover_image'))
+        record = Book.objects.get(pk=book.pk).cover_image_variants
+        self.assertEqual([v['width'] for v in record['webp']], [320, 640, 1024, 1600])
+        self.assertEqual(record['jpeg'][0]['height'], 160)
+        with Image.open(f"{self.media_root}/{record['jpeg'][-1]['name']}") as variant:
+            self.assertEqual(variant.size, (1600, 800))
+            self.assertFalse(variant.getexif())
+
+    def test_generation_is_idempotent(self):
+        book = self.create_book(width=500, height=500)
+        self.assertTrue(images.process(Book, book.pk, 'cover_image'))
+        self.assertFalse(images.process(Book, book.pk, 'cover_image'))
+        # Small originals are never upscaled
+        record = Book.objects.get(pk=book.pk).cover_image_variants
+        self.assertEqual([v['width'] for v in record['jpeg']], [320, 500])
+
+    def test_api_exposes_srcset(self):
+        book = self.create_book()
+        images.process(Book, book.pk, 'cover_image')
+        variants = self.client.get('/api/publications/').json()[0]['cover_image_variants']
+        self.assertEqual(variants['width'], 2000)
+        self.assertTrue(variants['srcset']['webp'].endswith('-1600w.webp 1600w'))
+
+    def test_size_and_placeholder_stored_on_upload(self):
+        book = self.create_book(width=1200, height=900)
+        self.assertEqual((book.cover_image_width, book.cover_image_height), (1200, 900))
+        self.assertTrue(book.cover_image_placeholder.startswith('data:image/jpeg;base64,'))
+        self.assertLess(len(book.cover_image_placeholder), 1000)
+        publication = self.client.get('/api/publications/').json()[0]
+        self.assertEqual(publication['cover_image_placeholder'], book.cover_image_placeholder)
+
+        Book.objects.filter(pk=book.pk).update(cover_image_width=None, cover_image_placeholder='')
+        start = versioning.current()
+        with mock.patch.object(invalidation, 'schedule') as schedule:
+            call_command('backfill_placeholders', stdout=io.StringIO())
+        self.assertEqual(Book.objects.get(pk=book.pk).cover_image_width, 1200)
+        # Stored with update(), so recorded by the command instead of post_save
+        self.assertEqual(versioning.current(), start + 1)
+        self.assertEqual(versioning.changes(start, start + 1), {'book': {'upserted': [book.pk], 'deleted': []}})
+        schedule.assert_called_once_with(Book)
+
+
+class ResizeEndpointTests(TestCase):
+    """On-demand resize endpoint and its derivative cache"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        patcher = mock.patch.object(media, 'CACHE_DIR', os.path.join(self.media_root, 'cache'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        os.makedirs(os.path.join(self.media_root, 'gallery'))
+        with open(os.path.join(self.media_root, 'gallery', 'photo.jpg'), 'wb') as f:
+            f.write(make_jpeg(1000, 500))
+
+    def test_resize_and_cache_headers(self):
+        url = '/media/resize/400x300/gallery/photo.jpg'
+        response = self.client.get(url, HTTP_ACCEPT='image/webp,*/*')
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('immutable', response['Cache-Control'])
+        with Image.open(io.BytesIO(b''.join(response.streaming_content))) as image:
+            self.assertEqual(image.size, (400, 300))
+
+        response = self.client.get(url, HTTP_ACCEPT='image/webp', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get(url)['Content-Type'], 'image/jpeg')
+
+    def test_rejects_unlisted_sizes_and_paths_outside_media(self):
+        self.assertEqual(self.client.get('/media/resize/401x300/gallery/photo.jpg').status_code, 400)
+        self.assertEqual(self.client.get('/media/resize/400x300/../../etc/photo.jpg').status_code, 400)
+        self.assertEqual(self.client.get('/media/resize/400x300/gallery/missing.jpg').status_code, 404)
+
+    def test_lru_eviction(self):
+        old, _ = media.get_derivative('gallery/photo.jpg', 150, 150, 'jpeg')
+        os.utime(old, (1, 1))
+        new, _ = media.get_derivative('gallery/photo.jpg', 400, 300, 'jpeg')
+        with mock.patch.object(media, 'EVICT_TO', 1.0):
+            media.evict(max_bytes=os.path.getsize(new))
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.exists(new))
+
+
+class ContentAddressedStorageTests(TestCase):
+    """Deduplicated, hash-named media storage"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.data = make_jpeg(64, 64)
+
+    def create(self, model, **kwargs):
+        with mock.patch.object(images, '_executor'), self.captureOnCommitCallbacks(execute=True):
+            return model.objects.create(**kwargs)
+
+    def test_identical_uploads_share_one_file(self):
+        book = self.create(Book, title='A', cover_image=SimpleUploadedFile('Cover Final.JPG', self.data))
+        item = self.create(GalleryItem, title='B', image=SimpleUploadedFile('other.jpg', self.data))
+        self.assertEqual(book.cover_image.name, item.image.name)
+        self.assertRegex(book.cover_image.name, r'^objects/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$')
+        self.assertEqual(MediaBlob.objects.get().ref_count, 2)
+
+        path = book.cover_image.path
+        with self.captureOnCommitCallbacks(execute=True):
+            book.delete()
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(MediaBlob.objects.get().ref_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            item.image = None
+            item.save()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_dedupe_moves_legacy_uploads_and_records_the_change(self):
+        os.makedirs(os.path.join(self.media_root, 'books'))
+        with open(os.path.join(self.media_root, 'books', 'legacy.jpg'), 'wb') as f:
+            f.write(self.data)
+        book = Book.objects.create(title='A')
+        Book.objects.filter(pk=book.pk).update(cover_image='books/legacy.jpg')
+        start = versioning.current()
+
+        with mock.patch.object(invalidation, 'schedule') as schedule:
+            call_command('dedupe_media', stdout=io.StringIO())
+        name = Book.objects.get(pk=book.pk).cover_image.name
+        self.assertTrue(storage.is_content_addressed(name))
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'books', 'legacy.jpg')))
+        self.assertEqual(versioning.changes(start, versioning.current()), {'book': {'upserted': [book.pk], 'deleted': []}})
+        schedule.assert_called_once_with(Book)
+
+    def test_media_served_with_immutable_headers(self):
+        book = self.create(Book, title='A', cover_image=SimpleUploadedFile('cover.jpg', self.data))
+        response = self.client.get(f'/media/{book.cover_image.name}')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['ETag'], f'"{storage.digest_from_name(book.cover_image.name)}"')
+        self.assertEqual(b''.join(response.streaming_content), self.data)
+        self.assertEqual(self.client.get('/media/../settings.py').status_code, 404)
+
+
+class RangeRequestTests(TestCase):
+    """Byte-range media responses"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        os.makedirs(os.path.join(self.media_root, 'gallery', 'videos'))
+        self.data = bytes(range(256)) * 16
+        with open(os.path.join(self.media_root, 'gallery', 'videos', 'clip.mp4'), 'wb') as f:
+            f.write(self.data)
+        self.url = '/media/gallery/videos/clip.mp4'
+
+    def test_parse_range(self):
+        self.assertEqual(serving.parse_range('bytes=0-9,5-19,-10', 100), [(0, 19), (90, 99)])
+        self.assertEqual(serving.parse_range('bytes=50-', 100), [(50, 99)])
+        self.assertIsNone(serving.parse_range('items=0-9', 100))
+        self.assertIsNone(serving.parse_range('bytes=9-0', 100))
+        with self.assertRaises(serving.RangeNotSatisfiable):
+            serving.parse_range('bytes=200-300', 100)
+
+    def test_single_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.data)}')
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(b''.join(response.streaming_content), self.data[100:200])
+
+    def test_multiple_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-3,-4')
+        self.assertEqual(response.status_code, 206)
+        body = b''.join(response.streaming_content)
+        self.assertEqual(int(response['Content-Length']), len(body))
+        self.assertIn(self.data[:4], body)
+        self.assertIn(f'Content-Range: bytes {len(self.data) - 4}-{len(self.data) - 1}/'.encode(), body)
+        self.assertTrue(response['Content-Type'].startswith('multipart/byteranges; boundary='))
+
+    def test_if_range_and_unsatisfiable(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag).status_code, 206)
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"').status_code, 200)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=99999-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.data)}')
+
+    def test_concurrent_streams_per_client_are_bounded(self):
+        with mock.patch.object(serving, 'STREAM_MIN_BYTES', 1), \
+                mock.patch.object(serving, 'limiter', serving.StreamLimiter(1)):
+            first = self.client.get(self.url)
+            self.assertEqual(self.client.get(self.url).status_code, 429)
+            first.close()
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+
+
+class ChunkedUploadTests(TestCase):
+    """Resumable chunked uploads of gallery videos"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        patcher = mock.patch.object(uploads, 'UPLOAD_DIR', os.path.join(self.media_root, 'partial'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.user)
+        self.data = os.urandom(uploads.MIN_CHUNK_SIZE * 2 + 1000)
+
+    def start(self, **extra):
+        payload = {'target': 'gallery.video_file', 'filename': 'talk.mp4', 'size': len(self.data),
+                   'chunk_size': uploads.MIN_CHUNK_SIZE, **extra}
+        response = self.client.post('/api/uploads/', json.dumps(payload), content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()
+
+    def put_chunk(self, session, index, checksum=None):
+        start = index * session['chunk_size']
+        chunk = self.data[start:start + session['chunk_size']]
+        return self.client.put(
+            f"/api/uploads/{session['id']}/chunks/{index}", chunk, content_type='application/octet-stream',
+            headers={'X-Chunk-SHA256': checksum or hashlib.sha256(chunk).hexdigest()}
+        )
+
+    def test_out_of_order_chunks_resume_and_assemble(self):
+        session = self.start(sha256=hashlib.sha256(self.data).hexdigest())
+        self.assertEqual(session['total_chunks'], 3)
+        self.assertEqual(self.put_chunk(session, 2).status_code, 200)
+        self.assertEqual(self.put_chunk(session, 0).status_code, 200)
+
+        status = self.client.get(f"/api/uploads/{session['id']}/").json()
+        self.assertEqual(status['received'], [0, 2])
+        self.assertEqual(self.client.post(f"/api/uploads/{session['id']}/complete/").status_code, 400)
+
+        self.put_chunk(session, 1)
+        response = self.client.post(f"/api/uploads/{session['id']}/complete/")
+        self.assertEqual(response.status_code, 200)
+        name = response.json()['name']
+        self.assertTrue(storage.is_content_addressed(name))
+        with open(os.path.join(self.media_root, name), 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertFalse(os.path.exists(uploads.session_dir(UploadSession.objects.get())))
+
+    def test_bad_chunks_are_rejected(self):
+        session = self.start()
+        self.assertEqual(self.put_chunk(session, 0, checksum='0' * 64).status_code, 400)
+        response = self.client.put(
+            f"/api/uploads/{session['id']}/chunks/0", b'short', content_type='application/octet-stream'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(f"/api/uploads/{session['id']}/").json()['received'], [])
+        self.assertEqual(self.put_chunk(session, 3).status_code, 400)
+
+        self.client.logout()
+        self.assertEqual(self.put_chunk(session, 0).status_code, 403)
+
+    def test_admin_form_attaches_uploaded_video(self):
+        session = self.start()
+        for index in range(session['total_chunks']):
+            self.put_chunk(session, index)
+        name = self.client.post(f"/api/uploads/{session['id']}/complete/").json()['name']
+
+        response = self.client.post('/admin/kambel_admin/galleryitem/add/', {
+            'title': 'Keynote', 'media_type': 'video', 'video_file_upload': session['id'],
+            'order': 0, 'is_active': 'on',
+        })
+        self.assertEqual(response.status_code, 302, getattr(response, 'context', None) and response.context['errors'])
+        item = GalleryItem.objects.get(title='Keynote')
+        self.assertEqual(item.video_file.name, name)
+        self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 1)
+
+    def test_bulk_delete_removes_partial_data(self):
+        sessions = [self.start(), self.start()]
+        for session in sessions:
+            self.put_chunk(session, 0)
+        self.client.post('/admin/kambel_admin/uploadsession/', {
+            'action': 'delete_selected', 'post': 'yes', '_selected_action': [s['id'] for s in sessions],
+        })
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertEqual(os.listdir(uploads.UPLOAD_DIR), [])
+
+    def test_expired_uploads_that_were_never_attached_are_collected(self):
+        names = []
+        for _ in range(2):
+            self.data = os.urandom(uploads.MIN_CHUNK_SIZE)
+            session = self.start()
+            self.put_chunk(session, 0)
+            names.append(self.client.post(f"/api/uploads/{session['id']}/complete/").json()['name'])
+        GalleryItem.objects.create(title='Keynote', media_type='video', video_file=names[0])
+
+        UploadSession.objects.update(updated_at=datetime.now(timezone.utc) - uploads.EXPIRY - timedelta(minutes=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            uploads.purge_expired()
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, names[0])))
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, names[1])))
+
+
+
+class StaticAssetBuildTests(TestCase):
+    """Fingerprinted, precompressed frontend assets"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        override = override_settings(FRONTEND_DIR=self.root)
+        override.enable()
+        self.addCleanup(override.disable)
+        os.makedirs(os.path.join(self.root, 'static', 'css'))
+        os.makedirs(os.path.join(self.root, 'static', 'js'))
+        self.write('static/css/style.css', '/* theme */\n.a  >  .b {\n  color: red;\n  background: url(klogo.jpeg);\n}\n' * 40)
+        self.write('static/js/script.js', "// setup\nconst url = 'http://x//y';  /* note */\nconst re = /a\\/b/g;\nlet n = 4 / 2;\n" * 40)
+        self.write('index.html', '<link rel="stylesheet" href="static/css/style.css"><script src="static/js/script.js"></script>')
+
+    def write(self, name, text):
+        with open(os.path.join(self.root, name), 'w') as f:
+            f.write(text)
+
+    def read(self, name):
+        with open(os.path.join(self.root, name)) as f:
+            return f.read()
+
+    def test_build_minifies_hashes_and_rewrites_pages(self):
+        call_command('build_static_assets', stdout=io.StringIO())
+        manifest = json.loads(self.read('static/dist/manifest.json'))
+        self.assertRegex(manifest['css/style.css'], r'^dist/style\.[0-9a-f]{12}\.css$')
+        css = self.read('static/' + manifest['css/style.css'])
+        self.assertTrue(css.startswith('.a>.b{color:red;background:url(../css/klogo.jpeg)}'))
+        js = self.read('static/' + manifest['js/script.js'])
+        self.assertIn("const url='http://x//y';\nconst re=/a\\/b/g;\nlet n=4 / 2;\n", js)
+        self.assertNotIn('note', js)
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'static', manifest['js/script.js'] + '.gz')))
+        html = self.read('build/pages/index.html')
+        self.assertIn(f'href="static/{manifest["css/style.css"]}"', html)
+        self.assertIn(f'src="static/{manifest["js/script.js"]}"', html)
+        # The tracked page is left alone; the view serves the built copy
+        self.assertIn('href="static/css/style.css"', self.read('index.html'))
+        self.assertIn(manifest['css/style.css'].encode(), self.client.get('/').content)
+
+        # A rebuild after a change keeps the previous files for pages already loaded
+        old_css = manifest['css/style.css']
+        self.write('static/css/style.css', '.c { color: blue }')
+        call_command('build_static_assets', stdout=io.StringIO())
+        new_css = json.loads(self.read('static/dist/manifest.json'))['css/style.css']
+        self.assertNotEqual(new_css, old_css)
+        self.assertIn(new_css, self.read('build/pages/index.html'))
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'static', old_css)))
+
+        # An edited page is served as is until the next build
+        os.utime(os.path.join(self.root, 'index.html'), (2 ** 31, 2 ** 31))
+        self.assertIn(b'href="static/css/style.css"', self.client.get('/').content)
+        os.utime(os.path.join(self.root, 'index.html'))
+
+        call_command('build_static_assets', clean=True, stdout=io.StringIO())
+        self.assertIn(b'href="static/css/style.css"', self.client.get('/').content)
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'static', 'dist')))
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'build', 'pages')))
+
+    def test_precompressed_assets_served_with_immutable_caching(self):
+        call_command('build_static_assets', stdout=io.StringIO())
+        url = '/static/' + json.loads(self.read('static/dist/manifest.json'))['js/script.js']
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/javascript')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        body = gzip.decompress(b''.join(response.streaming_content)).decode()
+        self.assertEqual(body, self.read('static/' + url[len('/static/'):]))
+
+        response = self.client.get(url)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(self.client.get(url + '.gz').status_code, 404)
+
+    def test_optimize_images_builds_icons_and_updates_references(self):
+        logo = make_jpeg(400, 410)
+        for name in ('favicon.ico', 'apple-touch-icon.png', 'css/klogo.jpeg'):
+            with open(os.path.join(self.root, 'static', name), 'wb') as f:
+                f.write(logo)
+        self.write('index.html', '<link rel="apple-touch-icon" href="static/apple-touch-icon.png"><img src="static/css/klogo.jpeg">')
+
+        duplicates, mislabelled, unreadable = assets.find_duplicate_images()
+        self.assertEqual(list(duplicates.values()), [['apple-touch-icon.png', 'favicon.ico', 'css/klogo.jpeg']])
+        self.assertIn(('favicon.ico', 'JPEG'), mislabelled)
+        self.assertEqual(unreadable, [])
+
+        out = io.StringIO()
+        call_command('optimize_static_images', stdout=out)
+        self.assertIn('saved', out.getvalue())
+        manifest = json.loads(self.read('static/dist/manifest.json'))
+        with Image.open(os.path.join(self.root, 'static', manifest['favicon.ico'])) as icon:
+            self.assertEqual(icon.format, 'ICO')
+            self.assertEqual(sorted(icon.info['sizes']), [(16, 16), (32, 32), (48, 48)])
+        with Image.open(os.path.join(self.root, 'static', manifest['apple-touch-icon.png'])) as icon:
+            self.assertEqual((icon.format, icon.size), ('PNG', (180, 180)))
+        with Image.open(os.path.join(self.root, 'static', manifest['css/klogo.jpeg'])) as image:
+            self.assertEqual(image.height, 160)
+        self.assertEqual(
+            self.read('build/pages/index.html'),
+            f'<link rel="apple-touch-icon" href="static/{manifest["apple-touch-icon.png"]}">'
+            f'<img src="static/{manifest["css/klogo.jpeg"]}">'
+        )
+
+    def test_unreadable_image_reported_without_aborting(self):
+        with open(os.path.join(self.root, 'static', 'css', 'broken.png'), 'wb') as f:
+            f.write(make_jpeg(40, 40)[:20])
+
+        duplicates, mislabelled, unreadable = assets.find_duplicate_images()
+        self.assertEqual(unreadable, ['css/broken.png'])
+        self.assertNotIn('css/broken.png', [name for name, actual in mislabelled])
+
+        out = io.StringIO()
+        call_command('optimize_static_images', stdout=out)
+        self.assertIn('css/broken.png is not a readable image', out.getvalue())
+
+    def test_critical_css_inlined_for_above_the_fold_markup(self):
+        self.write('static/css/style.css', (
+            ':root { --green: #22c55e; }\n'
+            '.navbar .nav-link:hover { color: var(--green); }\n'
+            '.hero { animation: fadeIn 1s; background: url(hero.jpg); }\n'
+            '.below-fold, .footer { display: none; }\n'
+            '@media (max-width: 768px) { .hero { padding: 0; } .footer { margin: 0; } }\n'
+            '@media print { .hero { display: none; } }\n'
+            '@keyframes fadeIn { from { opacity: 0; } to { opacity: 1; } }\n'
+            '@keyframes spin { to { transform: rotate(360deg); } }\n'
+        ))
+        self.write('index.html', (
+            '<html><head><link rel="stylesheet" href="static/css/style.css"></head><body>'
+            '<nav class="navbar"><a class="nav-link">Home</a></nav>'
+            '<section class="hero"><h1>Welcome</h1></section>'
+            '<section class="below-fold"></section><footer class="footer"></footer></body></html>'
+        ))
+        call_command('extract_critical_css', stdout=io.StringIO())
+        page = self.read('build/critical/index.html')
+        style = page[page.index('<style>') + 7:page.index('</style>')]
+        self.assertEqual(style, (
+            ':root{--green:#22c55e}.navbar .nav-link:hover{color:var(--green)}'
+            '.hero{animation:fadeIn 1s;background:url(static/css/hero.jpg)}'
+            '@media (max-width:768px){.hero{padding:0}}'
+            '@keyframes fadeIn{from{opacity:0}to{opacity:1}}'
+        ))
+        self.assertIn('<link rel="preload" href="static/css/style.css" as="style"', page)
+        self.assertIn('<noscript><link rel="stylesheet" href="static/css/style.css"></noscript>', page)
+
+        self.assertIn(b'<style>', self.client.get('/').content)
+        # An edited page or stylesheet is served as is until the critical build is redone
+        for source in ('static/css/style.css', 'index.html'):
+            call_command('extract_critical_css', stdout=io.StringIO())
+            self.assertIn(b'<style>', self.client.get('/').content)
+            os.utime(os.path.join(self.root, source), (2 ** 31, 2 ** 31))
+            self.assertNotIn(b'<style>', self.client.get('/').content)
+            os.utime(os.path.join(self.root, source))
+
+
+class StaticExportTests(TestCase):
+    """Static site export and incremental rebuilds"""
+
+    def setUp(self):
+        self.output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output)
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(
+            MEDIA_ROOT=self.media_root, STATIC_EXPORT_DIR=self.output, STATIC_EXPORT_BASE_URL='https://example.com'
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.book = Book.objects.create(title='Career Development Mastery')
+
+    def read_json(self, name):
+        with open(os.path.join(self.output, name)) as f:
+            return json.load(f)
+
+    def test_export_renders_pages_and_apis(self):
+        call_command('export_static', '--no-files', stdout=io.StringIO())
+        self.assertEqual(self.read_json('api/publications/index.json')[0]['title'], 'Career Development Mastery')
+        self.assertEqual(self.read_json('api/site/seo/gallery/index.json')['page'], 'gallery')
+        self.assertTrue(os.path.exists(os.path.join(self.output, 'index.html')))
+        self.assertTrue(os.path.exists(os.path.join(self.output, 'consultancy.html')))
+        self.assertFalse(os.path.exists(os.path.join(self.output, 'api', 'search')))
+
+    def test_every_public_get_api_has_dependencies(self):
+        routes = static_site.api_routes()
+        self.assertIn('api/gallery/', routes)
+        self.assertNotIn('api/newsletter/', routes)
+
+    def test_save_rerenders_only_dependent_outputs(self):
+        static_site.export(files=False)
+        gallery = os.path.join(self.output, 'api', 'gallery', 'index.json')
+        os.utime(gallery, (0, 0))
+
+        with mock.patch.object(static_site, '_executor') as executor, self.captureOnCommitCallbacks(execute=True):
+            self.book.title = 'Leadership Essentials'
+            self.book.save()
+        executor.submit.assert_called_once()
+        # Run what was queued, without the thread
+        written, unchanged, _ = static_site.export(models=executor.submit.call_args[0][1], files=False)
+        self.assertEqual((written, unchanged), (1, 0))
+        self.assertEqual(self.read_json('api/publications/index.json')[0]['title'], 'Leadership Essentials')
+        self.assertEqual(os.path.getmtime(gallery), 0)
+
+
+class FastJsonTests(TestCase):
+    """Shared JSON encoder and response"""
+
+    def test_backends_encode_model_values_identically(self):
+        payload = {
+            'price': Decimal('19.99'),
+            'date': date(2024, 3, 15),
+            'created_at': datetime(2024, 3, 15, 9, 30, 0, 125000, tzinfo=timezone.utc),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'label': gettext_lazy('Home'),
+            'title': 'Économie',
+            1: None,
+        }
+        expected = (
+            '{"price":19.99,"date":"2024-03-15","created_at":"2024-03-15T09:30:00.125000+00:00",'
+            '"id":"12345678-1234-5678-1234-567812345678","label":"Home","title":"Économie","1":null}'
+        ).encode()
+        for backend in fastjson.BACKENDS:
+            self.assertEqual(fastjson.dumps(payload, backend), expected, backend)
+        with self.assertRaises(TypeError):
+            fastjson.dumps({'unknown': object()})
+
+    def test_encoder_imports_without_django(self):
+        # The Flask proxy's environment has no Django
+        code = "import sys; sys.modules['django'] = None; from django_admin.kambel_admin import fastjson; print(fastjson.dumps([1]))"
+        result = subprocess.run(
+            [sys.executable, '-c', code], cwd=settings.BASE_DIR.parent, capture_output=True, text=True
+        )
+        self.assertEqual(result.stdout, "b'[1]'\n", result.stderr)
+
+    def test_response_accepts_pre_encoded_bytes(self):
+        response = json_responses.JsonResponse(fastjson.dumps([1, 2]), status=201)
+        self.assertEqual((response.status_code, response['Content-Type'], response.content), (201, 'application/json', b'[1,2]'))
+        with self.assertRaises(TypeError):
+            json_responses.JsonResponse([1, 2])
+
+    def test_api_encodes_decimals_and_dates_natively(self):
+        Book.objects.create(title='Mastery', price=Decimal('24.50'))
+        Masterclass.objects.create(title='Leadership', date=date(2024, 5, 1), price=Decimal('0.00'), is_upcoming=True)
+        publication = self.client.get('/api/publications/').json()[0]
+        self.assertEqual(publication['price'], 24.5)
+        masterclass = self.client.get('/api/masterclasses/').json()['upcoming'][0]
+        self.assertEqual((masterclass['date'], masterclass['price']), ('2024-05-01', 0))
+
+    def test_streamed_list_matches_full_response(self):
+        for i in range(5):
+            GalleryItem.objects.create(title=f'Item {i}', media_type='video', video_url=f'https://youtu.be/v{i}', order=i)
+        full = self.client.get('/api/gallery/')
+        with mock.patch.object(views, 'STREAM_CHUNK_SIZE', 2):
+            streamed = self.client.get('/api/gallery/?stream=1')
+            chunks = list(streamed.streaming_content)
+        self.assertTrue(streamed.streaming)
+        self.assertEqual(streamed['Content-Type'], 'application/json')
+        # The opening bracket, three batches of at most two items, the closing bracket
+        self.assertEqual((len(chunks), chunks[0], chunks[-1]), (5, b'[', b']'))
+        self.assertEqual(b''.join(chunks), full.content)
+        self.assertEqual(len(json.loads(full.content)), 5)
+        self.assertEqual(b''.join(fastjson.iter_array([])), b'[]')
+
+
+class ContentVersionTests(TestCase):
+    """Content version counter and changes feed"""
+
+    def test_saves_and_deletes_bump_the_version(self):
+        start = versioning.current()
+        book = Book.objects.create(title='Mastery')
+        post = BlogPost.objects.create(title='Planning', content='Goals')
+        book.title = 'Mastery, 2nd edition'
+        book.save()
+        post_id = post.pk
+        post.delete()
+        ContactMessage.objects.create(name='A', email='a@example.com', subject='Hi', message='Hello')
+        self.assertEqual(versioning.current(), start + 4)
+
+        response = self.client.get(f'/api/changes/?since={start}')
+        self.assertEqual(response.json(), {
+            'since': start,
+            'version': start + 4,
+            'changes': {'book': {'upserted': [book.pk], 'deleted': []}, 'blogpost': {'upserted': [], 'deleted': [post_id]}},
+        })
+        # Only what changed after the given version
+        self.assertEqual(self.client.get(f'/api/changes/?since={start + 3}').json()['changes'], {
+            'blogpost': {'upserted': [], 'deleted': [post_id]}
+        })
+        self.assertEqual(self.client.get('/api/changes/?since=-1').status_code, 400)
+
+    def test_rolled_back_writes_leave_the_version_alone(self):
+        start = versioning.current()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Book.objects.create(title='Draft')
+            raise IntegrityError
+        self.assertEqual(versioning.current(), start)
+        self.assertFalse(versioning.changes(start, start + 10))
+
+    def test_api_responses_carry_the_version(self):
+        Category.objects.create(name='Business')
+        response = self.client.get('/api/version/')
+        self.assertEqual(response.json(), {'version': versioning.current()})
+        self.assertEqual(response[versioning.HEADER], str(versioning.current()))
+        self.assertEqual(self.client.get('/api/categories/')[versioning.HEADER], str(versioning.current()))
+        self.assertNotIn(versioning.HEADER, self.client.get('/'))
+
+
+@override_settings(CACHE_INVALIDATION_URLS=['http://proxy.test/internal/cache/invalidate'], CACHE_INVALIDATION_TOKEN='secret')
+class CacheInvalidationTests(TestCase):
+    """Invalidation events pushed to the Flask proxy"""
+
+    def test_committed_changes_publish_their_endpoints_once(self):
+        with mock.patch.object(invalidation, '_executor') as executor, self.captureOnCommitCallbacks(execute=True):
+            Book.objects.create(title='Mastery')
+            Category.objects.create(name='Business')
+        with mock.patch.object(invalidation, 'deliver') as deliver:
+            for call in executor.submit.call_args_list:
+                call.args[0](*call.args[1:])
+        # Both changes go out in one event
+        deliver.assert_called_once_with(
+            'http://proxy.test/internal/cache/invalidate',
+            {'version': versioning.current(), 'endpoints': ['categories/', 'publications/']}
+        )
+
+    def test_token_is_shared_through_a_file_when_not_set(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'cache', 'invalidation.token')
+        with override_settings(CACHE_INVALIDATION_TOKEN='', CACHE_INVALIDATION_TOKEN_FILE=path):
+            token = invalidation.token()
+            self.assertGreaterEqual(len(token), 32)
+            self.assertEqual(invalidation.token(), token)
+        # The proxy reads the same file
+        self.assertEqual(shared_secrets.load_or_create(path), token)
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+        self.assertEqual(os.listdir(os.path.dirname(path)), ['invalidation.token'])
+
+    def test_unreachable_receiver_is_retried_then_given_up(self):
+        event = {'version': 3, 'endpoints': ['blog/']}
+        with mock.patch('urllib.request.urlopen', side_effect=ConnectionRefusedError) as urlopen, \
+                mock.patch('time.sleep') as sleep, self.assertLogs('kambel_admin.invalidation', 'WARNING'):
+            self.assertFalse(invalidation.deliver('http://proxy.test/hook', event))
+        self.assertEqual(urlopen.call_count, len(invalidation.RETRY_DELAYS) + 1)
+        request = urlopen.call_args.args[0]
+        self.assertEqual((request.get_header('X-invalidation-token'), json.loads(request.data)), ('secret', event))
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [0, *invalidation.RETRY_DELAYS])
+
+
+class ApiCacheWarmUpTests(TestCase):
+    """Versioned API response cache and cache warm-up"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_api_served_from_cache_until_content_changes(self):
+        Category.objects.create(name='Business')
+        first = self.client.get('/api/categories/')
+        # Only the content version is read
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/categories/').content, first.content)
+        Category.objects.create(name='Career')
+        self.assertEqual(len(self.client.get('/api/categories/').json()), 2)
+        with self.assertNumQueries(2):
+            # Streamed responses and state endpoints are never cached
+            list(self.client.get('/api/gallery/?stream=1').streaming_content)
+        with self.assertNumQueries(2):
+            self.client.get('/api/version/')
+
+    def test_warm_up_fills_cache_and_reports_readiness(self):
+        with override_settings(WARM_UP_ON_BOOT=True), mock.patch('threading.Thread') as thread:
+            warmup.start()
+        thread.return_value.start.assert_called_once()
+        self.assertEqual(self.client.get('/api/ready/').status_code, 503)
+
+        self.assertIn('api/site/seo/index/', warmup.paths())
+        with mock.patch.object(warmup, 'fetch_local', return_value=200) as fetch_local:
+            results = warmup.warm(max_workers=2)
+        self.assertEqual({call.args[0] for call in fetch_local.call_args_list}, set(warmup.paths()))
+        self.assertEqual(set(results.values()), {200})
+        ready = self.client.get('/api/ready/')
+        self.assertEqual(ready.status_code, 200)
+        self.assertEqual(ready.json()['done'], len(warmup.paths()))
+
+        # A local fetch goes through the middleware, so the response is cached
+        with mock.patch.object(warmup.connection, 'close'):
+            self.assertEqual(warmup.fetch_local('api/blog/'), 200)
+        with self.assertNumQueries(1):
+            self.client.get('/api/blog/', HTTP_HOST='localhost:8000')
+
+
+class ProductionServingTests(TestCase):
+    """Static files without DEBUG, and gunicorn's preload hooks"""
+
+    def test_static_files_served_from_static_root(self):
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root)
+        os.makedirs(os.path.join(static_root, 'css'))
+        with open(os.path.join(static_root, 'css', 'site.css'), 'w') as f:
+            f.write('body { margin: 0 }')
+        with override_settings(STATIC_ROOT=static_root):
+            response = self.client.get('/static/css/site.css', HTTP_RANGE='bytes=0-3')
+            self.assertEqual((response.status_code, b''.join(response.streaming_content)), (206, b'body'))
+            self.assertEqual(response['Cache-Control'], views.STATIC_CACHE_CONTROL)
+            self.assertEqual(self.client.get('/static/css/site.css', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+            self.assertEqual(self.client.get('/static/../settings.py').status_code, 404)
+
+    def test_master_finishes_warm_up_before_forking(self):
+        config = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'gunicorn.conf.py'))
+        self.assertTrue(config['preload_app'])
+        with override_settings(WARM_UP_ON_BOOT=True), mock.patch.object(warmup, 'warm', return_value={}) as warm:
+            warmup.start()
+            with mock.patch('django.db.connections.close_all') as close_all:
+                config['when_ready'](mock.Mock())
+        warm.assert_called_once_with()
+        self.assertFalse(warmup._thread.is_alive())
+        close_all.assert_called_once_with()
+
+
+class SharedCacheTests(TestCase):
+    """SQLite file cache shared between processes"""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'cache.sqlite3')
+        self.cache = sqlite_cache.SharedCache(self.path)
+        self.addCleanup(self.cache.close)
+
+    def test_entries_expire_and_add_only_fills_free_keys(self):
+        self.cache.set('page', {'title': 'Home'}, 60)
+        self.cache.set('stale', b'old', 60)
+        self.assertFalse(self.cache.add('page', 'other'))
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.assertIsNone(self.cache.get('page'))
+            self.assertEqual(self.cache.keys(), [])
+            self.assertTrue(self.cache.add('page', 'new'))
+            self.assertEqual(self.cache.get('page'), 'new')
+            self.assertEqual(self.cache.cull(), 1)
+        self.assertEqual(self.cache.keys(), ['page'])
+
+    def test_imports_without_django(self):
+        # The Flask proxy opens the cache in an environment without Django
+        code = (
+            "import sys; sys.modules['django'] = None; from django_admin.kambel_admin import sqlite_cache, shared_secrets; "
+            "print(sqlite_cache.SharedCache)"
+        )
+        result = subprocess.run([sys.executable, '-c', code], cwd=settings.BASE_DIR.parent, capture_output=True, text=True)
+        self.assertIn('SharedCache', result.stdout, result.stderr)
+
+    def test_threads_share_one_connection(self):
+        # Under gevent every request is a greenlet, and a thread-local connection would be one per request
+        connect = sqlite3.connect
+        with mock.patch.object(sqlite_cache.sqlite3, 'connect', side_effect=connect) as opened:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(lambda i: self.cache.set(f'k{i}', i) or self.cache.incr(f'k{i}'), range(200)))
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual(self.cache.get('k199'), 200)
+
+    def test_processes_share_entries_and_counters(self):
+        self.cache.set('hits', 0)
+        pid = os.fork()
+        if pid == 0:
+            # The child opens its own connection to the same file
+            for _ in range(50):
+                self.cache.incr('hits')
+            self.cache.set('child', b'done')
+            os._exit(0)
+        for _ in range(50):
+            self.cache.incr('hits')
+        os.waitpid(pid, 0)
+        other = sqlite_cache.SharedCache(self.path)
+        self.assertEqual((other.get('hits'), other.get('child')), (100, b'done'))
+        self.assertIsNone(other.incr('missing'))
+        other.close()
+
+    def test_cull_keeps_file_under_max_bytes(self):
+        self.cache.max_bytes = 10000
+        with mock.patch.object(sqlite_cache, 'CULL_EVERY', 10):
+            for i in range(30):
+                self.cache.set(f'entry:{i}', bytes(1000))
+        self.assertLessEqual(self.cache.size(), 10000)
+        # The oldest entries went first
+        self.assertIsNone(self.cache.get('entry:0'))
+        self.assertEqual(self.cache.get('entry:29'), bytes(1000))
+
+    def test_django_backend(self):
+        backend = cache_backends.SQLiteCache(self.path, {'TIMEOUT': 60, 'KEY_PREFIX': 'site'})
+        backend.set('visits', 1)
+        self.assertEqual(backend.incr('visits', 2), 3)
+        with self.assertRaises(ValueError):
+            backend.incr('missing')
+        backend.set_many({'a': [1], 'b': Decimal('2.5')})
+        self.assertEqual(backend.get_many(['a', 'b', 'c']), {'a': [1], 'b': Decimal('2.5')})
+        self.assertEqual(self.cache.keys(), ['site:1:a', 'site:1:b', 'site:1:visits'])
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.assertIsNone(backend.get('visits'))
+
+
+def import_from_root(name):
+    """A module of the Flask proxy, which lives next to django_admin/"""
+    root = str(settings.BASE_DIR.parent)
+    if root not in sys.path:
+        sys.path.append(root)
+    return importlib.import_module(name)
+
+
+class ProxyCacheTests(TestCase):
+    """The Flask proxy's cache of Django API responses"""
+
+    def setUp(self):
+        proxy_cache = import_from_root('proxy_cache')
+        self.cache = proxy_cache.ProxyCache(store=proxy_cache.LocalStore())
+
+    def test_fetch_racing_an_invalidation_is_not_cached(self):
+        # Fetched at version 5, returned after the event for version 6 came in
+        self.cache.invalidate(['publications/'], 6)
+        self.cache.set('publications/', ['OLD'], 5)
+        self.cache.check_version(6)
+        self.assertIsNone(self.cache.get('publications/'))
+
+        # Written just before the event, so set() kept it: the next check drops it
+        self.cache.store.set(self.cache.PREFIX + 'blog/', (['OLD'], 5))
+        self.assertEqual(self.cache.check_version(6), ['blog/'])
+        self.cache.set('publications/', ['NEW'], 6)
+        self.assertEqual(self.cache.get('publications/'), ['NEW'])
+
+    def test_invalidate_matches_url_parameters_and_query_strings(self):
+        for key in ('site/seo/index/', 'site/seo/about/', 'site/config/', 'gallery/', 'gallery/?featured=true', 'blog/'):
+            self.cache.set(key, [key], 1)
+        evicted = self.cache.invalidate(['site/seo/<str:page>/', 'gallery/'], 2)
+        self.assertCountEqual(evicted, ['site/seo/index/', 'site/seo/about/', 'gallery/', 'gallery/?featured=true'])
+        self.assertCountEqual(self.cache.keys(), ['site/config/', 'blog/'])
+        self.assertEqual(self.cache.synced_version, 2)
+
+    def test_check_version_catches_up_with_django(self):
+        self.cache.set('blog/', ['post'], 3)
+        self.cache.set('categories/', ['business'], 5)
+        # Django is ahead: events were missed, so what is older than its version goes
+        self.assertEqual(self.cache.check_version(5), ['blog/'])
+        self.assertEqual(self.cache.synced_version, 5)
+        self.assertEqual(self.cache.get('categories/'), ['business'])
+
+        # Django's database was restored and its counter is lower: everything goes
+        self.assertEqual(self.cache.check_version(2), ['categories/'])
+        self.assertEqual((self.cache.keys(), self.cache.synced_version), ([], 2))
+        self.cache.set('blog/', ['post'], 2)
+        self.assertEqual(self.cache.get('blog/'), ['post'])
+
+
+class ProxyInvalidationTests(TestCase):
+    """Invalidation events received by the Flask proxy"""
+
+    def setUp(self):
+        self.app = import_from_root('app')
+        proxy_cache = import_from_root('proxy_cache')
+        for patcher in (
+            mock.patch.object(self.app, 'api_cache', proxy_cache.ProxyCache(store=proxy_cache.LocalStore())),
+            mock.patch.object(self.app, 'rewarm_executor'),
+            mock.patch.dict(self.app.app.config, CACHE_INVALIDATION_TOKEN='secret'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.proxy = self.app.app.test_client()
+
+    def test_events_without_the_token_are_rejected(self):
+        self.app.api_cache.set('blog/', ['post'], 1)
+        event = {'version': 2, 'endpoints': ['blog/']}
+        for headers in ({}, {'X-Invalidation-Token': ''}, {'X-Invalidation-Token': 'wrong'}):
+            response = self.proxy.post('/internal/cache/invalidate', json=event, headers=headers)
+            self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.app.api_cache.get('blog/'), ['post'])
+
+        response = self.proxy.post('/internal/cache/invalidate', json=event, headers={'X-Invalidation-Token': 'secret'})
+        self.assertEqual(response.get_json(), {'evicted': ['blog/']})
+        self.assertIsNone(self.app.api_cache.get('blog/'))
+        self.app.rewarm_executor.submit.assert_called_once_with(self.app.fetch_from_django_api, 'blog/', refresh=True)
+
+
+@skipUnless(importlib.util.find_spec('aiohttp'), 'aiohttp is not installed')
+class AsyncProxyTests(TestCase):
+    """The asyncio proxy, async_app.py, with Django replaced by canned responses"""
+
+    def setUp(self):
+        self.async_app = import_from_root('async_app')
+        proxy_cache = import_from_root('proxy_cache')
+        self.cache = proxy_cache.ProxyCache(store=proxy_cache.LocalStore())
+        self.cache.needs_check = lambda: False
+        self.upstream = {}
+        self.fetched = []
+
+        async def fetch_upstream(session, endpoint):
+            self.fetched.append(endpoint)
+            await asyncio.sleep(0.05)
+            return self.upstream.get(endpoint)
+
+        for patcher in (
+            mock.patch.object(self.async_app, 'api_cache', self.cache),
+            mock.patch.object(self.async_app, '_fetch_upstream', fetch_upstream),
+            mock.patch.dict(self.async_app.flask_app.config, CACHE_INVALIDATION_TOKEN='secret'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def proxy(self):
+        from aiohttp.test_utils import TestClient, TestServer
+        return TestClient(TestServer(self.async_app.create_app()))
+
+    async def test_page_bundle_falls_back_to_defaults(self):
+        # Django is down: every endpoint of the bundle returns None
+        async with self.proxy() as client:
+            response = await client.get('/api/site/bundle/about')
+            self.assertEqual(response.status, 200)
+            bundle = await response.json()
+        self.assertEqual(bundle['social_media'], [])
+        self.assertEqual(bundle['hero'], self.async_app.HERO_DEFAULTS)
+        self.assertEqual(bundle['config']['site_name'], 'Kambel Consult')
+        self.assertEqual(bundle['seo']['title'], 'Kambel Consult - About')
+        self.assertCountEqual(self.fetched, [
+            'site/config/', 'site/hero/', 'site/contact-info/', 'site/social-media/', 'site/seo/about/'
+        ])
+
+    async def test_concurrent_requests_share_one_fetch(self):
+        self.upstream['blog/'] = [{'id': 1, 'title': 'Planning', 'category': 'Career'}]
+        async with self.proxy() as client:
+            responses = await asyncio.gather(*(client.get('/api/blog') for _ in range(10)))
+            bodies = [await response.json() for response in responses]
+        self.assertEqual(self.fetched, ['blog/'])
+        self.assertEqual({body[0]['title'] for body in bodies}, {'Planning'})
+
+    async def test_invalidation_events_need_the_token(self):
+        self.cache.set('blog/', [{'title': 'Planning'}], 1)
+        event = {'version': 2, 'endpoints': ['blog/']}
+        async with self.proxy() as client:
+            for headers in ({}, {'X-Invalidation-Token': 'wrong'}):
+                response = await client.post('/internal/cache/invalidate', json=event, headers=headers)
+                self.assertEqual(response.status, 403)
+            self.assertEqual(self.cache.get('blog/'), [{'title': 'Planning'}])
+
+            response = await client.post('/internal/cache/invalidate', json=event, headers={'X-Invalidation-Token': 'secret'})
+            self.assertEqual(await response.json(), {'evicted': ['blog/']})
+            self.assertIsNone(self.cache.get('blog/'))
+            # Fetched again in the background
+            await asyncio.sleep(0.1)
+        self.assertEqual(self.fetched, ['blog/'])
+
+
+class QueryCacheTests(TransactionTestCase):
+    """Query results cached per table generation; transactional so atomic blocks commit for real"""
+
+    def setUp(self):
+        querycache.clear()
+        self.addCleanup(querycache.clear)
+
+    def upcoming(self):
+        return list(Masterclass.objects.filter(is_upcoming=True, is_active=True).values_list('title', flat=True))
+
+    def test_results_cached_until_their_tables_are_written(self):
+        Masterclass.objects.create(title='Leadership', description='-', date=date(2025, 3, 1), duration='1 Day')
+        def lookups():
+            return self.upcoming(), Masterclass.objects.filter(is_active=True).exists(), Masterclass.objects.get(title='Leadership')
+
+        with self.assertNumQueries(3):
+            lookups()
+        with self.assertNumQueries(0):
+            upcoming, exists, masterclass = lookups()
+        self.assertEqual((upcoming, exists), (['Leadership'], True))
+        # Instances are copies
+        masterclass.title = 'Changed'
+        self.assertEqual(Masterclass.objects.get(title='Leadership').title, 'Leadership')
+
+        # Any write to the table counts, including ones that send no signals
+        Masterclass.objects.filter(pk=masterclass.pk).update(is_upcoming=False)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.upcoming(), [])
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE kambel_admin_masterclass SET is_upcoming = 1')
+        self.assertEqual(self.upcoming(), ['Leadership'])
+
+        # Joined tables count as well
+        Book.objects.create(title='Mastery', category=Category.objects.create(name='Business'))
+        self.assertEqual(Category.objects.filter(book__title='Mastery').count(), 1)
+        Book.objects.update(category=None)
+        self.assertEqual(Category.objects.filter(book__title='Mastery').count(), 0)
+
+        stats = querycache.stats()
+        self.assertGreaterEqual(stats['hits'], 4)
+        self.assertEqual(stats['hit_rate'], round(stats['hits'] / (stats['hits'] + stats['misses']), 3))
+
+    def test_writes_inside_transactions_invalidate_on_commit(self):
+        self.assertEqual(self.upcoming(), [])
+        with transaction.atomic():
+            Masterclass.objects.create(title='Leadership', description='-', date=date(2025, 3, 1), duration='1 Day')
+            # The transaction sees its own writes; nothing is served or stored meanwhile
+            with self.assertNumQueries(1):
+                self.assertEqual(self.upcoming(), ['Leadership'])
+        self.assertEqual(self.upcoming(), ['Leadership'])
+        with self.assertNumQueries(0):
+            self.upcoming()
+
+        # A rolled back write changes nothing, so the cached result stays
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Masterclass.objects.create(title='Sales', description='-', date=date(2025, 4, 1), duration='1 Day')
+            Category.objects.create(name='Dup')
+            Category.objects.create(name='Dup')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.upcoming(), ['Leadership'])
+        self.assertFalse(Category.objects.exists())
+
+    def test_memory_is_bounded(self):
+        for i in range(20):
+            Masterclass.objects.create(title=f'Class {i}', description='x' * 500, date=date(2025, 3, 1), duration='1 Day')
+        with override_settings(QUERY_CACHE_MAX_BYTES=4000):
+            for i in range(20):
+                Masterclass.objects.get(title=f'Class {i}')
+            stats = querycache.stats()
+            self.assertLessEqual(stats['bytes'], 4000)
+            self.assertGreater(stats['evictions'], 0)
+            # Too big to keep at all
+            list(Masterclass.objects.all())
+            self.assertLessEqual(querycache.stats()['bytes'], 4000)
+        with override_settings(QUERY_CACHE_MAX_BYTES=0), self.assertNumQueries(2):
+            Masterclass.objects.get(title='Class 0')
+            Masterclass.objects.get(title='Class 0')
@@ -0,0 +1,183 @@
+"""
+Resumable chunked uploads for large media files
+
+A session fixes the file size and chunk size up front. Each chunk is PUT
+separately with its SHA-256, verified while it is streamed into its slot of
+a sparse file, and recorded by a marker file, so chunks can arrive in any
+order, in parallel, and be retried after a dropped connection. Completing
+the session moves the assembled file into media storage. Nothing is held
+in memory beyond one read buffer, whatever the file size.
+"""
+import hashlib
+import os
+import shutil
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from . import storage
+from .models import GalleryItem, UploadSession
+
+
+UPLOAD_TARGETS = {
+    'gallery.video_file': {
+        'field': GalleryItem._meta.get_field('video_file'),
+        'extensions': {'.mp4', '.webm', '.mov', '.m4v', '.ogv'},
+    },
+}
+
+UPLOAD_DIR = str(getattr(settings, 'CHUNKED_UPLOAD_DIR', settings.BASE_DIR / 'cache' / 'uploads'))
+MAX_UPLOAD_BYTES = getattr(settings, 'CHUNKED_UPLOAD_MAX_BYTES', 2 * 1024 ** 3)
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 32 * 1024 * 1024
+EXPIRY = timedelta(seconds=getattr(settings, 'CHUNKED_UPLOAD_EXPIRY', 24 * 3600))
+READ_SIZE = 64 * 1024
+
+
+class UploadError(ValueError):
+    """Raised for requests that can't be applied to an upload session"""
+
+
+class AssembledFile(File):
+    """The finished upload; storages may move it into place instead of copying"""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def session_dir(session):
+    return os.path.join(UPLOAD_DIR, str(session.id))
+
+
+def data_path(session):
+    return os.path.join(session_dir(session), 'data')
+
+
+def total_chunks(session):
+    return max(1, -(-session.size // session.chunk_size))
+
+
+def chunk_span(session, index):
+    """(offset, length) of a chunk"""
+    if not 0 <= index < total_chunks(session):
+        raise UploadError(f'Chunk index {index} is out of range')
+    offset = index * session.chunk_size
+    return offset, min(session.chunk_size, session.size - offset)
+
+
+def received_chunks(session):
+    try:
+        return sorted(int(name) for name in os.listdir(os.path.join(session_dir(session), 'chunks')))
+    except FileNotFoundError:
+        return []
+
+
+def status(session):
+    return {
+        'id': str(session.id),
+        'filename': session.filename,
+        'size': session.size,
+        'chunk_size': session.chunk_size,
+        'total_chunks': total_chunks(session),
+        'received': received_chunks(session),
+        'complete': bool(session.stored_name),
+        'name': session.stored_name or None,
+    }
+
+
+def create_session(user, target, filename, size, chunk_size=None, sha256=''):
+    """Validate an upload request and prepare its sparse data file"""
+    if target not in UPLOAD_TARGETS:
+        raise UploadError(f'Unknown upload target "{target}"')
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in UPLOAD_TARGETS[target]['extensions']:
+        raise UploadError(f'{extension or "Files without an extension"} not allowed for {target}')
+    if not 0 < size <= MAX_UPLOAD_BYTES:
+        raise UploadError(f'Size must be between 1 byte and {MAX_UPLOAD_BYTES} bytes')
+    chunk_size = min(max(chunk_size or DEFAULT_CHUNK_SIZE, MIN_CHUNK_SIZE), MAX_CHUNK_SIZE)
+    if sha256 and (len(sha256) != 64 or not all(c in '0123456789abcdef' for c in sha256.lower())):
+        raise UploadError('sha256 must be a hex digest')
+
+    purge_expired()
+    session = UploadSession.objects.create(
+        target=target, filename=os.path.basename(filename), size=size, chunk_size=chunk_size,
+        sha256=sha256.lower(), created_by=user
+    )
+    os.makedirs(os.path.join(session_dir(session), 'chunks'))
+    with open(data_path(session), 'wb') as f:
+        f.truncate(size)
+    return session
+
+
+def write_chunk(session, index, stream, sha256=''):
+    """Stream one chunk into place, verifying its length and optional SHA-256"""
+    if session.stored_name:
+        raise UploadError('Upload is already complete')
+    offset, length = chunk_span(session, index)
+    digest = hashlib.sha256()
+    written = 0
+    fd = os.open(data_path(session), os.O_WRONLY)
+    try:
+        while written <= length:
+            data = stream.read(min(READ_SIZE, length + 1 - written))
+            if not data:
+                break
+            if written + len(data) > length:
+                raise UploadError(f'Chunk {index} is larger than {length} bytes')
+            os.pwrite(fd, data, offset + written)
+            digest.update(data)
+            written += len(data)
+    finally:
+        os.close(fd)
+    if written != length:
+        raise UploadError(f'Chunk {index} has {written} bytes, expected {length}')
+    if sha256 and digest.hexdigest() != sha256.lower():
+        raise UploadError(f'Checksum mismatch for chunk {index}')
+    with open(os.path.join(session_dir(session), 'chunks', str(index)), 'w') as marker:
+        marker.write(digest.hexdigest())
+    # Keeps an upload that is still making progress from being purged
+    UploadSession.objects.filter(pk=session.pk).update(updated_at=timezone.now())
+
+
+def complete(session):
+    """Move the assembled file into media storage and return its storage name"""
+    if session.stored_name:
+        return session.stored_name
+    missing = sorted(set(range(total_chunks(session))) - set(received_chunks(session)))
+    if missing:
+        raise UploadError(f'{len(missing)} chunk(s) missing, first is {missing[0]}')
+    if session.sha256:
+        digest = hashlib.sha256()
+        with open(data_path(session), 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        if digest.hexdigest() != session.sha256:
+            raise UploadError('Checksum mismatch for the assembled file')
+
+    field = UPLOAD_TARGETS[session.target]['field']
+    with open(data_path(session), 'rb') as f:
+        name = field.generate_filename(None, session.filename)
+        session.stored_name = default_storage.save(name, AssembledFile(f, name=session.filename))
+    session.save(update_fields=['stored_name', 'updated_at'])
+    shutil.rmtree(session_dir(session), ignore_errors=True)
+    return session.stored_name
+
+
+def abort(session):
+    """Drop a session with its partial data, and the file it stored unless a row uses it"""
+    shutil.rmtree(session_dir(session), ignore_errors=True)
+    session.delete()
+    if session.stored_name:
+        transaction.on_commit(lambda: storage.collect(session.stored_name))
+
+
+def purge_expired():
+    """Drop sessions that were started or finished more than EXPIRY ago, with
+    the completed uploads that were never attached to a gallery item"""
+    for session in UploadSession.objects.filter(updated_at__lt=timezone.now() - EXPIRY):
+        abort(session)
@@ -11,11 +11,11 @@ from django.template import loader
 from django.shortcuts import render
 from django.conf import settings
 import os
-from . import views
+from . import critical, views
 
 def serve_html(request, page_name):
-    """Serve HTML pages"""
-    template_path = os.path.join(settings.BASE_DIR.parent.parent, f'{page_name}.html')
+    """Serve HTML pages, with critical CSS inlined when extract_critical_css has run"""
+    template_path = critical.page_path(page_name)
     
     if os.path.exists(template_path):
         try:
@@ -49,6 +49,22 @@ urlpatterns = [
     path('api/site/terms-conditions/', views.TermsConditionsAPIView.as_view(), name='terms_conditions_api'),
     path('api/gallery/', views.GalleryAPIView.as_view(), name='gallery_api'),
     path('api/masterclass/register/', views.MasterclassRegistrationAPIView.as_view(), name='masterclass_register_api'),
+    path('api/search/', views.SearchAPIView.as_view(), name='search_api'),
+    path('api/suggest/', views.SuggestAPIView.as_view(), name='suggest_api'),
+    path('api/version/', views.ContentVersionAPIView.as_view(), name='content_version_api'),
+    path('api/changes/', views.ContentChangesAPIView.as_view(), name='content_changes_api'),
+    path('api/ready/', views.ReadyAPIView.as_view(), name='ready_api'),
+    path('api/uploads/', views.UploadSessionsAPIView.as_view(), name='upload_sessions_api'),
+    path('api/uploads/<uuid:session_id>/', views.UploadSessionAPIView.as_view(), name='upload_session_api'),
+    path('api/uploads/<uuid:session_id>/chunks/<int:index>', views.UploadChunkAPIView.as_view(), name='upload_chunk_api'),
+    path('api/uploads/<uuid:session_id>/complete/', views.UploadCompleteAPIView.as_view(), name='upload_complete_api'),
+    
+    # Fingerprinted frontend assets from build_static_assets
+    path('static/dist/<path:path>', views.BuiltAssetView.as_view(), name='built_asset'),
+    
+    # Uploaded media; resized images are matched before plain files
+    path('media/resize/<int:width>x<int:height>/<path:path>', views.ResizedImageView.as_view(), name='resized_image'),
+    path('media/<path:path>', views.MediaFileView.as_view(), name='media_file'),
     
     # Frontend pages
     path('', lambda request: serve_html(request, 'index'), name='home'),
@@ -68,7 +84,9 @@ urlpatterns = [
     path('terms-conditions', lambda request: serve_html(request, 'terms-conditions')),
 ]
 
-# Serve media files in development
+# Serve static files (media is served by MediaFileView above): through the
+# development helper, or from STATIC_ROOT with sendfile in production
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+else:
+    urlpatterns.append(path('static/<path:path>', views.StaticFileView.as_view(), name='static_file'))
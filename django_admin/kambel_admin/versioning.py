@@ -0,0 +1,82 @@
+"""
+Content version and changes feed
+
+Every save or delete of a model behind a public API (the models listed in
+static_site.API_OUTPUTS) bumps one counter and stamps the object's
+ContentChange row with the new value, inside the transaction of the write
+when there is one. The counter row is updated before it is read, so writers
+queue on its lock and versions follow commit order.
+
+A client that has seen version N asks for changes(N, current()) and gets the
+ids saved or deleted since, per model, instead of fetching every collection
+again. Deleted objects keep their row as a tombstone, so any earlier version
+can be caught up from.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import static_site
+from .models import ContentChange, ContentVersion
+
+
+HEADER = 'X-Content-Version'
+
+PUBLIC_MODELS = {model for models in static_site.API_OUTPUTS.values() for model in models}
+
+
+def current():
+    """The content version: the number of changes recorded so far"""
+    return ContentVersion.objects.filter(pk=1).values_list('value', flat=True).first() or 0
+
+
+def state():
+    """(content version, time it was reached)
+
+    The version alone starts over when the database is recreated or
+    restored; together with the time it identifies the content for good,
+    e.g. in cache keys that outlive the database.
+    """
+    return ContentVersion.objects.filter(pk=1).values_list('value', 'changed_at').first() or (0, None)
+
+
+def bump(model, object_id, deleted=False):
+    """Record a change to an object; returns the new content version"""
+    with transaction.atomic():
+        if not ContentVersion.objects.filter(pk=1).update(value=F('value') + 1, changed_at=timezone.now()):
+            ContentVersion.objects.create(pk=1, value=1, changed_at=timezone.now())
+        version = current()
+        ContentChange.objects.update_or_create(
+            model=model._meta.model_name, object_id=object_id,
+            defaults={'version': version, 'deleted': deleted}
+        )
+    return version
+
+
+def bump_many(model, object_ids, deleted=False):
+    """Record changes to several objects with one update of the counter; returns
+    the new content version, which every one of their ContentChange rows gets"""
+    object_ids = set(object_ids)
+    if not object_ids:
+        return current()
+    with transaction.atomic():
+        now = timezone.now()
+        if not ContentVersion.objects.filter(pk=1).update(value=F('value') + len(object_ids), changed_at=now):
+            ContentVersion.objects.create(pk=1, value=len(object_ids), changed_at=now)
+        version = current()
+        ContentChange.objects.bulk_create(
+            [ContentChange(model=model._meta.model_name, object_id=pk, version=version, deleted=deleted) for pk in object_ids],
+            update_conflicts=True, unique_fields=['model', 'object_id'], update_fields=['version', 'deleted']
+        )
+    return version
+
+
+def changes(since, until):
+    """{model name: {'upserted': [ids], 'deleted': [ids]}} of the objects changed
+    after version since, up to and including version until"""
+    feed = {}
+    rows = ContentChange.objects.filter(version__gt=since, version__lte=until).values_list('model', 'object_id', 'deleted')
+    for model, object_id, deleted in rows:
+        entry = feed.setdefault(model, {'upserted': [], 'deleted': []})
+        entry['deleted' if deleted else 'upserted'].append(object_id)
+    return feed
@@ -1,48 +1,76 @@
 """
 API views for Kambel Consult frontend integration
 """
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils.decorators import method_decorator
 from django.utils import timezone
 from django.views import View
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils._os import safe_join
 import json
+import mimetypes
+import os
+from . import assets, images, media, search, serving, storage, suggest, uploads, versioning, warmup
+from .json_responses import JsonResponse, StreamingJsonResponse
 from .models import (
     Category, Book, ConsultancyService, ServiceFeature,
     BlogPost, ContactMessage, NewsletterSubscription, SiteConfig, HeroConfig, AboutConfig,
     ProfessionalJourneyItem, EducationQualification, Achievement, SpeakingEngagement,
-    Masterclass, SocialMediaLink, PrivacyPolicy, TermsConditions, GalleryItem, MasterclassRegistration
+    Masterclass, SocialMediaLink, PrivacyPolicy, TermsConditions, GalleryItem, MasterclassRegistration,
+    UploadSession
 )
 
 
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+STATIC_CACHE_CONTROL = 'public, max-age=3600'
+# Rows fetched and encoded at a time by streamed list responses
+STREAM_CHUNK_SIZE = 200
+
+
+def json_list(request, queryset, serialize):
+    """JSON array of serialize(obj) for each object of queryset
+
+    With ?stream=1 the rows are fetched, encoded and sent STREAM_CHUNK_SIZE at
+    a time, so memory stays flat however large the table is and the first
+    bytes go out before the last row is read. The body is the same either way.
+    """
+    if request.GET.get('stream', '').lower() in ('1', 'true'):
+        objects = queryset.iterator(chunk_size=STREAM_CHUNK_SIZE)
+        return StreamingJsonResponse((serialize(obj) for obj in objects), batch_size=STREAM_CHUNK_SIZE)
+    return JsonResponse([serialize(obj) for obj in queryset], safe=False)
+
+
 class PublicationsAPIView(View):
     """API endpoint for publications"""
     
     def get(self, request):
-        books = Book.objects.filter(is_active=True)
-        publications = []
-        
-        for book in books:
-            cover_image_url = None
-            if book.cover_image:
-                # Build absolute URL for media files
-                cover_image_url = request.build_absolute_uri(book.cover_image.url)
-            
-            publication = {
-                'id': book.id,
-                'title': book.title,
-                'author': book.author,
-                'description': book.description,
-                'pages': book.pages,
-                'price': float(book.price),
-                'cover_image_url': cover_image_url,
-                'purchase_link': book.purchase_link,
-                'category': book.category.name if book.category else None
-            }
-            publications.append(publication)
-        
-        return JsonResponse(publications, safe=False)
+        books = Book.objects.filter(is_active=True).select_related('category')
+        return json_list(request, books, lambda book: self.serialize(request, book))
+
+    def serialize(self, request, book):
+        cover_image_url = None
+        if book.cover_image:
+            # Build absolute URL for media files
+            cover_image_url = request.build_absolute_uri(book.cover_image.url)
+        
+        return {
+            'id': book.id,
+            'title': book.title,
+            'author': book.author,
+            'description': book.description,
+            'pages': book.pages,
+            'price': book.price,
+            'cover_image_url': cover_image_url,
+            'cover_image_variants': images.variant_map(request, book, 'cover_image'),
+            'cover_image_width': book.cover_image_width,
+            'cover_image_height': book.cover_image_height,
+            'cover_image_placeholder': book.cover_image_placeholder or None,
+            'purchase_link': book.purchase_link,
+            'category': book.category.name if book.category else None
+        }
 
 
 class CategoriesAPIView(View):
@@ -81,6 +109,10 @@ class ConsultancyAPIView(View):
                 'service_type': service.service_type,
                 'description': service.description,
                 'cover_image_url': cover_image_url,
+                'cover_image_variants': images.variant_map(request, service, 'cover_image'),
+                'cover_image_width': service.cover_image_width,
+                'cover_image_height': service.cover_image_height,
+                'cover_image_placeholder': service.cover_image_placeholder or None,
                 'icon': service.icon,
                 'features': []
             }
@@ -118,7 +150,8 @@ class BlogAPIView(View):
                 'excerpt': post.excerpt,
                 'author': post.author,
                 'date': post.created_at.strftime('%B %d, %Y'),
-                'cover_image_url': cover_image_url
+                'cover_image_url': cover_image_url,
+                'cover_image_variants': images.variant_map(request, post, 'cover_image')
             })
         
         return JsonResponse(blog_data, safe=False)
@@ -272,6 +305,7 @@ class HeroConfigAPIView(View):
                 'profile_name': 'Moses Agbesi Katamani',
                 'profile_title': 'Chief Executive Officer',
                 'profile_picture_url': None,
+                'profile_picture_variants': None,
                 'years_experience': '15+',
                 'years_label': 'Years Experience',
                 'years_description': 'Professional Development',
@@ -294,6 +328,7 @@ class HeroConfigAPIView(View):
             'profile_name': hero_config.profile_name,
             'profile_title': hero_config.profile_title,
             'profile_picture_url': profile_picture_url,
+            'profile_picture_variants': images.variant_map(request, hero_config, 'profile_picture'),
             'years_experience': hero_config.years_experience,
             'years_label': hero_config.years_label,
             'years_description': hero_config.years_description,
@@ -323,6 +358,7 @@ class AboutConfigAPIView(View):
                 'profile_name': 'Moses Agbesi Katamani',
                 'profile_title': 'Founder & CEO, Kambel Consult',
                 'profile_picture_url': None,
+                'profile_picture_variants': None,
                 'bio_summary': 'A visionary leader and expert consultant with over 15 years of experience in education, career development, and business advisory services.',
                 'tags': ['Education Expert', 'Career Coach', 'Business Advisor', 'Author', 'Speaker'],
                 'philosophy_quote': 'Education is the foundation of all progress. Through knowledge, guidance, and strategic thinking, we can unlock the potential within every individual and organization.',
@@ -395,6 +431,7 @@ class AboutConfigAPIView(View):
             'profile_name': about_config.profile_name,
             'profile_title': about_config.profile_title,
             'profile_picture_url': profile_picture_url,
+            'profile_picture_variants': images.variant_map(request, about_config, 'profile_picture'),
             'bio_summary': about_config.bio_summary,
             'tags': tags,
             'philosophy_quote': about_config.philosophy_quote,
@@ -438,13 +475,17 @@ class MasterclassesAPIView(View):
                 'id': mc.id,
                 'title': mc.title,
                 'description': mc.description,
-                'date': mc.date.strftime('%Y-%m-%d'),
+                'date': mc.date,
                 'instructor': mc.instructor,
                 'duration': mc.duration,
-                'price': float(mc.price) if mc.price else 0.00,
+                'price': mc.price,
                 'total_seats': mc.total_seats,
                 'seats_available': mc.seats_available,
                 'cover_image_url': cover_image_url,
+                'cover_image_variants': images.variant_map(request, mc, 'cover_image'),
+                'cover_image_width': mc.cover_image_width,
+                'cover_image_height': mc.cover_image_height,
+                'cover_image_placeholder': mc.cover_image_placeholder or None,
                 'video_url': mc.video_url
             }
         
@@ -482,7 +523,7 @@ class PrivacyPolicyAPIView(View):
             'title': policy.title,
             'subtitle': policy.subtitle,
             'content': policy.content,
-            'last_updated': policy.last_updated.strftime('%Y-%m-%d') if policy.last_updated else None
+            'last_updated': policy.last_updated
         })
 
 
@@ -503,7 +544,7 @@ class TermsConditionsAPIView(View):
             'title': terms.title,
             'subtitle': terms.subtitle,
             'content': terms.content,
-            'last_updated': terms.last_updated.strftime('%Y-%m-%d') if terms.last_updated else None
+            'last_updated': terms.last_updated
         })
 
 
@@ -516,48 +557,50 @@ class GalleryAPIView(View):
         gallery_items = GalleryItem.objects.filter(is_active=True)
         if featured_only:
             gallery_items = gallery_items.filter(is_featured=True)
-        
-        items = []
-        for item in gallery_items:
-            media_url = None
-            thumbnail_url = None
-            
-            if item.media_type == 'image' and item.image:
-                media_url = request.build_absolute_uri(item.image.url)
-                thumbnail_url = request.build_absolute_uri(item.image.url)
-            elif item.media_type == 'video':
-                if item.video_url:
-                    media_url = item.video_url
-                elif item.video_file:
-                    media_url = request.build_absolute_uri(item.video_file.url)
-                
-                if item.thumbnail:
-                    thumbnail_url = request.build_absolute_uri(item.thumbnail.url)
-                elif item.video_url:
-                    # Generate YouTube thumbnail automatically
-                    if 'youtube.com' in item.video_url or 'youtu.be' in item.video_url:
-                        # Extract video ID
-                        if 'youtu.be' in item.video_url:
-                            video_id = item.video_url.split('/')[-1].split('?')[0]
-                        else:
-                            video_id = item.video_url.split('v=')[-1].split('&')[0]
-                        if video_id:
-                            thumbnail_url = f'https://img.youtube.com/vi/{video_id}/maxresdefault.jpg'
+        return json_list(request, gallery_items, lambda item: self.serialize(request, item))
+
+    def serialize(self, request, item):
+        media_url = None
+        thumbnail_url = None
+        
+        if item.media_type == 'image' and item.image:
+            media_url = request.build_absolute_uri(item.image.url)
+            thumbnail_url = request.build_absolute_uri(item.image.url)
+        elif item.media_type == 'video':
+            if item.video_url:
+                media_url = item.video_url
+            elif item.video_file:
+                media_url = request.build_absolute_uri(item.video_file.url)
             
-            items.append({
-                'id': item.id,
-                'title': item.title,
-                'caption': item.caption,
-                'description': item.description,
-                'media_type': item.media_type,
-                'media_url': media_url,
-                'thumbnail_url': thumbnail_url,
-                'is_featured': item.is_featured,
-                'order': item.order,
-                'created_at': item.created_at.strftime('%Y-%m-%d') if item.created_at else None
-            })
-        
-        return JsonResponse(items, safe=False)
+            if item.thumbnail:
+                thumbnail_url = request.build_absolute_uri(item.thumbnail.url)
+            elif item.video_url:
+                # Generate YouTube thumbnail automatically
+                if 'youtube.com' in item.video_url or 'youtu.be' in item.video_url:
+                    # Extract video ID
+                    if 'youtu.be' in item.video_url:
+                        video_id = item.video_url.split('/')[-1].split('?')[0]
+                    else:
+                        video_id = item.video_url.split('v=')[-1].split('&')[0]
+                    if video_id:
+                        thumbnail_url = f'https://img.youtube.com/vi/{video_id}/maxresdefault.jpg'
+        
+        return {
+            'id': item.id,
+            'title': item.title,
+            'caption': item.caption,
+            'description': item.description,
+            'media_type': item.media_type,
+            'media_url': media_url,
+            'thumbnail_url': thumbnail_url,
+            'image_variants': images.variant_map(request, item, 'image') if item.media_type == 'image' else None,
+            'image_width': item.image_width,
+            'image_height': item.image_height,
+            'image_placeholder': item.image_placeholder or None,
+            'is_featured': item.is_featured,
+            'order': item.order,
+            'created_at': item.created_at.date() if item.created_at else None
+        }
 
 
 class MasterclassRegistrationAPIView(View):
@@ -636,3 +679,251 @@ class SEOContentAPIView(View):
             'og_description': 'Professional consulting and training services',
             'og_image_url': None
         })
+
+
+
+class SearchAPIView(View):
+    """API endpoint for full-text search across public content"""
+    
+    def get(self, request):
+        query = request.GET.get('q', '').strip()
+        content_types = [t.strip() for t in request.GET.get('type', '').split(',') if t.strip()]
+        unknown = [t for t in content_types if t not in search.PUBLIC_TYPES]
+        if unknown:
+            return JsonResponse({'error': f"Unknown content type: {', '.join(unknown)}"}, status=400)
+        
+        try:
+            limit = min(max(int(request.GET.get('limit', 20)), 1), 50)
+            offset = max(int(request.GET.get('offset', 0)), 0)
+        except ValueError:
+            return JsonResponse({'error': 'limit and offset must be integers'}, status=400)
+        
+        if not search.is_available():
+            return JsonResponse({'error': 'Search is not available'}, status=503)
+        
+        results = search.search(
+            query,
+            content_types=content_types or search.PUBLIC_TYPES,
+            limit=limit,
+            offset=offset,
+            prefix=request.GET.get('prefix', 'true').lower() != 'false'
+        )
+        
+        return JsonResponse({
+            'query': query,
+            'count': results['count'],
+            'results': results['results']
+        })
+
+
+
+class SuggestAPIView(View):
+    """API endpoint for typeahead title suggestions"""
+    
+    def get(self, request):
+        query = request.GET.get('q', '')
+        content_types = [t.strip() for t in request.GET.get('type', '').split(',') if t.strip()]
+        unknown = [t for t in content_types if t not in suggest.SUGGEST_SOURCES]
+        if unknown:
+            return JsonResponse({'error': f"Unknown content type: {', '.join(unknown)}"}, status=400)
+        
+        try:
+            limit = min(max(int(request.GET.get('limit', 8)), 1), 20)
+        except ValueError:
+            return JsonResponse({'error': 'limit must be an integer'}, status=400)
+        
+        return JsonResponse({
+            'query': query,
+            'suggestions': suggest.suggest(query, limit=limit, content_types=content_types or None)
+        })
+
+
+class ContentVersionAPIView(View):
+    """API endpoint for the content version, bumped by every change to public content"""
+
+    def get(self, request):
+        return JsonResponse({'version': versioning.current()})
+
+
+class ContentChangesAPIView(View):
+    """API endpoint listing the objects saved or deleted since a content version"""
+
+    def get(self, request):
+        try:
+            since = int(request.GET.get('since', 0))
+        except ValueError:
+            since = -1
+        if since < 0:
+            return JsonResponse({'error': 'since must be a non-negative integer'}, status=400)
+        version = versioning.current()
+        return JsonResponse({'since': since, 'version': version, 'changes': versioning.changes(since, version)})
+
+
+class ReadyAPIView(View):
+    """Readiness check for load balancers: 503 until the boot-time cache warm-up is done"""
+
+    def get(self, request):
+        status = warmup.status()
+        return JsonResponse(status, status=200 if status['ready'] else 503)
+
+
+class ResizedImageView(View):
+    """Serve a media image resized to one of the allowed sizes"""
+    
+    def get(self, request, width, height, path):
+        fmt = media.preferred_format(request)
+        try:
+            cached, etag = media.get_derivative(path, width, height, fmt)
+        except media.ResizeError as e:
+            return HttpResponse(str(e), status=400, content_type='text/plain')
+        except FileNotFoundError:
+            raise Http404('Image not found')
+        
+        response = serving.file_response(
+            request, cached, media.CONTENT_TYPES[fmt], f'"{etag}"', cache_control=IMMUTABLE_CACHE_CONTROL
+        )
+        response['Vary'] = 'Accept'
+        return response
+
+
+
+class MediaFileView(View):
+    """Serve uploaded media with byte ranges and far-future cache headers"""
+    
+    def get(self, request, path):
+        try:
+            full_path = safe_join(settings.MEDIA_ROOT, path)
+        except SuspiciousFileOperation:
+            raise Http404('Invalid path')
+        if not os.path.isfile(full_path):
+            raise Http404('File not found')
+        
+        if storage.is_content_addressed(path):
+            etag = f'"{storage.digest_from_name(path)}"'
+        else:
+            stat = os.stat(full_path)
+            etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        content_type, _ = mimetypes.guess_type(full_path)
+        # Stored names never change meaning: uploads are named by content hash
+        # and variants by their source's name
+        return serving.file_response(
+            request, full_path, content_type or 'application/octet-stream', etag,
+            cache_control=IMMUTABLE_CACHE_CONTROL
+        )
+
+
+class StaticFileView(View):
+    """Serve collected static files when DEBUG is off, e.g. under gunicorn, which sends them with sendfile"""
+    
+    def get(self, request, path):
+        try:
+            full_path = safe_join(settings.STATIC_ROOT, path)
+        except SuspiciousFileOperation:
+            raise Http404('Invalid path')
+        if not os.path.isfile(full_path):
+            raise Http404('File not found')
+        
+        stat = os.stat(full_path)
+        content_type, _ = mimetypes.guess_type(full_path)
+        # Names aren't fingerprinted (unlike /static/dist/), so clients revalidate hourly
+        return serving.file_response(
+            request, full_path, content_type or 'application/octet-stream',
+            f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"', cache_control=STATIC_CACHE_CONTROL
+        )
+
+
+
+class BuiltAssetView(View):
+    """Serve built frontend assets, precompressed when the client accepts it"""
+    
+    def get(self, request, path):
+        try:
+            full_path = safe_join(assets.dist_dir(), path)
+        except SuspiciousFileOperation:
+            raise Http404('Invalid path')
+        if path.endswith(tuple(assets.ENCODINGS.values())) or not os.path.isfile(full_path):
+            raise Http404('File not found')
+        
+        content_type, _ = mimetypes.guess_type(full_path)
+        encoded_path, encoding = assets.find_encoded(full_path, request.headers.get('Accept-Encoding'))
+        # Built names contain their content hash, so they never change meaning
+        stem = os.path.splitext(os.path.basename(full_path))[0]
+        etag = f'"{stem}-{encoding}"' if encoding else f'"{stem}"'
+        response = serving.file_response(
+            request, encoded_path, content_type or 'application/octet-stream', etag,
+            cache_control=IMMUTABLE_CACHE_CONTROL
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response['Vary'] = 'Accept-Encoding'
+        return response
+
+
+
+class StaffUploadMixin:
+    """Chunked upload endpoints are only open to staff users"""
+    
+    def dispatch(self, request, *args, **kwargs):
+        if not (request.user.is_authenticated and request.user.is_staff):
+            return JsonResponse({'error': 'Staff login required'}, status=403)
+        return super().dispatch(request, *args, **kwargs)
+    
+    def get_session(self, session_id):
+        try:
+            return UploadSession.objects.get(id=session_id)
+        except UploadSession.DoesNotExist:
+            raise Http404('Upload not found')
+
+
+class UploadSessionsAPIView(StaffUploadMixin, View):
+    """Start a resumable chunked upload"""
+    
+    def post(self, request):
+        try:
+            data = json.loads(request.body)
+            session = uploads.create_session(
+                request.user,
+                target=data.get('target', ''),
+                filename=data.get('filename', ''),
+                size=int(data.get('size', 0)),
+                chunk_size=int(data['chunk_size']) if data.get('chunk_size') else None,
+                sha256=data.get('sha256', ''),
+            )
+        except (ValueError, TypeError, AttributeError) as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        return JsonResponse(uploads.status(session), status=201)
+
+
+class UploadSessionAPIView(StaffUploadMixin, View):
+    """Progress of an upload, used by clients to resume; DELETE abandons it"""
+    
+    def get(self, request, session_id):
+        return JsonResponse(uploads.status(self.get_session(session_id)))
+    
+    def delete(self, request, session_id):
+        uploads.abort(self.get_session(session_id))
+        return HttpResponse(status=204)
+
+
+class UploadChunkAPIView(StaffUploadMixin, View):
+    """Receive one chunk; the body is streamed to disk, never read into memory"""
+    
+    def put(self, request, session_id, index):
+        session = self.get_session(session_id)
+        try:
+            uploads.write_chunk(session, index, request, sha256=request.headers.get('X-Chunk-SHA256', ''))
+        except uploads.UploadError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        return JsonResponse({'index': index, 'received': len(uploads.received_chunks(session))})
+
+
+class UploadCompleteAPIView(StaffUploadMixin, View):
+    """Assemble the chunks and move the file into media storage"""
+    
+    def post(self, request, session_id):
+        session = self.get_session(session_id)
+        try:
+            uploads.complete(session)
+        except uploads.UploadError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        return JsonResponse(uploads.status(session))
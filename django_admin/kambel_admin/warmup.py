@@ -0,0 +1,145 @@
+"""
+Cache warm-up
+
+warm() requests every public GET API (the SEO content of every page
+included), every frontend page and a suggestion lookup, WARM_UP_WORKERS at a
+time. Requests go through the full middleware stack of this process, which
+fills the API response cache, the typeahead index and the database's page
+cache before the first visitor arrives. With a base URL they are sent over
+HTTP instead, to warm a running instance, e.g. from a deploy script.
+
+With WARM_UP_ON_BOOT set, wsgi.py starts a warm-up in the background when a
+worker loads the application, and /api/ready/ answers 503 until it has
+finished, so a load balancer only routes traffic to warm workers. Under
+gunicorn with preload_app the warm-up runs in the master, which waits for it
+before forking (see gunicorn.conf.py), so every worker starts warm.
+"""
+import logging
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+from django.db import connection
+from django.test import RequestFactory
+
+from . import static_site
+
+
+logger = logging.getLogger(__name__)
+
+# Builds the typeahead index, which is otherwise built by the first lookup
+EXTRA_PATHS = ['api/suggest/?q=a']
+
+_state = {'ready': True, 'total': 0, 'done': 0, 'failed': 0, 'seconds': None}
+_lock = threading.Lock()
+_handler = None
+_thread = None
+
+
+def workers():
+    return getattr(settings, 'WARM_UP_WORKERS', 8)
+
+
+def paths():
+    """URL paths, without the leading slash, of everything worth warming"""
+    return list(static_site.api_outputs()) + EXTRA_PATHS + list(static_site.page_outputs())
+
+
+def status():
+    with _lock:
+        return dict(_state)
+
+
+def is_ready():
+    return status()['ready']
+
+
+def fetch_local(path):
+    """Status code of a GET for path, handled by this process"""
+    global _handler
+    if _handler is None:
+        handler = BaseHandler()
+        handler.load_middleware()
+        _handler = handler
+    url = urlsplit(static_site.base_url())
+    request = RequestFactory().get(f'/{path}', secure=url.scheme == 'https', HTTP_HOST=url.netloc)
+    try:
+        response = _handler.get_response(request)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        response.close()
+        return response.status_code
+    finally:
+        connection.close()
+
+
+def fetch_http(base_url, path):
+    """Status code of a GET for path from the instance at base_url"""
+    try:
+        with urllib.request.urlopen(f"{base_url.rstrip('/')}/{path}", timeout=30) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def warm(base_url=None, max_workers=None):
+    """Request every path, max_workers at a time; returns {path: status code, or the exception raised}"""
+    targets = paths()
+    with _lock:
+        _state.update(ready=False, total=len(targets), done=0, failed=0, seconds=None)
+    start = time.monotonic()
+
+    def fetch(path):
+        try:
+            result = fetch_http(base_url, path) if base_url else fetch_local(path)
+        except Exception as e:
+            result = e
+        with _lock:
+            _state['done'] += 1
+            if result != 200:
+                _state['failed'] += 1
+        return path, result
+
+    with ThreadPoolExecutor(max_workers=max_workers or workers(), thread_name_prefix='warm-up') as executor:
+        results = dict(executor.map(fetch, targets))
+    with _lock:
+        _state.update(ready=True, seconds=round(time.monotonic() - start, 3))
+    return results
+
+
+def start():
+    """Warm up in the background if WARM_UP_ON_BOOT is set; the process isn't ready until it's done"""
+    if not getattr(settings, 'WARM_UP_ON_BOOT', False):
+        return
+    with _lock:
+        _state['ready'] = False
+
+    def run():
+        try:
+            results = warm()
+            failed = {path: result for path, result in results.items() if result != 200}
+            if failed:
+                logger.warning('Warm-up could not fetch %s', ', '.join(f'/{path} ({result})' for path, result in failed.items()))
+        except Exception:
+            logger.exception('Warm-up failed')
+            with _lock:
+                _state['ready'] = True
+
+    global _thread
+    _thread = threading.Thread(target=run, name='warm-up', daemon=True)
+    _thread.start()
+
+
+def wait(timeout=None):
+    """Block until the warm-up started by start() is over; returns False if none was started"""
+    if _thread is None:
+        return False
+    _thread.join(timeout)
+    return True
@@ -9,3 +9,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kambel_admin.settings')
 
 application = get_wsgi_application()
+
+# Warm the caches in the background when WARM_UP_ON_BOOT is set
+from kambel_admin import warmup  # noqa: E402
+
+warmup.start()
@@ -0,0 +1,172 @@
+// Send gallery video files through the resumable chunked upload API
+// instead of the form POST, so large files survive dropped connections
+(function() {
+    'use strict';
+
+    const API = '/api/uploads/';
+    const TARGET = 'gallery.video_file';
+    const CHUNK_SIZE = 8 * 1024 * 1024;
+    const PARALLEL = 3;
+    const RETRIES = 5;
+
+    function csrfToken() {
+        const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+        if (match) {
+            return decodeURIComponent(match[1]);
+        }
+        const input = document.querySelector('input[name=csrfmiddlewaretoken]');
+        return input ? input.value : '';
+    }
+
+    async function request(method, url, body, headers) {
+        const response = await fetch(url, {
+            method: method,
+            body: body,
+            credentials: 'same-origin',
+            headers: Object.assign({'X-CSRFToken': csrfToken()}, headers || {}),
+        });
+        const data = response.status === 204 ? {} : await response.json();
+        if (!response.ok) {
+            const error = new Error(data.error || response.statusText);
+            error.status = response.status;
+            throw error;
+        }
+        return data;
+    }
+
+    async function sha256(blob) {
+        if (!(window.crypto && window.crypto.subtle)) {
+            return '';  // Only available on secure origins; the server still checks lengths
+        }
+        const digest = await window.crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+        return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+    }
+
+    function sleep(ms) {
+        return new Promise(resolve => setTimeout(resolve, ms));
+    }
+
+    // Uploads are resumed when the same file is picked again after a failure or reload
+    function resumeKey(file) {
+        return 'chunked-upload:' + [TARGET, file.name, file.size, file.lastModified].join(':');
+    }
+
+    async function openSession(file) {
+        const key = resumeKey(file);
+        const saved = localStorage.getItem(key);
+        if (saved) {
+            try {
+                const session = await request('GET', API + saved + '/');
+                if (!session.complete) {
+                    return session;
+                }
+            } catch (e) {
+                // Expired or removed; start again
+            }
+            localStorage.removeItem(key);
+        }
+        const session = await request('POST', API, JSON.stringify({
+            target: TARGET, filename: file.name, size: file.size, chunk_size: CHUNK_SIZE,
+        }), {'Content-Type': 'application/json'});
+        localStorage.setItem(key, session.id);
+        return session;
+    }
+
+    async function sendChunk(session, file, index) {
+        const start = index * session.chunk_size;
+        const blob = file.slice(start, Math.min(start + session.chunk_size, file.size));
+        const checksum = await sha256(blob);
+        for (let attempt = 0; ; attempt++) {
+            try {
+                return await request('PUT', API + session.id + '/chunks/' + index, blob, {
+                    'Content-Type': 'application/octet-stream',
+                    'X-Chunk-SHA256': checksum,
+                });
+            } catch (e) {
+                if (attempt >= RETRIES || (e.status && e.status < 500 && e.status !== 429)) {
+                    throw e;
+                }
+                await sleep(Math.min(1000 * 2 ** attempt, 15000));
+            }
+        }
+    }
+
+    async function upload(file, progress) {
+        const session = await openSession(file);
+        const received = new Set(session.received);
+        const pending = [];
+        for (let i = 0; i < session.total_chunks; i++) {
+            if (!received.has(i)) {
+                pending.push(i);
+            }
+        }
+        let done = session.total_chunks - pending.length;
+        progress(done / session.total_chunks);
+
+        async function worker() {
+            while (pending.length) {
+                await sendChunk(session, file, pending.shift());
+                progress(++done / session.total_chunks);
+            }
+        }
+        const workers = [];
+        for (let i = 0; i < PARALLEL; i++) {
+            workers.push(worker());
+        }
+        await Promise.all(workers);
+
+        const result = await request('POST', API + session.id + '/complete/');
+        localStorage.removeItem(resumeKey(file));
+        return result;
+    }
+
+    document.addEventListener('DOMContentLoaded', function() {
+        const input = document.getElementById('id_video_file');
+        const hidden = document.getElementById('id_video_file_upload');
+        if (!input || !hidden || !window.fetch) {
+            return;
+        }
+        const form = input.form;
+        const status = document.createElement('div');
+        status.className = 'help';
+        const bar = document.createElement('progress');
+        bar.max = 1;
+        bar.value = 0;
+        bar.hidden = true;
+        input.insertAdjacentElement('afterend', status);
+        input.insertAdjacentElement('afterend', bar);
+        let busy = false;
+
+        input.addEventListener('change', async function() {
+            const file = input.files[0];
+            hidden.value = '';
+            if (!file) {
+                return;
+            }
+            busy = true;
+            bar.hidden = false;
+            status.textContent = 'Uploading ' + file.name + '…';
+            try {
+                const result = await upload(file, function(fraction) {
+                    bar.value = fraction;
+                    status.textContent = 'Uploading ' + file.name + ': ' + Math.floor(fraction * 100) + '%';
+                });
+                hidden.value = result.id;
+                // The file is already on the server; don't send it again with the form
+                input.value = '';
+                status.textContent = file.name + ' uploaded. Save the item to attach it.';
+            } catch (e) {
+                status.textContent = 'Upload failed: ' + e.message + '. Choose the file again to resume.';
+            } finally {
+                busy = false;
+            }
+        });
+
+        form.addEventListener('submit', function(event) {
+            if (busy) {
+                event.preventDefault();
+                alert('Please wait for the video upload to finish.');
+            }
+        });
+    });
+})();
@@ -0,0 +1,55 @@
+"""
+gunicorn settings for the Flask proxy in production (python3 run.py --production)
+
+    gunicorn -c gunicorn.conf.py app:app
+
+The proxy spends nearly all of a request waiting on Django, so each worker
+process runs gevent: requests are greenlets that yield whenever they wait on
+a socket, and one worker per CPU holds worker_connections of them at once
+for the memory of a few threads. Without gevent installed, gthread workers
+with a large thread pool are used instead. The app isn't preloaded because
+gevent has to patch the standard library in each worker before app.py
+creates its locks and connection pools.
+
+Every value can be overridden with the usual GUNICORN_CMD_ARGS, or the
+environment variables below.
+"""
+import importlib.util
+import multiprocessing
+import os
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5001')
+
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+if importlib.util.find_spec('gevent') is not None:
+    worker_class = 'gevent'
+    worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+else:
+    worker_class = 'gthread'
+    threads = int(os.environ.get('GUNICORN_THREADS', 64))
+
+preload_app = False
+
+# Seconds a request may take, seconds a worker gets to finish its requests
+# on shutdown or reload, and seconds an idle keep-alive connection stays open
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle each worker after about this many requests; the jitter keeps them
+# from all restarting at once
+max_requests = 5000
+max_requests_jitter = 500
+
+errorlog = '-'
+raw_env = ['FLASK_DEBUG=0']
+
+
+def post_worker_init(worker):
+    """Warm up each worker as it starts if WARM_UP_ON_BOOT is set; workers after
+    the first find most responses in the shared cache already"""
+    from app import app, start_warm_up
+
+    if app.config['WARM_UP_ON_BOOT']:
+        start_warm_up()
@@ -0,0 +1,100 @@
+"""
+HTTP load generator for comparing server modes
+
+Each client is a thread with its own keep-alive connection that requests the
+given paths in turn until the time is up. run() returns throughput, latency
+percentiles and the number of failed requests (errors or non-2xx answers).
+Python threads are light enough for a few hundred clients; compare modes on
+the same machine so the generator's own cost is the same for all.
+"""
+import socket
+import statistics
+import threading
+import time
+from http.client import HTTPConnection
+from urllib.parse import urlsplit
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run(url, paths, clients=500, seconds=10, timeout=30):
+    """{'requests', 'rps', 'p50', 'p99', 'max', 'errors'} of clients requesting paths at url for seconds"""
+    parts = urlsplit(url)
+    base = parts.path.rstrip('/')
+    latencies, errors = [], []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(clients + 1)
+    deadline = None
+
+    def client(offset):
+        connection = HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+        mine, failed, i = [], 0, offset
+        start_barrier.wait()
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                connection.request('GET', base + paths[i % len(paths)])
+                response = connection.getresponse()
+                response.read()
+                if not 200 <= response.status < 300:
+                    failed += 1
+                if response.will_close:
+                    connection.close()
+            except OSError:
+                failed += 1
+                connection.close()
+            mine.append((time.perf_counter() - start) * 1000)
+            i += 1
+        connection.close()
+        with lock:
+            latencies.extend(mine)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=client, args=(n,), daemon=True) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + seconds
+    start_barrier.wait()
+    started = time.monotonic()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    latencies.sort()
+    if not latencies:
+        return {'requests': 0, 'rps': 0, 'p50': None, 'p99': None, 'max': None, 'errors': sum(errors)}
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed),
+        'p50': round(statistics.median(latencies), 1),
+        'p99': round(percentile(latencies, 0.99), 1),
+        'max': round(latencies[-1], 1),
+        'errors': sum(errors),
+    }
+
+
+def wait_until_up(url, timeout=60, process=None):
+    """Poll url until it answers 200; raises RuntimeError if it doesn't in time or process exits"""
+    parts = urlsplit(url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f'Server exited with status {process.returncode}')
+        try:
+            connection = HTTPConnection(parts.hostname, parts.port or 80, timeout=5)
+            connection.request('GET', parts.path or '/')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        finally:
+            connection.close()
+        time.sleep(0.2)
+    raise RuntimeError(f'{url} did not come up within {timeout} seconds')
@@ -0,0 +1,207 @@
+"""
+Cache of Django API responses for the Flask proxy
+
+Entries are keyed by API endpoint (relative to /api/) and remember the
+content version Django reported with them. Django pushes an invalidation
+event after every change to public content
+(django_admin/kambel_admin/invalidation.py) and the entries of the endpoints
+it names are dropped right away, so edits show up at once and the TTL can be
+long.
+
+Events can get lost, e.g. while the proxy restarts or when Django gives up
+on a proxy that was down. So at most every check_interval seconds the proxy
+asks Django for its content version; when that is ahead of the events
+received, every entry older than it is dropped. A lost event therefore
+leaves stale data for check_interval at most, and the TTL bounds it even
+when Django can't be reached.
+
+Entries live in this process by default. With a SharedCache store (a local
+SQLite file) all worker processes share them, and they outlive restarts;
+that's why the version is also checked on first use.
+
+WarmUp fills the cache ahead of visitors by fetching a list of paths with a
+bounded pool (of threads, or of coroutines for async_app.py), and tells
+whether it has finished, for readiness checks.
+"""
+import asyncio
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def endpoint_pattern(endpoint):
+    """Regex for the keys of an endpoint; URL parameters such as <str:page> match any value"""
+    return re.compile(re.sub(r'<[^>]+>', '[^/]+', re.escape(endpoint)))
+
+
+class LocalStore:
+    """Entries kept in this process, with the interface of kambel_admin.sqlite_cache.SharedCache"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None or (entry[1] is not None and entry[1] <= time.monotonic()):
+            return default
+        return entry[0]
+
+    def set(self, key, value, timeout=None):
+        with self._lock:
+            self._entries[key] = (value, None if timeout is None else time.monotonic() + timeout)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def keys(self, prefix=''):
+        return [key for key in list(self._entries) if key.startswith(prefix) and self.get(key) is not None]
+
+
+class ProxyCache:
+    """Django API responses by endpoint, in a LocalStore or, to share them
+    between worker processes, a SharedCache"""
+
+    PREFIX = 'api:'
+    SYNCED_VERSION_KEY = 'synced-version'
+
+    def __init__(self, ttl=300, check_interval=30, store=None):
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.store = store if store is not None else LocalStore()
+        self._lock = threading.Lock()
+        # Entries may outlive the process in a shared store, so check right away
+        self._checked_at = None
+
+    @property
+    def synced_version(self):
+        """Content version up to which events have been received or checked"""
+        return self.store.get(self.SYNCED_VERSION_KEY, 0)
+
+    def _sync(self, version):
+        if version > self.synced_version:
+            self.store.set(self.SYNCED_VERSION_KEY, version)
+
+    def get(self, key):
+        """Cached value of an endpoint, or None"""
+        entry = self.store.get(self.PREFIX + key)
+        return None if entry is None else entry[0]
+
+    def set(self, key, value, version):
+        """Cache the value Django returned at a content version; a value older
+        than an event already received, fetched while it came in, is not kept"""
+        if version < self.synced_version:
+            return
+        self.store.set(self.PREFIX + key, (value, version), self.ttl)
+
+    def keys(self):
+        return [key[len(self.PREFIX):] for key in self.store.keys(self.PREFIX)]
+
+    def _drop(self, keys):
+        self.store.delete_many([self.PREFIX + key for key in keys])
+
+    def clear(self):
+        self._drop(self.keys())
+
+    def invalidate(self, endpoints, version):
+        """Drop the entries of the given endpoints; returns the dropped keys"""
+        patterns = [endpoint_pattern(endpoint) for endpoint in endpoints]
+        evicted = [key for key in self.keys() if any(p.fullmatch(key.split('?')[0]) for p in patterns)]
+        self._drop(evicted)
+        self._sync(version)
+        return evicted
+
+    def needs_check(self):
+        """Whether it's time to compare versions with Django; True for one caller per interval"""
+        with self._lock:
+            if self._checked_at is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return False
+            self._checked_at = time.monotonic()
+            return True
+
+    def check_version(self, version):
+        """Catch up with Django's content version; returns the keys dropped because events were missed"""
+        with self._lock:
+            self._checked_at = time.monotonic()
+        synced = self.synced_version
+        if version < synced:
+            # Django's database was recreated or restored, so the counter started over
+            evicted = self.keys()
+            self._drop(evicted)
+            self.store.set(self.SYNCED_VERSION_KEY, version)
+            return evicted
+        # Also when no event was missed: an entry older than the synced version
+        # can still have been written by a fetch that raced with the event
+        evicted = []
+        for key in self.keys():
+            entry = self.store.get(self.PREFIX + key)
+            if entry is not None and entry[1] < version:
+                evicted.append(key)
+        self._drop(evicted)
+        self._sync(version)
+        return evicted
+
+
+class WarmUp:
+    def __init__(self, ready=True):
+        self._state = {'ready': ready, 'total': 0, 'done': 0, 'failed': 0, 'seconds': None}
+        self._lock = threading.Lock()
+
+    def status(self):
+        with self._lock:
+            return dict(self._state)
+
+    def is_ready(self):
+        return self.status()['ready']
+
+    def run(self, fetch, paths, workers=8):
+        """Call fetch(path) for every path, workers at a time; returns {path: status code, or the exception raised}"""
+        with self._lock:
+            self._state.update(ready=False, total=len(paths), done=0, failed=0, seconds=None)
+        start = time.monotonic()
+
+        def call(path):
+            try:
+                result = fetch(path)
+            except Exception as e:
+                result = e
+            with self._lock:
+                self._state['done'] += 1
+                if result != 200:
+                    self._state['failed'] += 1
+            return path, result
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='warm-up') as executor:
+                return dict(executor.map(call, paths))
+        finally:
+            with self._lock:
+                self._state.update(ready=True, seconds=round(time.monotonic() - start, 3))
+
+    async def run_async(self, fetch, paths, workers=8):
+        """run() for a coroutine function fetch, awaited workers at a time"""
+        with self._lock:
+            self._state.update(ready=False, total=len(paths), done=0, failed=0, seconds=None)
+        start = time.monotonic()
+        semaphore = asyncio.Semaphore(workers)
+
+        async def call(path):
+            async with semaphore:
+                try:
+                    result = await fetch(path)
+                except Exception as e:
+                    result = e
+            with self._lock:
+                self._state['done'] += 1
+                if result != 200:
+                    self._state['failed'] += 1
+            return path, result
+
+        try:
+            return dict(await asyncio.gather(*(call(path) for path in paths)))
+        finally:
+            with self._lock:
+                self._state.update(ready=True, seconds=round(time.monotonic() - start, 3))
@@ -2,14 +2,44 @@
 """
 Kambel Consult Website Runner
 This script starts the Flask application with proper configuration.
+
+    python3 run.py                 # development server with debugger and reloader
+    python3 run.py --production    # gunicorn with gevent workers, see gunicorn.conf.py
+    python3 run.py --async         # the asyncio proxy, see async_app.py
 """
 
+import importlib.util
 import os
+import subprocess
 import sys
-from app import app
+from app import app, start_warm_up
+
+def serve_production():
+    """Serve the app with gunicorn: no debugger or reloader, cooperative workers for upstream-bound requests"""
+    if importlib.util.find_spec('gunicorn') is None:
+        print("gunicorn is not installed: pip install -r requirements.txt")
+        sys.exit(1)
+    if importlib.util.find_spec('gevent') is None:
+        print("gevent is not installed; falling back to threaded workers")
+    try:
+        subprocess.run(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+            cwd=app.root_path, env=dict(os.environ, FLASK_DEBUG='0'), check=True
+        )
+    except KeyboardInterrupt:
+        print("\nServer stopped by user")
 
 def main():
     """Main function to run the application"""
+    if '--production' in sys.argv[1:]:
+        serve_production()
+        return
+    if '--async' in sys.argv[1:]:
+        import async_app
+        sys.argv = [sys.argv[0]]
+        async_app.main()
+        return
+    
     # Set environment variables
     os.environ.setdefault('FLASK_ENV', 'development')
     os.environ.setdefault('FLASK_DEBUG', '1')
@@ -25,6 +55,10 @@ def main():
     print("Press Ctrl+C to stop the server")
     print("=" * 50)
     
+    # The debug reloader imports the app twice; only its child serves requests
+    if app.config['WARM_UP_ON_BOOT'] and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_warm_up()
+
     try:
         # Run the Flask application
         app.run(
@@ -2,11 +2,36 @@
 """
 Single entry point to start the Kambel Consult application
 Everything runs on port 8000 - both website and admin panel
+
+    python3 start.py                 # development server with auto-reload
+    python3 start.py --production    # gunicorn, see django_admin/gunicorn.conf.py
 """
+import importlib.util
 import os
 import sys
 import subprocess
 
+DJANGO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'django_admin')
+
+
+def serve_production():
+    """Collect static files, then serve the app with preforked gunicorn workers"""
+    if importlib.util.find_spec('gunicorn') is None:
+        print("gunicorn is not installed: pip install -r django_admin/requirements.txt")
+        sys.exit(1)
+    env = dict(os.environ, DJANGO_DEBUG='False')
+    print("📦 Collecting static files...")
+    subprocess.run([sys.executable, 'manage.py', 'collectstatic', '--noinput', '-v', '0'], cwd=DJANGO_DIR, env=env, check=True)
+    print("🚀 Starting gunicorn...")
+    try:
+        subprocess.run(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'kambel_admin.wsgi:application'],
+            cwd=DJANGO_DIR, env=env, check=True
+        )
+    except KeyboardInterrupt:
+        print("\n\nStopping server...")
+
+
 def main():
     print("=" * 60)
     print("🚀 Kambel Consult - Starting Application")
@@ -16,8 +41,12 @@ def main():
     print("=" * 60)
     print("")
     
+    if '--production' in sys.argv[1:]:
+        serve_production()
+        return
+    
     # Change to django_admin directory
-    os.chdir('django_admin')
+    os.chdir(DJANGO_DIR)
     
     # Start Django development server
     try:
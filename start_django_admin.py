@@ -92,6 +92,11 @@ def main():
     print("🔐 Login: admin / admin123")
     print("=" * 60)
     
+    if '--production' in sys.argv[1:]:
+        from start import serve_production
+        serve_production()
+        return
+    
     # Start Django development server
     print("🚀 Starting Django development server...")
     try: